@@ -1,3 +1,5 @@
 from .admm_oo import ADMM, load
 from . import report
-from .sharing import form_sharing_prox
\ No newline at end of file
+from .sharing import form_sharing_prox, form_sharded_sharing_prox
+from .projections import (form_box_prox, form_nonneg_prox, form_budget_prox,
+                          form_simplex_prox, form_pin_prox)
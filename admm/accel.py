@@ -0,0 +1,152 @@
+from collections import defaultdict
+
+import numpy as np
+
+"""
+Anderson acceleration of the ADMM iteration.
+
+One ADMM step is a fixed-point map z -> T(z) on z = (xbar, u_1, ..., u_m).
+Anderson acceleration keeps the last few iterates and their fixed-point
+residuals f = T(z) - z, and extrapolates to the combination of them with
+the smallest residual (type-II Anderson, as in Walker and Ni, 2011, or
+Zhang, O'Donoghue and Boyd, 2018).
+
+It is safeguarded: if the ADMM residuals increase after an accelerated
+step, the memory is cleared and the plain ADMM iterate is used instead.
+The memory is also cleared whenever the map changes under it: when rho is
+adjusted, or when some prox changes its key set.
+
+`DictLayout` and `array_state_vector` flatten the state of the dict and
+array engines into the vector z, and back.
+"""
+
+class Anderson:
+    """ Safeguarded Anderson acceleration of a fixed-point iteration.
+
+    Parameters
+    ----------
+    memory : int
+        Number of previous iterates to extrapolate from.
+    restart : bool
+        Clear the memory (and skip extrapolating) when the residual
+        passed to `update` increases.
+    """
+    def __init__(self, memory=5, restart=True):
+        self.memory = memory
+        self.restart = restart
+        self.restarts = 0
+        self.reset()
+
+    def reset(self):
+        self.dF = []
+        self.dG = []
+        self.z = None
+        self.f = None
+        self.g = None
+        self.resid = None
+
+    def update(self, g, resid=None):
+        """ Given `g = T(z)` for the last `z` returned (or any starting
+        point, after a reset), return the next point to iterate from.
+        """
+        if self.z is None or len(g) != len(self.z):
+            self.reset()
+            self.z = g
+            self.resid = resid
+            return g
+
+        f = g - self.z
+
+        if (self.restart and resid is not None and self.resid is not None
+                and resid > self.resid):
+            self.restarts += 1
+            self.dF = []
+            self.dG = []
+        elif self.f is not None:
+            self.dF += [f - self.f]
+            self.dG += [g - self.g]
+            if len(self.dF) > self.memory:
+                self.dF = self.dF[1:]
+                self.dG = self.dG[1:]
+
+        self.f = f
+        self.g = g
+        self.resid = resid
+
+        z = g
+        if self.dF:
+            F = np.column_stack(self.dF)
+            G = np.column_stack(self.dG)
+            gamma = np.linalg.lstsq(F, f, rcond=None)[0]
+            z = g - G @ gamma
+            if not np.all(np.isfinite(z)):
+                z = g
+                self.dF = []
+                self.dG = []
+
+        self.z = z
+        return z
+
+    @property
+    def depth(self):
+        """ Number of previous iterates used in the last extrapolation. """
+        return len(self.dF)
+
+
+class DictLayout:
+    """ Layout of dicts of values (xbar and the us, for the dict engine)
+    as one flat vector.
+    """
+    def __init__(self, ds):
+        self.keys = [list(d) for d in ds]
+        self.keysets = [d.keys() for d in ds]
+        self.shapes = [[np.shape(d[k]) for k in keys]
+                       for d, keys in zip(ds, self.keys)]
+        self.scalar = all(s == () for shapes in self.shapes for s in shapes)
+
+    def matches(self, ds):
+        return (len(ds) == len(self.keys)
+                and all(d.keys() == ks for d, ks in zip(ds, self.keysets)))
+
+    def flatten(self, ds):
+        if self.scalar:
+            n = sum(len(keys) for keys in self.keys)
+            return np.fromiter((d[k] for d, keys in zip(ds, self.keys)
+                                for k in keys), float, n)
+
+        vals = [np.ravel(d[k]) for d, keys in zip(ds, self.keys) for k in keys]
+        if not vals:
+            return np.zeros(0)
+        return np.concatenate(vals).astype(float, copy=False)
+
+    def unflatten(self, z):
+        """ `defaultdict`s like those `flatten`ed, with the values of `z`. """
+        out = []
+        j = 0
+        for keys, shapes in zip(self.keys, self.shapes):
+            d = defaultdict(float)
+            for k, shape in zip(keys, shapes):
+                if shape == ():
+                    d[k] = float(z[j])
+                    j += 1
+                else:
+                    size = int(np.prod(shape))
+                    d[k] = z[j:j+size].reshape(shape).copy()
+                    j += size
+            out += [d]
+        return out
+
+
+def array_state_vector(state):
+    """ xbar and the prox duals of an `engine.ArrayState`, as one vector. """
+    us = [lay.u for lay in state.layouts if lay is not None]
+    return np.concatenate([state.xbar] + us)
+
+def set_array_state_vector(state, z):
+    """ Inverse of `array_state_vector`, updating `state` in place. """
+    n = len(state.xbar)
+    state.xbar = z[:n].copy()
+    for lay in state.layouts:
+        if lay is not None:
+            lay.u = z[n:n+len(lay.u)].copy()
+            n += len(lay.u)
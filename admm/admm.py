@@ -1,9 +1,9 @@
 from collections import defaultdict
-from .rho_adjust import rescale_rho_duals
-from .timer import Timer, PrintTimer
+from .rho_adjust import rescale_rho_duals, local_copies
+from .timer import PrintTimer, level_timers
 
-from .functional import map_apply, fast_avg
-from .resid import general_residuals, float_residuals
+from .functional import map_apply, async_map_apply, fast_avg
+from .resid import stopping_norms
 
 import numpy as np
 from toolz import keyfilter
@@ -73,6 +73,120 @@ def update_u(u, x, xbar):
     for k in x:
         u[k] = u[k] + x[k] - xbar[k]
 
+def reassign_dual(us, i, keys):
+    """ Restrict the dual `us[i]` to `keys`, for a prox whose keys changed.
+    Keys it keeps keep their dual; new keys start at zero.
+
+    The dual of each key it drops is spread evenly over the other duals
+    on that key, so the duals of each key still sum to zero (as averaging
+    the prox outputs into xbar assumes). Modifies us.
+
+    Returns the number of other duals on each dropped key (0 for the keys
+    no other prox has).
+    """
+    u = us[i]
+    dropped = {k: v for k, v in u.items() if k not in keys}
+
+    sharing = defaultdict(list)
+    if dropped:
+        for j, uj in enumerate(us):
+            if j != i:
+                for k in dropped.keys() & uj.keys():
+                    sharing[k] += [uj]
+
+        for k, others in sharing.items():
+            share = dropped[k]/len(others)
+            for uj in others:
+                uj[k] = uj[k] + share
+
+    new = defaultdict(float)
+    for k in keys:
+        new[k] = u[k] if k in u else 0.0
+    us[i] = new
+
+    return {k: len(sharing[k]) if k in sharing else 0 for k in dropped}
+
+def relax(x, xbar, alpha):
+    """ Over-relaxed prox output, alpha*x + (1-alpha)*xbar,
+    over the keys of x.
+    """
+    beta = 1.0 - alpha
+    return {k: alpha*v + beta*xbar.get(k, 0.0) for k, v in x.items()}
+
+def fused_update(xs, us, xbarold, rho, resid=True, norms=None):
+    """ Average the prox outputs, update the us and compute the residuals,
+    in two passes over the prox outputs (and one over the keys), instead of
+    separate passes for `fast_avg`, `update_u` and the residuals.
+
+    Float values take a fast path; anything else (numpy arrays) is handled
+    like in `general_residuals`, so there is no need to pick a residual
+    function by hand.
+
+    With `resid` False, the residuals are skipped (and returned as None).
+    If `norms` is a dict, the `resid.stopping_norms` are accumulated into
+    it in the same passes.
+
+    Modifies us. Returns xbar, r, s.
+    """
+    total = {}
+    count = {}
+
+    for x in xs:
+        for k,v in x.items():
+            if k in count:
+                count[k] += 1
+                total[k] = total[k] + v
+            else:
+                count[k] = 1
+                total[k] = v
+
+    if not resid:
+        xbar = {k: total[k]/c for k,c in count.items()}
+        for u,x in zip(us,xs):
+            for k,v in x.items():
+                u[k] = u[k] + v - xbar[k]
+        return xbar, None, None
+
+    track = norms is not None
+    xbar = {}
+    s = zz = 0.0
+    for k,c in count.items():
+        xb = total[k]/c
+        xbar[k] = xb
+        d = xb - xbarold.get(k, 0.0)
+        if isinstance(d, float):
+            s += c*d*d
+            if track:
+                zz += c*xb*xb
+        else:
+            s += c*np.sum(np.square(d))
+            if track:
+                zz += c*np.sum(np.square(xb))
+
+    r = xx = uu = 0.0
+    n = 0
+    for u,x in zip(us,xs):
+        for k,v in x.items():
+            d = v - xbar[k]
+            u[k] = u[k] + d
+            if isinstance(d, float):
+                r += d*d
+                if track:
+                    xx += v*v
+                    uu += u[k]*u[k]
+                    n += 1
+            else:
+                r += np.sum(np.square(d))
+                if track:
+                    xx += np.sum(np.square(v))
+                    uu += np.sum(np.square(u[k]))
+                    n += np.size(d)
+
+    if track:
+        norms.update(x=np.sqrt(xx), z=np.sqrt(zz), y=rho*np.sqrt(uu), n=n)
+
+    return xbar, np.sqrt(r), rho*np.sqrt(s)
+
 def get_prox_infos(proxes, keys=None):
     if keys is None:
         keys = ['time', 'iter']
@@ -89,11 +203,29 @@ def get_prox_infos(proxes, keys=None):
     return out
         
 def admm_step(proxes, xbar, us, rho, hook=None, mapper=None, rho_adj=None,
-              residuals=general_residuals):
+              residuals=None, instrument='full', tracer=None,
+              alpha=1.0, check=True, norms=False, outputs=None):
     """ Does one ADMM iteration
     - x_i = prox(xbar - u_i)
     - u_i = u_i + x_i _ xbar
 
+    If `residuals` is None, xbar, the us and the residuals are computed
+    together by `fused_update`; otherwise `residuals` is the residual function.
+
+    `instrument` is the level of timing and info recorded in the step info
+    (see `timer.level_timers`). `tracer`, if given, is a `trace.Tracer`
+    recording the execution spans of the step and the proxes.
+
+    `alpha` is the over-relaxation parameter: xbar and the us are updated
+    with `alpha*x_i + (1-alpha)*xbar` in place of each x_i (see `relax`).
+    Values in (1, 2), like 1.6, often speed up convergence.
+
+    With `check` False, the residuals (and the rho adjustment, which
+    needs them) are skipped, and recorded as NaN. With `norms`, the
+    `resid.stopping_norms` for relative stopping tolerances are also
+    recorded, as 'norms'. `outputs`, if given, is a list that is filled
+    with the (relaxed) prox outputs averaged into xbar.
+
     Returns:
     xbar
     us
@@ -103,9 +235,12 @@ def admm_step(proxes, xbar, us, rho, hook=None, mapper=None, rho_adj=None,
     step_info = {}
     step_info['rho'] = rho
 
-    with Timer(step_info, 'total_step'):
+    coarse, phase = level_timers(instrument, tracer)
+    full = instrument == 'full'
+
+    with coarse(step_info, 'total_step'):
         # prep the input to the prox
-        with Timer(step_info, 'x_in'):
+        with phase(step_info, 'x_in'):
             xins = [make_xin(xbar, u) for u in us]
 
         
@@ -113,38 +248,129 @@ def admm_step(proxes, xbar, us, rho, hook=None, mapper=None, rho_adj=None,
         # total time
         # custom info from the proxes
         # built in timing info on each prox
-        with Timer(step_info, 'total_proxes'):
-            out = map_apply(proxes, xins, rep_args=[rho], mapper=mapper)
-            xs, step_info['times']['proxes'] = zip(*out)
+        with phase(step_info, 'total_proxes'):
+            out = map_apply(proxes, xins, rep_args=[rho], mapper=mapper,
+                            timed=full, tracer=tracer)
+            xs, times = zip(*out)
+            if full:
+                step_info['times']['proxes'] = times
+
+        xbar, us, rho = finish_step(proxes, xs, xbar, us, rho, step_info,
+                                    hook=hook, rho_adj=rho_adj,
+                                    residuals=residuals,
+                                    instrument=instrument, tracer=tracer,
+                                    alpha=alpha, check=check, norms=norms,
+                                    outputs=outputs)
+
+    return xbar, us, rho, step_info
+
+async def admm_astep(proxes, xbar, us, rho, hook=None, rho_adj=None,
+                     residuals=None, limit=None, executor=None, mapper=None,
+                     instrument='full', tracer=None, alpha=1.0,
+                     check=True, norms=False, outputs=None):
+    """ Does one ADMM iteration, like `admm_step`, but the proxes are
+    run concurrently on the running event loop (see `async_map_apply`).
+    """
+    step_info = {}
+    step_info['rho'] = rho
+
+    coarse, phase = level_timers(instrument, tracer)
+    full = instrument == 'full'
 
-        with Timer(step_info, 'prox_infos'):
+    with coarse(step_info, 'total_step'):
+        with phase(step_info, 'x_in'):
+            xins = [make_xin(xbar, u) for u in us]
+
+        with phase(step_info, 'total_proxes'):
+            out = await async_map_apply(proxes, xins, rep_args=[rho],
+                                        limit=limit, executor=executor,
+                                        mapper=mapper,
+                                        timed=full, tracer=tracer)
+            xs, times = zip(*out)
+            if full:
+                step_info['times']['proxes'] = times
+
+        xbar, us, rho = finish_step(proxes, xs, xbar, us, rho, step_info,
+                                    hook=hook, rho_adj=rho_adj,
+                                    residuals=residuals,
+                                    instrument=instrument, tracer=tracer,
+                                    alpha=alpha, check=check, norms=norms,
+                                    outputs=outputs)
+
+    return xbar, us, rho, step_info
+
+def finish_step(proxes, xs, xbar, us, rho, step_info, hook=None, rho_adj=None,
+                residuals=None, instrument='full', tracer=None,
+                alpha=1.0, check=True, norms=False, outputs=None):
+    """ The rest of an ADMM iteration, once the prox outputs `xs` are in:
+    averaging, dual update, residuals, rho adjustment and the hook.
+
+    Records timing and info in `step_info`, at the `instrument` level.
+    With the fused update, all of averaging, dual update and residuals
+    is timed as 'xbar', and counts as residual work.
+
+    With over-relaxation (`alpha != 1`), the primal residual is that of
+    the relaxed prox outputs.
+
+    See `admm_step` for `check`, `norms` and `outputs`.
+    """
+    coarse, phase = level_timers(instrument, tracer)
+
+    if instrument == 'full':
+        with phase(step_info, 'prox_infos'):
             step_info['prox_infos'] = get_prox_infos(proxes)
-        
-        with Timer(step_info, 'xbar'):
-            xbarold = xbar
+
+    if alpha != 1.0:
+        with phase(step_info, 'relax'):
+            xs = [relax(x, xbar, alpha) for x in xs]
+
+    if outputs is not None:
+        outputs[:] = xs
+
+    xbarold = xbar
+    if not check:
+        step_info['r'] = step_info['s'] = np.nan
+        with coarse(step_info, 'xbar'):
+            xbar, _, _ = fused_update(xs, us, xbar, rho, resid=False)
+    elif residuals is None:
+        with coarse(step_info, 'xbar'):
+            stop = {} if norms else None
+            xbar, r, s = fused_update(xs, us, xbar, rho, norms=stop)
+            step_info['r'] = r
+            step_info['s'] = s
+            if norms:
+                step_info['norms'] = stop
+    else:
+        with phase(step_info, 'xbar'):
             xbar = fast_avg(xs)
-        
-        with Timer(step_info, 'us'):
+
+        with phase(step_info, 'us'):
             for u,x in zip(us,xs):
                 update_u(u,x,xbar)
-            
+
         # maybe de-mean the us
 
-        with Timer(step_info, 'resid'):
+        with coarse(step_info, 'resid'):
             # compute residuals, update iteration info
             r,s = residuals(xs, xbar, xbarold, rho)
             step_info['r'] = r
             step_info['s'] = s
-
-        # adjust rho?
-        with Timer(step_info, 'rho_scaling'):
+            if norms:
+                step_info['norms'] = stopping_norms(xs, xbar, us, rho)
+
+    # adjust rho?
+    if check:
+        with phase(step_info, 'rho_scaling'):
+            if hasattr(rho_adj, 'observe'):
+                x, zold, z, u, owner = local_copies(xs, us, xbar, xbarold)
+                rho_adj.observe(x, zold, z, u, rho, owner)
             rho, us, step_info = do_scaling(rho_adj, step_info, us)
 
-        if hook:
-            with Timer(step_info, 'hook'):
-                step_info['hook'] = hook(xbar)
-        
-    return xbar, us, rho, step_info
+    if hook:
+        with phase(step_info, 'hook'):
+            step_info['hook'] = hook(xbar)
+
+    return xbar, us, rho
 
 def admm(proxes, rho, steps=10, hook=None, rho_adj=None):
     xbar = defaultdict(float)
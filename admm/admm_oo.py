@@ -3,13 +3,21 @@ from concurrent.futures import ThreadPoolExecutor
 
 import matplotlib.pyplot as plt
 
-from .admm import admm_step
-from .timer import SimpleTimer
+from .admm import admm_step, admm_astep, reassign_dual
+from .engine import ArrayState, array_step, array_astep
+from .backend import ProcessPool
+from .infolog import InfoLog, is_infolog, load_infolog
+from .accel import (Anderson, DictLayout, array_state_vector,
+                    set_array_state_vector)
+from .timer import SimpleTimer, level_timers
+from .checkpoint import (AutoCheckpoint, snapshot, write_checkpoint,
+                         read_checkpoint, apply_snapshot)
 from .rho_adjust import make_resid_gap
 from .report import report_solve, plot_iter_breakdown
-from .resid import general_residuals, float_residuals
+from .resid import general_residuals, float_residuals, tolerances
 
 import json
+import time
 
 import numpy as np
 
@@ -21,11 +29,81 @@ class ADMM:
     proxes maintains the list of prox functions
     infos is the ADMM status info for each iteration
     timed_runs gives the runtime for each chunk of runs
+
+    resid selects how the dict engine computes residuals:
+    - 'auto': together with xbar and the us, in one fused update,
+      choosing float or array math per key
+    - 'general' or 'float': with the functions in `resid.py`,
+      in separate passes
+
+    engine selects how xbar and us are stored:
+    - 'dict': a dict per prox, walked key by key
+    - 'array': flat numpy vectors over interned keys (see `engine.py`);
+      `xbar` and `us` are then built as dicts on access
+
+    telemetry, if given, is a `telemetry.Telemetry` to store the step infos
+    in columnar form, instead of a list of dicts
+
+    log, if given, is an `infolog.InfoLog` (or a directory name for one)
+    that each step info is also streamed to, as the solve progresses
+
+    instrument sets how much timing and info each step records
+    (see `timer.level_timers`):
+    - 'off': only rho and the residuals
+    - 'coarse': also the total step and residual times
+    - 'phase': also the time of each phase of the step
+    - 'full': also each prox time, and each `prox.info`
+
+    tracer, if given, is a `trace.Tracer` recording the execution spans of
+    each step, phase and prox call, for export to a trace viewer
+
+    alpha is the over-relaxation parameter (see `admm.admm_step`);
+    1.0 is plain ADMM
+
+    anderson, if given, is the memory of an `accel.Anderson` acceleration
+    of the iterates (or an `accel.Anderson` instance)
+
+    key_rho and prox_rho, if given, set a separate penalty for some keys
+    (a dict by key) or for each prox (a list), with the 'array' engine.
+    The penalty of each local copy is then `rho` scaled by the factors
+    `key_rho[k]/rho` and `prox_rho[i]/rho`; a rho_adj with `per = 'key'`
+    or `per = 'prox'` adapts those factors (see `rho_adjust.py`), instead
+    of `rho`. Proxes are passed their own rho: a number, with prox_rho
+    alone, or a dict by key, with key_rho. Each step info then also has
+    quantiles of the per-key rhos ('rho_keys') and the per-prox rhos
+    ('rho_proxes').
+
+    backend selects how proxes are run in parallel, when `threads` is given:
+    - 'thread': a thread pool
+    - 'process': worker processes, each owning a fixed subset of the
+      proxes for the whole solve (see `backend.py`); call `close()`
+      (or use the ADMM object as a context manager) to shut them down
+    - 'shared': like 'process', but array values are passed through
+      shared memory instead of being pickled (see `transport.py`). The
+      shared input buffer is overwritten each step, so proxes get copies
+      of their array inputs; a prox that only reads its input during the
+      call can set `prox.shared_views = True` to skip the copy
+    - an object with `map` and `close` methods, like a
+      `distributed.Cluster` or `partial.PartialBarrier`, whose `map` is
+      used as the mapper (`threads` is then ignored). If it has a
+      `step_info` method, its output is added to each step's info.
     """
     def __init__(self, proxes, rho, rho_adj=None, hook=None, threads=None,
-                 resid='general'):
+                 resid='auto', engine='dict', backend='thread', telemetry=None,
+                 log=None, instrument='full', tracer=None, alpha=1.0,
+                 anderson=None, key_rho=None, prox_rho=None):
         self.hook = hook
 
+        level_timers(instrument)
+        self.instrument = instrument
+        self.tracer = tracer
+        self.alpha = alpha
+
+        if isinstance(anderson, int):
+            anderson = Anderson(anderson)
+        self.anderson = anderson
+        self._accel_key = None
+
         if rho_adj is None:
             rho_adj = make_resid_gap()
 
@@ -33,43 +111,328 @@ class ADMM:
 
         self.rho = rho
         self.proxes = list(proxes)
-        self.infos = []
 
-        self.xbar = defaultdict(float)
-        self.us = [defaultdict(float) for _ in proxes]
+        if telemetry is None:
+            telemetry = []
+        self.infos = telemetry
+
+        if isinstance(log, str):
+            log = InfoLog(log)
+        self.log = log
+
+        if engine == 'dict':
+            if (key_rho is not None or prox_rho is not None
+                    or getattr(rho_adj, 'per', None) is not None):
+                raise ValueError("Per-key and per-prox rho need the 'array' engine")
+            self._state = None
+            self.xbar = defaultdict(float)
+            self.us = [defaultdict(float) for _ in self.proxes]
+            # the prox outputs of the last step, to take one out of xbar
+            self._outputs = []
+        elif engine == 'array':
+            self._state = ArrayState(len(self.proxes),
+                                     *self._rho_factors(key_rho, prox_rho))
+        else:
+            raise ValueError('Unrecognized ADMM engine: {}'.format(engine))
+        self.engine = engine
 
         self.timed_runs = []
+        self.iters = 0
+        self._autosave = None
 
-        self.set_threads(threads)
+        self._pool = None
+        self.set_threads(threads, backend)
 
-        if resid == 'general':
+        if resid == 'auto':
+            self._resid = None
+        elif resid == 'general':
             self._resid = general_residuals
         elif resid == 'float':
             self._resid = float_residuals
         else:
             raise ValueError('Unrecognized residual calculation method: {}'.format(resid))
 
+    def _rho_factors(self, key_rho, prox_rho):
+        """ The per-key and per-prox factors of `rho` for `ArrayState`. """
+        per = getattr(self.rho_adj, 'per', None)
+        if per not in (None, 'key', 'prox'):
+            raise ValueError('Unrecognized rho adjustment per: {}'.format(per))
+
+        key_factors = None
+        if key_rho is not None:
+            key_factors = {k: v/self.rho for k, v in key_rho.items()}
+        elif per == 'key':
+            key_factors = {}
+
+        prox_factors = None
+        if prox_rho is not None:
+            if len(prox_rho) != len(self.proxes):
+                msg = 'Got {} prox_rho values for {} proxes'
+                raise ValueError(msg.format(len(prox_rho), len(self.proxes)))
+            prox_factors = [v/self.rho for v in prox_rho]
+        elif per == 'prox':
+            prox_factors = [1.0]*len(self.proxes)
+
+        return key_factors, prox_factors
+
     def step(self, num_steps=1):
         """ Perform `num_steps` ADMM steps and log results.
         """
         with SimpleTimer() as elapsed:
             for _ in range(num_steps):
-                out = admm_step(self.proxes,
-                                self.xbar,
-                                self.us,
-                                self.rho,
-                                hook=self.hook,
-                                mapper=self._mapper,
-                                rho_adj=self.rho_adj,
-                                residuals=self._resid)
+                self._step()
+
+        runtime = elapsed.time
+        self.timed_runs += [ (num_steps, runtime) ]
+
+    def _step(self, check=True, norms=False):
+        """ One ADMM step, logged. Returns its step info. """
+        if self._state is None:
+            out = admm_step(self.proxes,
+                            self.xbar,
+                            self.us,
+                            self.rho,
+                            hook=self.hook,
+                            mapper=self._mapper,
+                            rho_adj=self.rho_adj,
+                            residuals=self._resid,
+                            instrument=self.instrument,
+                            tracer=self.tracer,
+                            alpha=self.alpha,
+                            check=check,
+                            norms=norms,
+                            outputs=self._outputs)
+
+            self.xbar, self.us, self.rho, step_info = out
+        else:
+            out = array_step(self.proxes,
+                             self._state,
+                             self.rho,
+                             hook=self.hook,
+                             mapper=self._mapper,
+                             rho_adj=self.rho_adj,
+                             instrument=self.instrument,
+                             tracer=self.tracer,
+                             alpha=self.alpha,
+                             check=check,
+                             norms=norms)
+
+            self.rho, step_info = out
+
+        if hasattr(self._pool, 'step_info'):
+            step_info.update(self._pool.step_info())
+
+        self._record(step_info)
+        return step_info
+
+    def solve(self, eps_abs=1e-6, eps_rel=1e-4, max_iters=10000,
+              check_every=10, verbose=False, print_every=1.0):
+        """ Step until the residuals are within the standard ADMM stopping
+        tolerances (see `resid.tolerances`), or for `max_iters` steps.
+        Returns whether it converged.
+
+        The residuals, and the norms for the relative tolerance, are only
+        computed every `check_every` steps (and on the last). The steps in
+        between skip that work, and record the residuals as NaN; rho is
+        only adjusted on the steps with a check.
+
+        With `verbose`, prints the residuals and tolerances at a check at
+        most every `print_every` seconds (and the last one).
+        """
+        if check_every < 1:
+            raise ValueError('check_every must be at least 1, got {}'.format(check_every))
+
+        if verbose:
+            header = '{:>6}  {:>8}  {:>8}  {:>8}  {:>8}  {:>8}  {:>8}'
+            print(header.format('Iter', 'r', 'eps_pri', 's', 'eps_dual',
+                                'rho', 'Time (s)'))
+        line = '{:6d}  {:8.2e}  {:8.2e}  {:8.2e}  {:8.2e}  {:8.2e}  {:8.2e}'
 
-                self.xbar, self.us, self.rho, step_info = out     
+        converged = False
+        steps = 0
+        printed = None
+        start = time.perf_counter()
 
-                self.infos += [step_info]
+        with SimpleTimer() as elapsed:
+            while steps < max_iters and not converged:
+                steps += 1
+                check = steps % check_every == 0 or steps == max_iters
+                step_info = self._step(check=check, norms=check)
+                if not check:
+                    continue
+
+                eps_pri, eps_dual = tolerances(step_info['norms'],
+                                               eps_abs, eps_rel)
+                r, s = step_info['r'], step_info['s']
+                converged = r <= eps_pri and s <= eps_dual
+
+                now = time.perf_counter()
+                last = converged or steps == max_iters
+                if verbose and (last or printed is None
+                                or now - printed >= print_every):
+                    printed = now
+                    print(line.format(steps, r, eps_pri, s, eps_dual,
+                                      self.rho, now - start))
+
+        self.timed_runs += [ (steps, elapsed.time) ]
+        return converged
+
+    async def astep(self, num_steps=1, limit=None):
+        """ Perform `num_steps` ADMM steps on the running event loop,
+        and log results.
+
+        Proxes that are coroutine functions (or have an `aprox` coroutine
+        method) are awaited concurrently, with at most `limit` in flight.
+        Synchronous proxes are run in the thread pool, if `threads` was
+        given, or in the loop's default executor. With any other backend
+        (process pools, a `partial.PartialBarrier`, ...), they are run
+        together through its `map`, in the loop's default executor.
+        """
+        executor = mapper = None
+        if isinstance(self._pool, ThreadPoolExecutor):
+            executor = self._pool
+        elif self._pool is not None:
+            mapper = self._mapper
+
+        with SimpleTimer() as elapsed:
+            for _ in range(num_steps):
+                if self._state is None:
+                    out = await admm_astep(self.proxes,
+                                           self.xbar,
+                                           self.us,
+                                           self.rho,
+                                           hook=self.hook,
+                                           rho_adj=self.rho_adj,
+                                           residuals=self._resid,
+                                           limit=limit,
+                                           executor=executor,
+                                           mapper=mapper,
+                                           instrument=self.instrument,
+                                           tracer=self.tracer,
+                                           alpha=self.alpha,
+                                           outputs=self._outputs)
+
+                    self.xbar, self.us, self.rho, step_info = out
+                else:
+                    out = await array_astep(self.proxes,
+                                            self._state,
+                                            self.rho,
+                                            hook=self.hook,
+                                            rho_adj=self.rho_adj,
+                                            limit=limit,
+                                            executor=executor,
+                                            mapper=mapper,
+                                            instrument=self.instrument,
+                                            tracer=self.tracer,
+                                            alpha=self.alpha)
+
+                    self.rho, step_info = out
+
+                if hasattr(self._pool, 'step_info'):
+                    step_info.update(self._pool.step_info())
+
+                self._record(step_info)
 
         runtime = elapsed.time
         self.timed_runs += [ (num_steps, runtime) ]
 
+    def _record(self, step_info):
+        if self.anderson is not None:
+            self._accelerate(step_info)
+
+        self.infos.append(step_info)
+        if self.log is not None:
+            self.log.append(step_info)
+
+        self.iters += 1
+        auto = self._autosave
+        if auto is not None and self.iters % auto.every == 0:
+            auto.submit(snapshot(self))
+
+    def _accelerate(self, step_info):
+        """ Replace the ADMM iterate with the Anderson-accelerated one.
+        The memory is cleared when rho or the key layout changes.
+        """
+        acc = self.anderson
+        resid = np.hypot(step_info['r'], step_info['s'])
+        if np.isnan(resid):
+            # a step without a residual check
+            resid = None
+
+        if self._state is None:
+            ds = [self.xbar] + self.us
+            layout = self._accel_key and self._accel_key[1]
+            if (layout is None or self._accel_key[0] != self.rho
+                    or not layout.matches(ds)):
+                layout = DictLayout(ds)
+                acc.reset()
+            self._accel_key = (self.rho, layout)
+
+            z = acc.update(layout.flatten(ds), resid)
+            self.xbar, *self.us = layout.unflatten(z)
+        else:
+            key = (self.rho, self._state.rho_version, *self._state.layouts)
+            old = self._accel_key
+            if (old is None or len(old) != len(key)
+                    or not all(a is b for a, b in zip(old[2:], key[2:]))
+                    or old[:2] != key[:2]):
+                acc.reset()
+            self._accel_key = key
+
+            z = acc.update(array_state_vector(self._state), resid)
+            set_array_state_vector(self._state, z)
+
+        step_info['anderson'] = acc.depth
+
+    @property
+    def xbar(self):
+        if self._state is not None:
+            return self._state.xbar_dict()
+        return self._xbar
+
+    @xbar.setter
+    def xbar(self, xbar):
+        if self._state is not None:
+            raise AttributeError("Can't set xbar with the 'array' engine")
+        self._xbar = xbar
+
+    @property
+    def us(self):
+        if self._state is not None:
+            return self._state.u_dicts()
+        return self._us
+
+    @us.setter
+    def us(self, us):
+        if self._state is not None:
+            raise AttributeError("Can't set us with the 'array' engine")
+        self._us = us
+
+    @property
+    def key_rho(self):
+        """ The current rho of each key, as a dict, with the 'array' engine.
+        (With per-prox rho as well, the rho of a local copy is its key's
+        rho times its prox's factor.)
+        """
+        if self._state is None:
+            raise AttributeError("key_rho needs the 'array' engine")
+        state = self._state
+        factor = state.key_factor
+        if factor is None:
+            factor = np.ones(len(state.xbar))
+        return state.index.to_dict(self.rho*factor)
+
+    @property
+    def prox_rho(self):
+        """ The current rho of each prox, as a list, with the 'array' engine.
+        """
+        if self._state is None:
+            raise AttributeError("prox_rho needs the 'array' engine")
+        factor = self._state.prox_factor
+        if factor is None:
+            return [self.rho]*len(self.proxes)
+        return (self.rho*factor).tolist()
+
     @property
     def total_time(self):
         time = 0.0
@@ -78,21 +441,266 @@ class ADMM:
 
         return time
 
-    def report(self, figsize=(12,6), hook=False, verbose=False):
-        report_solve(self.infos, figsize=figsize, verbose=verbose, hook=hook)
+    def report(self, figsize=(12,6), hook=False, verbose=False,
+               envelope='auto', max_points=2000):
+        report_solve(self.infos, figsize=figsize, verbose=verbose, hook=hook,
+                     envelope=envelope, max_points=max_points)
 
     def iter_breakdown(self, iter_nums=None):
         plot_iter_breakdown(self.infos, iter_nums=iter_nums)
 
-    def set_threads(self, threads):
-        if threads is None or threads == 0:
+    def set_threads(self, threads, backend='thread'):
+        self._close_pool()
+        self._threads = threads
+        self._backend = backend
+
+        if not isinstance(backend, str):
+            self._pool = backend
+            self._mapper = backend.map
+        elif threads is None or threads == 0:
             self._mapper = map
+        elif backend == 'thread':
+            self._pool = ThreadPoolExecutor(threads)
+            self._mapper = self._pool.map
+        elif backend in ('process', 'shared'):
+            self._pool = ProcessPool(self.proxes, threads, shared=backend == 'shared')
+            self._mapper = self._pool.map
+        else:
+            raise ValueError('Unrecognized backend: {}'.format(backend))
+
+    def update_proxes(self, updates):
+        """ Swap in new proxes for some of the current ones, keeping xbar,
+        the duals and rho as a warm start for the changed problem (like a
+        new `form_sharing_prox` for new supplies `B`, or a few changed
+        agents).
+
+        `updates` maps the index of each prox to replace to its new prox.
+        In that order, each new prox is called once, to find its keys, on
+        the input a new prox would get: xbar on the keys of all the other
+        proxes (less its own duals). Its duals on the keys it keeps are
+        kept, and its new keys start at zero (see `admm.reassign_dual`
+        for the keys it drops). Keys new to the problem start xbar at the
+        output of the new prox, and keys that no prox has anymore are
+        dropped.
+
+        So a prox whose keys follow its input, like the sharing prox,
+        should be updated (possibly with itself) after any agents that
+        add or drop keys.
+
+        With the 'process' or 'shared' backend, each new prox is sent to
+        the worker owning the one it replaces; the other proxes keep
+        running, with their state, in their workers.
+        """
+        updates = dict(updates)
+        for i in updates:
+            if not 0 <= i < len(self.proxes):
+                raise ValueError('No prox {} to update'.format(i))
+
+        state = self._state
+        old = {}
+        for i, prox in updates.items():
+            if state is None:
+                xbar, us = self.xbar, self.us
+                keysets = [u.keys() for u in us]
+                rho = self.rho
+            else:
+                xbar, us = state.xbar_dict(), state.u_dicts()
+                keysets = [() if lay is None else lay.keys
+                           for lay in state.layouts]
+                rhos = state.prox_rhos(self.rho)
+                rho = self.rho if rhos is None else rhos[i]
+
+            live = set()
+            for j, keys in enumerate(keysets):
+                if j != i:
+                    live.update(keys)
+
+            u = us[i]
+            xin = {k: v - u[k] if k in u else v for k, v in xbar.items()
+                   if k in live}
+            x = prox(xin, rho)
+            old.setdefault(i, self.proxes[i])
+            self.proxes[i] = prox
+
+            if state is None:
+                if i < len(self._outputs):
+                    self._outputs[i] = None
+                reassign_dual(us, i, x.keys())
+                for k, v in x.items():
+                    if k not in xbar:
+                        xbar[k] = v
+            else:
+                known = len(state.index)
+                state.reassign(i, x)
+                index = state.index
+                for k in index.keys[known:]:
+                    state.xbar[index.cols([k])] = np.ravel(x[k])
+
+        if state is None:
+            live = set().union(*(u.keys() for u in self.us))
+            self.xbar = defaultdict(float, ((k, v) for k, v in self.xbar.items()
+                                            if k in live))
+        else:
+            state.compact()
+
+        for i, prox in old.items():
+            self._proxes_changed('replace_prox', i, prox, self.proxes[i])
+
+    def add_prox(self, prox):
+        """ Add a prox to the problem mid-solve, and return its index.
+
+        Like `update_proxes`, the new prox is called once, on all of xbar,
+        to find its keys. Its duals start at zero (so the duals of each key
+        still sum to zero), keys new to the problem start xbar at its
+        output, and it starts with the global rho.
+
+        As with `update_proxes`, a prox whose keys follow its input, like
+        the sharing prox, only takes up the new prox's keys once updated
+        (possibly with itself) after it is added.
+        """
+        state = self._state
+        x = prox(dict(self.xbar), self.rho)
+        self.proxes += [prox]
+
+        if state is None:
+            if self._outputs:
+                self._outputs += [None]
+            self.us += [defaultdict(float, ((k, 0.0) for k in x))]
+            for k, v in x.items():
+                if k not in self.xbar:
+                    self.xbar[k] = v
         else:
-            ex = ThreadPoolExecutor(threads)
-            self._mapper = ex.map
+            state.add_prox()
+            state.relayout(len(self.proxes) - 1, x)
+            lay = state.layouts[-1]
+            new = state.incidence.count[lay.cols] == 1
+            state.xbar[lay.cols[new]] = lay.values(x)[new]
+
+        self._proxes_changed('add_prox', prox)
+        return len(self.proxes) - 1
+
+    def remove_prox(self, i):
+        """ Remove prox `i` from the problem mid-solve (later proxes move
+        down one).
+
+        Its output from the last step is taken out of xbar, which becomes
+        the average of the other proxes' outputs on each of its keys, and
+        the keys no other prox has are dropped. Its duals are spread evenly
+        over the other proxes on each of its keys (see
+        `admm.reassign_dual`), so the duals of each key still sum to zero.
+        The rest of the state is kept as a warm start. With the 'array'
+        engine, only the proxes sharing its keys are touched, and the
+        averaging structure is patched rather than rebuilt (see
+        `engine.Incidence`).
+
+        (A prox that hasn't been stepped since it was added or updated, or
+        since a restore, has no last output, and leaves xbar as is.)
+
+        A prox whose keys follow its input, like the sharing prox, keeps
+        the removed prox's keys until it is updated with `update_proxes`.
+        """
+        if not 0 <= i < len(self.proxes):
+            raise ValueError('No prox {} to remove'.format(i))
+
+        if self._state is None:
+            x = self._outputs.pop(i) if i < len(self._outputs) else None
+            others = reassign_dual(self.us, i, ())
+            del self.us[i]
+            xbar = self.xbar
+            for k, n in others.items():
+                if n == 0:
+                    xbar.pop(k, None)
+                elif x is not None and k in x:
+                    xbar[k] = ((n + 1)*xbar[k] - x[k])/n
+        else:
+            self._state.remove_prox(i)
+        prox = self.proxes.pop(i)
+
+        self._proxes_changed('remove_prox', i, prox)
+
+    def _proxes_changed(self, hook, *args):
+        """ Reset the Anderson memory, and tell the backend about a changed
+        prox by calling its `hook` method, if it has one:
+        `replace_prox(i, old, new)`, `add_prox(prox)` or
+        `remove_prox(i, prox)`. (A process pool changes only the worker
+        owning the prox.)
+        """
+        if self.anderson is not None:
+            self.anderson.reset()
+            self._accel_key = None
+
+        if hasattr(self._pool, hook):
+            getattr(self._pool, hook)(*args)
+
+    def checkpoint(self, path):
+        """ Save the solver state (xbar, the duals, rho, the rho adjustment
+        state and the iteration count) to `path`, in the binary format of
+        `checkpoint.py`. See `restore`.
+        """
+        write_checkpoint(path, snapshot(self))
+
+    @classmethod
+    def restore(cls, path, proxes, **kwargs):
+        """ A new ADMM over `proxes`, resuming from the checkpoint at `path`.
+
+        `kwargs` are passed to the constructor; `engine` and `rho` default
+        to the checkpoint's. The state of the rho adjustment rule is
+        restored if `rho_adj` is of the same type as the checkpointed one.
+        """
+        snap = read_checkpoint(path)
+        kwargs.setdefault('engine', snap['header']['engine'])
+        rho = kwargs.pop('rho', snap['header']['rho'])
+
+        admm = cls(proxes, rho, **kwargs)
+        apply_snapshot(admm, snap)
+        return admm
+
+    def auto_checkpoint(self, path, every=100):
+        """ Checkpoint to `path` every `every` steps, in a background thread
+        (the state is copied in the step loop, and written out in the
+        background). `every=None` stops checkpointing.
+        """
+        if self._autosave is not None:
+            self._autosave.close()
+            self._autosave = None
+
+        if every is not None:
+            self._autosave = AutoCheckpoint(path, every)
+
+    def close(self):
+        """ Shut down any thread or process pool running the proxes,
+        flush the info log, and finish any background checkpoint.
+        """
+        if self.log is not None:
+            self.log.flush()
+
+        if self._autosave is not None:
+            self._autosave.close()
+            self._autosave = None
+
+        self._close_pool()
+
+    def _close_pool(self):
+        if self._pool is None:
+            return
+
+        if isinstance(self._pool, ThreadPoolExecutor):
+            self._pool.shutdown()
+        else:
+            self._pool.close()
+
+        self._pool = None
+        self._mapper = map
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def saveinfo(self, filename, extra=None):
-        """ Save the descriptive stats of the ADMM iteration.
+        """ Save the descriptive stats of the ADMM iteration, as json.
+        (See `log` for streaming them to a binary log instead.)
 
         Parameters
         ----------
@@ -103,7 +711,7 @@ class ADMM:
         data = dict(extra=extra)
 
         data['solve_time'] = sum(run[1] for run in self.timed_runs)
-        data['infos'] = self.infos
+        data['infos'] = list(self.infos)
 
         with open(filename, "w") as file:
             json.dump(data, file)
@@ -136,8 +744,21 @@ class ADMM:
 
 
 def load(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
+    """ Load the info saved by `ADMM.saveinfo` (a json file), or
+    streamed to an `InfoLog` (a directory, which is memory-mapped).
+    Only the infos are loaded; to resume a solve, see `ADMM.checkpoint`
+    and `ADMM.restore`.
+    """
+    if is_infolog(filename):
+        infos, extra = load_infolog(filename)
+        # logs written with instrument='off' have no step times
+        solve_time = np.nan
+        if ('times', 'total_step') in infos.kinds:
+            solve_time = float(np.nansum(infos.get('times', 'total_step')))
+        data = dict(extra=extra, infos=infos, solve_time=solve_time)
+    else:
+        with open(filename, 'r') as file:
+            data = json.load(file)
 
     admm = ADMM([], 1.0)
     admm.infos = data['infos']
@@ -0,0 +1,331 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+import os
+import pickle
+
+from .transport import SharedBlock, nbytes, pack_args, unpack_args
+
+"""
+Process-pool execution backend.
+
+Each worker process owns a fixed subset of the proxes for the whole solve,
+so any caching or warm-starting a prox does (factorizations, solver state)
+stays in memory in its worker between steps. Each step, the parent sends a
+worker only the inputs for the proxes it owns, and gets back their outputs.
+
+Where available, workers are started by forking, so they inherit the proxes
+directly, and closures like those from `form_sharing_prox` work unchanged.
+Otherwise the proxes are pickled (with `cloudpickle`, if it is installed).
+
+With `shared=True`, array values are passed through shared memory
+instead of being pickled (see `transport.py`). Proxes get copies of their
+array inputs, which they may keep between steps, unless they set
+`prox.shared_views = True` to read them in place.
+
+Note that the proxes in the parent process are not run, so their state is
+not updated, with the exception of `prox.info`, which is copied back from
+the workers after each call.
+
+`replace_prox` swaps a prox on the worker owning it (pickling the new prox
+over), leaving the other workers, and the other proxes on that worker, as
+they were; `add_prox` adds one to the worker with the fewest, and
+`remove_prox` drops one from its worker. A prox that can't be pickled is
+instead given a worker of its own, forked from the parent.
+"""
+
+def _dumps(obj):
+    try:
+        import cloudpickle
+    except ImportError:
+        return pickle.dumps(obj)
+    return cloudpickle.dumps(obj)
+
+
+def _as_tuple(res):
+    return res if isinstance(res, tuple) else (res,)
+
+def _from_tuple(res, like):
+    return res if isinstance(like, tuple) else res[0]
+
+
+def _worker(conn, payload):
+    proxes = pickle.loads(payload) if isinstance(payload, bytes) else payload
+    blocks = {}
+
+    def attach(name):
+        if name not in blocks:
+            blocks[name] = SharedBlock(name=name)
+        return blocks[name]
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+
+        if msg[0] != 'map':
+            try:
+                if msg[0] == 'replace':
+                    _, j, data = msg
+                    proxes[j] = pickle.loads(data)
+                elif msg[0] == 'add':
+                    proxes += [pickle.loads(msg[1])]
+                elif msg[0] == 'remove':
+                    del proxes[msg[1]]
+                else:
+                    raise ValueError('Unrecognized message: {!r}'.format(msg[0]))
+            except Exception as e:
+                conn.send(('error', e, 0))
+            else:
+                conn.send(('ok', None, 0))
+            continue
+
+        _, fn, tasks, names = msg
+
+        if names is not None:
+            for name in list(blocks):
+                if name not in names:
+                    blocks.pop(name).close()
+            inb, outb = attach(names[0]), attach(names[1])
+            outb.reset()
+
+        out = []
+        needed = 0
+        try:
+            for j, args in tasks:
+                prox = proxes[j]
+                if names is not None:
+                    args = unpack_args(inb, args,
+                                       not getattr(prox, 'shared_views', False))
+
+                result = fn(prox, *args)
+
+                if names is not None:
+                    res = _as_tuple(result)
+                    size = nbytes(res)
+                    needed += size
+                    if outb.offset + size <= outb.size:
+                        result = _from_tuple(pack_args(outb, res), result)
+
+                out += [(result, getattr(prox, 'info', None))]
+        except Exception as e:
+            conn.send(('error', e, 0))
+        else:
+            conn.send(('ok', out, needed))
+
+    for block in blocks.values():
+        block.close()
+    conn.close()
+
+
+class ProcessPool:
+    """ Runs proxes in worker processes that each own a fixed subset of them.
+
+    Use `pool.map` as the ADMM `mapper`: it recognizes the proxes
+    it was built with, and dispatches each call to the owning worker.
+    Results come back in order, like `map`.
+
+    With `shared=True`, array values go through shared memory blocks
+    (and are copied out of them on the other side).
+    """
+    def __init__(self, proxes, processes=None, shared=False):
+        if processes is None:
+            processes = os.cpu_count()
+
+        proxes = list(proxes)
+        processes = max(1, min(processes, len(proxes)))
+
+        if 'fork' in mp.get_all_start_methods():
+            self._ctx = mp.get_context('fork')
+        else:
+            self._ctx = mp.get_context()
+
+        if shared:
+            # workers must share our resource tracker, or theirs will
+            # unlink the shared blocks when they exit
+            resource_tracker.ensure_running()
+
+        # contiguous blocks of proxes for each worker
+        bounds = [len(proxes)*w//processes for w in range(processes+1)]
+
+        self._owner = {}
+        self._members = []
+        self._conns = []
+        self._procs = []
+        self._blocks = [] if shared else None
+
+        for w in range(processes):
+            self._spawn(proxes[bounds[w]:bounds[w+1]])
+
+    def _spawn(self, subset):
+        """ Start a worker owning the proxes in `subset`. """
+        w = len(self._conns)
+        for j, prox in enumerate(subset):
+            self._owner[id(prox)] = (w, j)
+        self._members += [[id(prox) for prox in subset]]
+
+        ctx = self._ctx
+        if ctx.get_start_method() == 'fork':
+            payload = subset
+        else:
+            payload = _dumps(subset)
+
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_worker, args=(child, payload), daemon=True)
+        proc.start()
+        child.close()
+
+        self._conns += [parent]
+        self._procs += [proc]
+
+        if self._blocks is not None:
+            self._blocks += [[SharedBlock(), SharedBlock()]]
+
+    def _control(self, w, msg):
+        """ Send worker `w` a control message, and wait for it to be done. """
+        self._conns[w].send(msg)
+        status, result, _ = self._conns[w].recv()
+        if status == 'error':
+            raise result
+
+    def _payload(self, prox):
+        """ `prox` pickled, to send to a running worker, or `None` if it
+        can't be, but can go to a new, forked, worker instead.
+        """
+        try:
+            return _dumps(prox)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            if self._ctx.get_start_method() != 'fork':
+                raise
+            return None
+
+    def replace_prox(self, i, old, new):
+        """ Run `new` in place of `old` (prox `i` of the ADMM), on the
+        worker owning `old`. The other proxes keep running as they were.
+        """
+        try:
+            w, j = self._owner[id(old)]
+        except KeyError:
+            raise ValueError('Prox {!r} is not owned by this pool'.format(old))
+
+        payload = self._payload(new)
+        if payload is None:
+            self.remove_prox(i, old)
+            self._spawn([new])
+            return
+
+        self._control(w, ('replace', j, payload))
+        del self._owner[id(old)]
+        self._owner[id(new)] = (w, j)
+        self._members[w][j] = id(new)
+
+    def add_prox(self, prox):
+        """ Run `prox` too, on the worker owning the fewest proxes. """
+        payload = self._payload(prox)
+        if payload is None:
+            self._spawn([prox])
+            return
+
+        w = min(range(len(self._members)), key=lambda w: len(self._members[w]))
+        self._control(w, ('add', payload))
+        self._owner[id(prox)] = (w, len(self._members[w]))
+        self._members[w] += [id(prox)]
+
+    def remove_prox(self, i, prox):
+        """ Stop running `prox` (prox `i` of the ADMM), on the worker
+        owning it. The other proxes keep running as they were.
+        """
+        try:
+            w, j = self._owner.pop(id(prox))
+        except KeyError:
+            raise ValueError('Prox {!r} is not owned by this pool'.format(prox))
+        self._control(w, ('remove', j))
+        del self._members[w][j]
+        for k, p in enumerate(self._members[w][j:], j):
+            self._owner[p] = (w, k)
+
+    @property
+    def processes(self):
+        return len(self._procs)
+
+    def map(self, fn, funcs, *iterables):
+        """ Compute `fn(func, *args)` in the worker owning each func.
+        """
+        funcs = list(funcs)
+        tasks = [[] for _ in self._conns]
+        slots = [[] for _ in self._conns]
+
+        for i, (func, *args) in enumerate(zip(funcs, *iterables)):
+            try:
+                w, j = self._owner[id(func)]
+            except KeyError:
+                raise ValueError('Prox {!r} is not owned by this pool'.format(func))
+            tasks[w] += [(j, args)]
+            slots[w] += [i]
+
+        for w, (conn, task) in enumerate(zip(self._conns, tasks)):
+            if not task:
+                continue
+            if self._blocks is None:
+                conn.send(('map', fn, task, None))
+            else:
+                inb, outb = self._blocks[w]
+                size = nbytes(a for _, args in task for a in args)
+                if size > inb.size:
+                    inb.close()
+                    inb = self._blocks[w][0] = SharedBlock(size)
+                inb.reset()
+                task = [(j, pack_args(inb, args)) for j, args in task]
+                conn.send(('map', fn, task, (inb.name, outb.name)))
+
+        out = [None]*len(funcs)
+        error = None
+        for w, (conn, task, slot) in enumerate(zip(self._conns, tasks, slots)):
+            if not task:
+                continue
+            status, result, needed = conn.recv()
+            if status == 'error':
+                error = result
+                continue
+            for i, (res, info) in zip(slot, result):
+                if self._blocks is not None:
+                    outb = self._blocks[w][1]
+                    # copies: the block is overwritten by the next call,
+                    # and replaced below if the outputs outgrew it
+                    res = _from_tuple(unpack_args(outb, _as_tuple(res), True), res)
+                out[i] = res
+                if info is not None:
+                    funcs[i].info = info
+
+            if self._blocks is not None and needed > self._blocks[w][1].size:
+                # outputs didn't fit; grow the block for the next call
+                self._blocks[w][1].close()
+                self._blocks[w][1] = SharedBlock(needed)
+
+        if error is not None:
+            raise error
+
+        return out
+
+    def close(self):
+        """ Shut down the worker processes.
+        """
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+
+        for proc in self._procs:
+            proc.join()
+
+        for block in self._blocks or []:
+            for b in block:
+                b.close()
+
+        self._conns = []
+        self._procs = []
+        self._owner = {}
+        self._members = []
+        if self._blocks is not None:
+            self._blocks = []
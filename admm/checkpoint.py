@@ -0,0 +1,292 @@
+from collections import defaultdict
+import json
+import os
+import pickle
+import struct
+import threading
+import types
+
+import numpy as np
+
+from .engine import ArrayState, ProxLayout
+
+"""
+Binary checkpoints of the ADMM solver state.
+
+A checkpoint holds xbar, the dual of every prox, rho, the state of the rho
+adjustment rule, any per-key and per-prox rho factors (see `engine.py`) and
+the iteration count, so a long solve can be resumed where it stopped (with
+`ADMM.restore`), with either engine.
+
+The file is laid out as:
+
+- the magic bytes `MAGIC`, and the length of the header (a little-endian
+  uint64)
+- the header: JSON with the scalars (rho, iteration count, ...) and the
+  offset, dtype and shape of each of the blocks below
+- the key table, pickled: each key is written once, and referred to by its
+  index everywhere else
+- the array blocks: xbar as one float vector over the key table (with
+  the shape of each key), and the duals as one float vector over the local
+  copies, with the key index of each copy and the range of each prox
+
+Files are written to a temporary name and renamed into place, so a crash
+mid-write leaves the previous checkpoint intact.
+
+The Anderson acceleration memory (see `accel.py`) isn't saved; a restored
+solve starts it afresh.
+"""
+
+MAGIC = b'ADMMCKPT'
+VERSION = 1
+
+
+def snapshot(admm):
+    """ The state of `admm`, as a dict of the header values, the key table
+    and the array blocks (copies, so `admm` can keep stepping).
+    """
+    state = admm._state
+    blocks = {}
+
+    if state is None:
+        xbar, us = admm.xbar, admm.us
+        keys = list(xbar)
+        pos = {k: i for i, k in enumerate(keys)}
+        for u in us:
+            for k in u:
+                if k not in pos:
+                    pos[k] = len(keys)
+                    keys += [k]
+
+        shapes = [np.shape(xbar[k]) if k in xbar else np.shape(u_value(us, k))
+                  for k in keys]
+        blocks['xbar'] = flatten((xbar.get(k, np.zeros(s))
+                                  for k, s in zip(keys, shapes)))
+
+        idx = [pos[k] for u in us for k in u]
+        blocks['u'] = flatten(v for u in us for v in u.values())
+        lens = [len(u) for u in us]
+    else:
+        index = state.index
+        keys = list(index.keys)
+        shapes = list(index.shapes)
+        blocks['xbar'] = state.xbar.copy()
+
+        layouts = [lay for lay in state.layouts if lay is not None]
+        idx = [index.pos[k] for lay in layouts for k in lay.keys]
+        blocks['u'] = flatten(lay.u for lay in layouts)
+        lens = [0 if lay is None else len(lay.keys) for lay in state.layouts]
+
+        if state.key_factor is not None:
+            blocks['key_factor'] = state.key_factor.copy()
+        if state.prox_factor is not None:
+            blocks['prox_factor'] = state.prox_factor.copy()
+
+    blocks['u_keys'] = np.array(idx, dtype=np.int64)
+    blocks['u_ptr'] = np.concatenate([[0], np.cumsum(lens)]).astype(np.int64)
+    blocks['ndim'] = np.array([len(s) for s in shapes], dtype=np.int64)
+    blocks['dims'] = np.array([d for s in shapes for d in s], dtype=np.int64)
+
+    rho_adj = admm.rho_adj
+    rule = None
+    if not isinstance(rho_adj, types.FunctionType) and hasattr(rho_adj, '__dict__'):
+        rule = dict(vars(rho_adj))
+
+    header = dict(version=VERSION, engine=admm.engine, rho=float(admm.rho),
+                  iters=admm.iters, num_proxes=len(admm.proxes),
+                  rho_adj=type(rho_adj).__name__)
+    if state is not None:
+        header['rho_version'] = state.rho_version
+
+    return dict(header=header, keys=keys, rho_adj=rule, blocks=blocks)
+
+def u_value(us, k):
+    for u in us:
+        if k in u:
+            return u[k]
+
+def flatten(vals):
+    vals = [np.ravel(v) for v in vals]
+    if not vals:
+        return np.zeros(0)
+    return np.concatenate(vals).astype(float)
+
+
+def write_checkpoint(path, snap):
+    """ Write a `snapshot` to `path`, atomically. """
+    keys = pickle.dumps(snap['keys'], protocol=pickle.HIGHEST_PROTOCOL)
+    rule = pickle.dumps(snap['rho_adj'], protocol=pickle.HIGHEST_PROTOCOL)
+
+    header = dict(snap['header'])
+    header['keys'] = [0, len(keys)]
+    header['rho_adj_state'] = [len(keys), len(rule)]
+
+    layout = {}
+    offset = len(keys) + len(rule)
+    for name, a in snap['blocks'].items():
+        a = np.ascontiguousarray(a)
+        layout[name] = [offset, a.dtype.str, list(a.shape)]
+        offset += a.nbytes
+    header['blocks'] = layout
+
+    head = json.dumps(header).encode()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(head)) + head)
+        f.write(keys)
+        f.write(rule)
+        for a in snap['blocks'].values():
+            f.write(np.ascontiguousarray(a).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def read_checkpoint(path):
+    """ Read a checkpoint back into a `snapshot`. """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not an ADMM checkpoint: {}'.format(path))
+    n, = struct.unpack('<Q', data[len(MAGIC):len(MAGIC)+8])
+    start = len(MAGIC) + 8
+    header = json.loads(data[start:start+n].decode())
+    if header['version'] != VERSION:
+        raise ValueError('Unrecognized checkpoint version: {}'.format(header['version']))
+    body = memoryview(data)[start+n:]
+
+    def part(span):
+        return pickle.loads(body[span[0]:span[0]+span[1]])
+
+    blocks = {}
+    for name, (offset, dtype, shape) in header.pop('blocks').items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        blocks[name] = np.frombuffer(body, dtype, count, offset).reshape(shape).copy()
+
+    keys = part(header.pop('keys'))
+    rule = part(header.pop('rho_adj_state'))
+
+    return dict(header=header, keys=keys, rho_adj=rule, blocks=blocks)
+
+
+def apply_snapshot(admm, snap):
+    """ Load a `snapshot` into `admm`, which has the same number of proxes
+    (with either engine).
+    """
+    header, keys, blocks = snap['header'], snap['keys'], snap['blocks']
+    if header['num_proxes'] != len(admm.proxes):
+        msg = 'Checkpoint has {} proxes, but got {}'
+        raise ValueError(msg.format(header['num_proxes'], len(admm.proxes)))
+
+    ndim, dims = blocks['ndim'], blocks['dims']
+    ends = np.cumsum(ndim)
+    shapes = [tuple(int(d) for d in dims[e-n:e]) for n, e in zip(ndim, ends)]
+    sizes = [int(np.prod(s)) for s in shapes]
+    starts = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+
+    xbar = blocks['xbar']
+    u, u_keys, u_ptr = blocks['u'], blocks['u_keys'], blocks['u_ptr']
+    u_starts = np.concatenate([[0], np.cumsum([sizes[j] for j in u_keys])]).astype(int)
+
+    def value(vec, start, shape):
+        if shape == ():
+            return float(vec[start])
+        return vec[start:start+int(np.prod(shape))].reshape(shape).copy()
+
+    if admm._state is None:
+        if 'key_factor' in blocks or 'prox_factor' in blocks:
+            raise ValueError("Per-key and per-prox rho need the 'array' engine")
+
+        admm.xbar = defaultdict(float, ((k, value(xbar, s, shape))
+                                        for k, s, shape in zip(keys, starts, shapes)))
+        us = []
+        for lo, hi in zip(u_ptr[:-1], u_ptr[1:]):
+            us += [defaultdict(float, ((keys[j], value(u, s, shapes[j]))
+                                       for j, s in zip(u_keys[lo:hi], u_starts[lo:hi])))]
+        admm.us = us
+    else:
+        old = admm._state
+        state = ArrayState(len(admm.proxes), old.key_factors,
+                           blocks.get('prox_factor', old.prox_factor))
+        for k, shape in zip(keys, shapes):
+            state.index.intern(k, np.zeros(shape) if shape else 0.0)
+        state.xbar = xbar
+        if 'key_factor' in blocks:
+            state.key_factor = blocks['key_factor']
+        elif state.key_factors is not None:
+            state.key_factor = np.ones(len(xbar))
+
+        for i, (lo, hi) in enumerate(zip(u_ptr[:-1], u_ptr[1:])):
+            if lo == hi:
+                continue
+            lay_keys = tuple(keys[j] for j in u_keys[lo:hi])
+            scalar = all(shapes[j] == () for j in u_keys[lo:hi])
+            cols = state.index.cols(lay_keys)
+            state.layouts[i] = ProxLayout(lay_keys, cols,
+                                          u[u_starts[lo]:u_starts[hi]].copy(),
+                                          scalar)
+        state.rho_version = header.get('rho_version', 0)
+        admm._state = state
+
+    admm.rho = header['rho']
+    admm.iters = header['iters']
+
+    rule = snap['rho_adj']
+    if rule is not None and type(admm.rho_adj).__name__ == header['rho_adj']:
+        vars(admm.rho_adj).update(rule)
+
+
+class AutoCheckpoint:
+    """ Writes checkpoints in a background thread.
+
+    `submit` hands over a `snapshot`, taken in the stepping thread; a
+    writer thread encodes it and writes it out. If a write is still in
+    progress, only the newest waiting snapshot is kept. An error in the
+    writer is raised by the next `submit` or by `close`.
+    """
+    def __init__(self, path, every):
+        self.path = path
+        self.every = every
+        self.written = 0
+
+        self._pending = None
+        self._error = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, snap):
+        self._raise()
+        with self._cond:
+            self._pending = snap
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                snap, self._pending = self._pending, None
+                if snap is None:
+                    return
+            try:
+                write_checkpoint(self.path, snap)
+                self.written += 1
+            except Exception as e:
+                self._error = e
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """ Write any pending snapshot, and stop the writer thread. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._raise()
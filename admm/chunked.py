@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import math
+
+from .functional import do, do_chunk
+
+"""
+Chunked dispatch of many small proxes.
+
+When each prox runs in microseconds, submitting one task per prox to a
+thread pool spends more time on futures, locking and per-call timers than
+on the proxes. A `ChunkedMapper` groups the proxes into chunks, runs each
+chunk as a single task, and times the calls in a chunk back to back, with
+one clock reading between calls (see `functional.do_chunk`).
+
+The chunk size is either fixed, or tuned each step so that a chunk takes
+about `target` seconds, from the per-prox times measured on the last step.
+"""
+
+class ChunkedMapper:
+    """ ADMM backend running proxes in chunks on a thread pool.
+
+    Parameters
+    ----------
+    threads : int
+        Number of threads.
+    chunksize : int
+        Proxes per task. `None` tunes it from measured prox times.
+    target : float
+        Seconds each chunk should take, when tuning the chunk size.
+    """
+    def __init__(self, threads, chunksize=None, target=1e-3):
+        self.threads = threads
+        self.fixed = chunksize
+        self.target = target
+
+        self._pool = ThreadPoolExecutor(threads)
+        self._per_prox = None
+        self.chunksize = chunksize or 1
+
+    def tune(self, n):
+        """ Chunk size for `n` proxes: about `target` seconds per chunk,
+        but at least one chunk per thread.
+        """
+        if self.fixed is not None:
+            return self.fixed
+
+        most = max(1, math.ceil(n/self.threads))
+        if self._per_prox is None:
+            # no measurements yet; start with one chunk per thread
+            return most
+
+        if self._per_prox <= 0:
+            return most
+
+        size = int(self.target/self._per_prox)
+        return min(max(size, 1), most)
+
+    def map(self, fn, funcs, *iterables):
+        """ Compute `fn(func, *args)` for each func, a chunk per task.
+        Calls to `functional.do` are timed back to back within a chunk.
+        """
+        calls = list(zip(funcs, *iterables))
+        n = len(calls)
+        self.chunksize = self.tune(n)
+
+        it = iter(calls)
+        futs = []
+        while True:
+            chunk = list(islice(it, self.chunksize))
+            if not chunk:
+                break
+            futs += [self._pool.submit(_run_chunk, fn, chunk)]
+
+        out = []
+        for fut in futs:
+            out += fut.result()
+
+        if fn is do and n:
+            self._per_prox = sum(o[1] for o in out)/n
+
+        return out
+
+    def step_info(self):
+        return {'chunksize': self.chunksize}
+
+    def close(self):
+        self._pool.shutdown()
+
+
+def _run_chunk(fn, chunk):
+    if fn is do:
+        return do_chunk(*zip(*chunk))
+    return [fn(*call) for call in chunk]
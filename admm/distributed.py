@@ -0,0 +1,231 @@
+import pickle
+import socket
+import struct
+import threading
+
+"""
+Multi-node ADMM over TCP.
+
+Worker nodes host subsets of the proxes with a `ProxServer`. The coordinator
+connects to them with a `Cluster`, which gives a `RemoteProx` stand-in for
+every remote prox, and a `map` to use as the ADMM mapper:
+
+    cluster = Cluster([('node1', 5000), ('node2', 5000)])
+    admm = ADMM(cluster.proxes + [fusion_prox], rho, backend=cluster)
+
+The coordinator then acts as the fusion center: the iteration (averaging,
+dual updates, residuals, rho adjustment) is the usual `admm_step`, and each
+step a node is sent only the `xbar - u` slices for the proxes it hosts, and
+sends back only their outputs. Proxes that are not `RemoteProx`es (like the
+fusion prox above) are run on the coordinator.
+
+Each node's connection is held by one `map` at a time, so a cluster can be
+used from several threads (as by `ADMM.astep`, or by calling `RemoteProx`es
+concurrently).
+
+Messages are length-prefixed pickles, so only use this on a trusted network.
+"""
+
+_HEADER = struct.Struct('!Q')
+
+
+def send_msg(sock, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+def recv_msg(sock):
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    size, = _HEADER.unpack(header)
+    return pickle.loads(_recv_exact(sock, size))
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:])
+        if n == 0:
+            return None
+        got += n
+    return bytes(buf)
+
+
+class ProxServer:
+    """ Hosts `proxes` for a remote coordinator.
+
+    `serve()` handles one coordinator connection at a time, until a
+    coordinator asks it to shut down. Use `start()` to serve from a
+    background thread (for example, to test with all nodes on localhost).
+    """
+    def __init__(self, proxes, host='127.0.0.1', port=0):
+        self.proxes = list(proxes)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._sock.getsockname()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve(self):
+        try:
+            while True:
+                conn, _ = self._sock.accept()
+                with conn:
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    if self._handle(conn) == 'shutdown':
+                        break
+        finally:
+            self._sock.close()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _handle(self, conn):
+        while True:
+            msg = recv_msg(conn)
+            if msg is None or msg[0] == 'close':
+                return 'close'
+            if msg[0] == 'shutdown':
+                return 'shutdown'
+
+            if msg[0] == 'count':
+                send_msg(conn, len(self.proxes))
+            elif msg[0] == 'map':
+                _, fn, tasks = msg
+                out = []
+                try:
+                    for j, args in tasks:
+                        prox = self.proxes[j]
+                        result = fn(prox, *args)
+                        out += [(result, getattr(prox, 'info', None))]
+                except Exception as e:
+                    send_msg(conn, ('error', e))
+                else:
+                    send_msg(conn, ('ok', out))
+            else:
+                raise ValueError('Unrecognized message: {!r}'.format(msg[0]))
+
+
+class RemoteProx:
+    """ Stand-in on the coordinator for prox `j` hosted on node `w`.
+
+    `info`, once set, holds the remote `prox.info` from the most recent
+    call. Calling it directly runs the remote prox.
+    """
+    def __init__(self, cluster, w, j):
+        self.cluster = cluster
+        self.node = w
+        self.index = j
+
+    def __call__(self, *args):
+        return self.cluster.map(_call, [self], *[[a] for a in args])[0]
+
+    def __repr__(self):
+        return 'RemoteProx(node={}, index={})'.format(self.node, self.index)
+
+def _call(func, *args):
+    return func(*args)
+
+
+class Cluster:
+    """ Coordinator-side connections to a list of `ProxServer` addresses.
+
+    `proxes` has a `RemoteProx` for each remote prox, node by node.
+    Use `map` as the ADMM mapper (or pass the cluster as the ADMM `backend`).
+    """
+    def __init__(self, addresses):
+        self._socks = []
+        self._locks = []
+        self.proxes = []
+
+        for w, address in enumerate(addresses):
+            sock = socket.create_connection(tuple(address))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socks += [sock]
+            self._locks += [threading.Lock()]
+
+            send_msg(sock, ('count',))
+            count = recv_msg(sock)
+            self.proxes += [RemoteProx(self, w, j) for j in range(count)]
+
+    def map(self, fn, funcs, *iterables):
+        """ Compute `fn(func, *args)` for each func, on its node for
+        `RemoteProx`es and locally otherwise. Nodes work in parallel.
+        """
+        funcs = list(funcs)
+        tasks = [[] for _ in self._socks]
+        slots = [[] for _ in self._socks]
+        local = []
+
+        for i, (func, *args) in enumerate(zip(funcs, *iterables)):
+            if isinstance(func, RemoteProx) and func.cluster is self:
+                tasks[func.node] += [(func.index, args)]
+                slots[func.node] += [i]
+            else:
+                local += [(i, func, args)]
+
+        # hold each node we send to until its reply is read, so that
+        # concurrent maps don't interleave on a socket (in node order,
+        # so they can't deadlock)
+        busy = [w for w, task in enumerate(tasks) if task]
+        for w in busy:
+            self._locks[w].acquire()
+
+        out = [None]*len(funcs)
+        error = None
+        try:
+            for w in busy:
+                send_msg(self._socks[w], ('map', fn, tasks[w]))
+
+            # run local funcs while the nodes work
+            try:
+                for i, func, args in local:
+                    out[i] = fn(func, *args)
+            except Exception as e:
+                error = e
+
+            for w in busy:
+                msg = recv_msg(self._socks[w])
+                if msg is None:
+                    raise ConnectionError('Lost connection to a prox server')
+                status, result = msg
+                if status == 'error':
+                    error = result
+                    continue
+                for i, (res, info) in zip(slots[w], result):
+                    out[i] = res
+                    if info is not None:
+                        funcs[i].info = info
+        finally:
+            for w in busy:
+                self._locks[w].release()
+
+        if error is not None:
+            raise error
+
+        return out
+
+    def close(self, shutdown=False):
+        """ Disconnect from the nodes, optionally shutting their servers down.
+        """
+        msg = ('shutdown',) if shutdown else ('close',)
+        for sock in self._socks:
+            try:
+                send_msg(sock, msg)
+            except OSError:
+                pass
+            sock.close()
+
+        self._socks = []
+        self._locks = []
@@ -0,0 +1,784 @@
+import numpy as np
+
+from .timer import level_timers
+from .functional import map_apply, async_map_apply
+from .admm import get_prox_infos
+
+"""
+Array-backed ADMM state.
+
+Every key seen in a prox output is interned once into a global `KeyIndex`,
+which assigns it a slot (a contiguous range of entries) in a flat float
+vector. `xbar` is stored as one such vector, and the dual for each prox is
+stored as a flat vector over the slots of the keys that prox works on.
+
+The gather (xbar - u), averaging, dual update and residuals are then done
+with vectorized numpy operations instead of walking dicts key by key.
+Proxes still receive and return plain dicts, so existing proxes keep working.
+"""
+
+class KeyIndex:
+    """ Interns keys into slots of a flat vector.
+
+    A float value takes a single entry; an array value takes
+    `value.size` entries and remembers its shape.
+    """
+    def __init__(self):
+        self.keys = []
+        self.starts = []
+        self.shapes = []
+        self.pos = {}
+        self.size = 0
+        self.scalar = True
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, k, v):
+        """ Return the position of key `k`, adding it if needed.
+        """
+        i = self.pos.get(k)
+        shape = np.shape(v)
+
+        if i is None:
+            i = len(self.keys)
+            self.pos[k] = i
+            self.keys += [k]
+            self.starts += [self.size]
+            self.shapes += [shape]
+            self.size += int(np.prod(shape))
+            self.scalar = self.scalar and shape == ()
+        elif shape != self.shapes[i]:
+            msg = 'Shape of key {!r} changed from {} to {}'
+            raise ValueError(msg.format(k, self.shapes[i], shape))
+
+        return i
+
+    def cols(self, keys):
+        """ Flat vector entries covered by `keys`, in order.
+        """
+        out = []
+        for k in keys:
+            i = self.pos[k]
+            start = self.starts[i]
+            size = int(np.prod(self.shapes[i]))
+            out += range(start, start+size)
+
+        return np.array(out, dtype=np.intp)
+
+    def to_dict(self, vec, keys=None, scalar=False):
+        """ Unpack flat vector entries into a dict keyed by `keys`.
+        If `keys` is None, unpack the entire index.
+
+        `scalar` says that every key in `keys` holds a float.
+        """
+        if keys is None:
+            keys = self.keys
+            scalar = self.scalar
+
+        if scalar:
+            return dict(zip(keys, vec.tolist()))
+
+        out = {}
+        j = 0
+        for k in keys:
+            shape = self.shapes[self.pos[k]]
+            if shape == ():
+                out[k] = float(vec[j])
+                j += 1
+            else:
+                size = int(np.prod(shape))
+                out[k] = vec[j:j+size].reshape(shape)
+                j += size
+
+        return out
+
+
+class ProxLayout:
+    """ The keys a single prox works on, the flat vector entries
+    those keys map to, and the prox dual `u` over those entries.
+    `x` is the (relaxed) prox output last averaged into xbar, over the
+    same entries, or `None` before the first step on this layout.
+    """
+    def __init__(self, keys, cols, u, scalar):
+        self.keys = keys
+        self.cols = cols
+        self.u = u
+        self.scalar = scalar
+        self.x = None
+
+    def values(self, x):
+        """ Flatten the values of prox output `x` in layout order.
+        """
+        if self.scalar:
+            return np.fromiter(x.values(), dtype=float, count=len(self.keys))
+
+        vals = [np.ravel(v) for v in x.values()]
+        if not vals:
+            return np.zeros(0)
+
+        return np.concatenate(vals).astype(float, copy=False)
+
+
+class Incidence:
+    """ Sparse prox-to-key incidence structure.
+
+    Stacks the layouts of all proxes: `cols` holds the xbar entry
+    of every local copy, and `ptr[i]:ptr[i+1]` is the range of
+    local copies owned by prox `i` (and `owner` the prox owning each
+    local copy). Local copies are summed into xbar entries by a
+    `bincount` over `cols`, and `inv_count` turns those sums into
+    averages.
+
+    When one prox changes its keys, is added or is removed, `splice` and
+    `remove` patch these arrays into a new `Incidence`, touching only the
+    counts of that prox's entries, instead of rebuilding from every layout.
+    """
+    def __init__(self, layouts, size):
+        lens = [0 if lay is None else len(lay.cols) for lay in layouts]
+        self.ptr = np.concatenate([[0], np.cumsum(lens)]).astype(np.intp)
+
+        cols = [lay.cols for lay in layouts if lay is not None]
+        if cols:
+            self.cols = np.concatenate(cols)
+        else:
+            self.cols = np.zeros(0, dtype=np.intp)
+
+        self.owner = np.repeat(np.arange(len(lens)), lens)
+        self.count = np.bincount(self.cols, minlength=size)
+        self.inv_count = np.zeros(size)
+        np.divide(1.0, self.count, out=self.inv_count, where=self.count > 0)
+
+    def average(self, flat, weights=None):
+        """ Average of the local copies for each xbar entry,
+        weighted by `weights` on the copies, if given.
+        """
+        if weights is None:
+            return self.inv_count*self.per_key(flat)
+
+        total = self.per_key(weights)
+        out = np.zeros(len(total))
+        np.divide(self.per_key(weights*flat), total, out=out, where=total > 0)
+        return out
+
+    def per_key(self, v):
+        """ Sum of `v` over the local copies of each xbar entry. """
+        return np.bincount(self.cols, weights=v, minlength=len(self.count))
+
+    def splice(self, i, cols, size):
+        """ The incidence with the local copies of prox `i` replaced by
+        `cols`, over `size` xbar entries. `i` may be one past the last
+        prox, to add a prox.
+        """
+        if i == len(self.ptr) - 1:
+            ptr = np.append(self.ptr, self.ptr[-1])
+        else:
+            ptr = self.ptr.copy()
+        lo, hi = ptr[i], ptr[i+1]
+        old = self.cols[lo:hi]
+        ptr[i+1:] += len(cols) - (hi - lo)
+
+        out = self._patched(size, old, cols)
+        out.ptr = ptr
+        out.cols = np.concatenate([self.cols[:lo], cols, self.cols[hi:]])
+        out.owner = np.concatenate([self.owner[:lo], np.full(len(cols), i),
+                                    self.owner[hi:]])
+        return out
+
+    def remove(self, i):
+        """ The incidence without prox `i` (later proxes move down one). """
+        lo, hi = self.ptr[i], self.ptr[i+1]
+
+        out = self._patched(len(self.count), self.cols[lo:hi],
+                           np.zeros(0, dtype=np.intp))
+        out.ptr = np.concatenate([self.ptr[:i+1], self.ptr[i+2:] - (hi - lo)])
+        out.cols = np.concatenate([self.cols[:lo], self.cols[hi:]])
+        out.owner = np.concatenate([self.owner[:lo], self.owner[hi:] - 1])
+        return out
+
+    def _patched(self, size, old, new):
+        """ A new incidence with the counts of `old` entries decremented and
+        those of `new` incremented (over `size` entries).
+        """
+        out = Incidence.__new__(Incidence)
+        n = len(self.count)
+        out.count = np.zeros(size, dtype=self.count.dtype)
+        out.count[:n] = self.count
+        out.inv_count = np.zeros(size)
+        out.inv_count[:n] = self.inv_count
+
+        out.count[old] -= 1
+        out.count[new] += 1
+        touched = np.concatenate([old, new])
+        c = out.count[touched]
+        out.inv_count[touched] = np.where(c > 0, 1.0/np.maximum(c, 1), 0.0)
+        return out
+
+    def per_prox(self, v):
+        """ Sum of `v` over the local copies of each prox. """
+        return np.bincount(self.owner, weights=v, minlength=len(self.ptr)-1)
+
+
+class ArrayState:
+    """ xbar and the prox duals, stored as flat numpy vectors.
+
+    The penalty of each local copy is the global `rho` times an optional
+    per-key factor (`key_factor`, over the xbar entries) and an optional
+    per-prox factor (`prox_factor`). `key_factors` gives the initial
+    factor of keys as they are interned (1 for keys not in it).
+    """
+    def __init__(self, num_proxes, key_factors=None, prox_factors=None):
+        self.index = KeyIndex()
+        self.xbar = np.zeros(0)
+        self.layouts = [None]*num_proxes
+        self._incidence = None
+
+        self.key_factors = key_factors
+        self.key_factor = None if key_factors is None else np.ones(0)
+        self.prox_factor = None
+        if prox_factors is not None:
+            self.prox_factor = np.array(prox_factors, dtype=float)
+        self.rho_version = 0
+
+    @property
+    def incidence(self):
+        """ Cached `Incidence` over the current layouts.
+        Rebuilt only after some prox changes its key set.
+        """
+        if self._incidence is None:
+            self._incidence = Incidence(self.layouts, len(self.xbar))
+        return self._incidence
+
+    def make_xins(self):
+        """ Make the input to each prox function, xbar-u.
+
+        Mirrors `admm.make_xin`: a prox without a layout yet
+        (on the first iteration, say) gets all of xbar.
+        """
+        xins = []
+        full = None
+        for lay in self.layouts:
+            if lay is None or not lay.keys:
+                if full is None:
+                    full = self.xbar_dict()
+                xins += [dict(full)]
+            else:
+                vec = self.xbar[lay.cols] - lay.u
+                xins += [self.index.to_dict(vec, lay.keys, lay.scalar)]
+
+        return xins
+
+    def make_xin(self, i):
+        """ The input to prox `i` alone (see `make_xins`). """
+        lay = self.layouts[i]
+        if lay is None or not lay.keys:
+            return self.xbar_dict()
+        return self.index.to_dict(self.xbar[lay.cols] - lay.u, lay.keys, lay.scalar)
+
+    def relayout(self, i, x):
+        """ Rebuild the layout of prox `i` for the keys of its output `x`.
+        Duals for keys the prox still uses are kept; new keys start at zero.
+        """
+        index = self.index
+        known = len(index)
+        for k, v in x.items():
+            index.intern(k, v)
+
+        if index.size > len(self.xbar):
+            xbar = np.zeros(index.size)
+            xbar[:len(self.xbar)] = self.xbar
+            self.xbar = xbar
+
+        if self.key_factor is not None and index.size > len(self.key_factor):
+            factor = np.ones(index.size)
+            factor[:len(self.key_factor)] = self.key_factor
+            for j in range(known, len(index)):
+                start = index.starts[j]
+                size = int(np.prod(index.shapes[j]))
+                factor[start:start+size] = self.key_factors.get(index.keys[j], 1.0)
+            self.key_factor = factor
+
+        keys = tuple(x)
+        cols = index.cols(keys)
+        scalar = all(index.shapes[index.pos[k]] == () for k in keys)
+
+        old = self.layouts[i]
+        prev = {}
+        if old is not None:
+            prev = index.to_dict(old.u, old.keys, old.scalar)
+
+        u = np.zeros(len(cols))
+        j = 0
+        for k in keys:
+            size = int(np.prod(index.shapes[index.pos[k]]))
+            if k in prev:
+                u[j:j+size] = np.ravel(prev[k])
+            j += size
+
+        self.layouts[i] = ProxLayout(keys, cols, u, scalar)
+        if self._incidence is not None:
+            self._incidence = self._incidence.splice(i, cols, index.size)
+
+    def reassign(self, i, x):
+        """ Relayout prox `i` for the keys of `x`, like `relayout`, but
+        spread the duals of the keys it drops over the other proxes on
+        those keys, like `admm.reassign_dual`. (With per-key or per-prox
+        rho, the unscaled duals are spread.)
+        """
+        def copy_rho(j):
+            if not self.varying:
+                return 1.0
+            inc = self.incidence
+            return self.copy_rho(1.0)[inc.ptr[j]:inc.ptr[j+1]]
+
+        old = self.layouts[i]
+        drop = np.zeros(len(self.xbar))
+        if old is not None:
+            drop[old.cols] += old.u*copy_rho(i)
+
+        self.relayout(i, x)
+        drop = np.concatenate([drop, np.zeros(len(self.xbar) - len(drop))])
+        drop[self.layouts[i].cols] = 0.0
+
+        share = drop*self.incidence.inv_count
+        for j, lay in enumerate(self.layouts):
+            if lay is not None and j != i:
+                lay.u += share[lay.cols]/copy_rho(j)
+
+    def add_prox(self):
+        """ Add a prox at the end. It has no layout until its first output,
+        and starts with the global rho (a prox factor of 1).
+        """
+        self.layouts += [None]
+        if self.prox_factor is not None:
+            self.prox_factor = np.append(self.prox_factor, 1.0)
+        if self._incidence is not None:
+            self._incidence = self._incidence.splice(
+                len(self.layouts) - 1, np.zeros(0, dtype=np.intp), len(self.xbar))
+
+    def remove_prox(self, i):
+        """ Remove prox `i` (later proxes move down one).
+
+        Its last output is taken out of the (weighted) average in xbar,
+        and its duals are spread over the other proxes on its keys, like
+        `reassign`. The keys only it had are dropped from xbar (left out
+        of `xbar_dict`, and out of the index on the next `compact`, once
+        they are half of it). Only the other proxes sharing its keys are
+        touched.
+        """
+        lay = self.layouts[i]
+        inc = self.incidence
+        if lay is not None and len(lay.cols):
+            lo, hi = inc.ptr[i], inc.ptr[i+1]
+            varying = self.varying
+            if varying:
+                rho = self.copy_rho(1.0)
+            lam = lay.u*rho[lo:hi] if varying else lay.u
+
+            new = inc.remove(i)
+            share = np.zeros(len(self.xbar))
+            share[lay.cols] = lam*new.inv_count[lay.cols]
+
+            mask = share[inc.cols] != 0
+            mask[lo:hi] = False
+            pos = np.flatnonzero(mask)
+            owners = inc.owner[pos]
+            for j in np.unique(owners):
+                p = pos[owners == j]
+                d = share[inc.cols[p]]
+                if varying:
+                    d = d/rho[p]
+                self.layouts[j].u[p - inc.ptr[j]] += d
+
+            if lay.x is not None:
+                if self.prox_factor is None:
+                    w, total = 1.0, inc.count[lay.cols]
+                else:
+                    w = self.prox_factor[i]
+                    total = inc.per_key(self.prox_factor[inc.owner])[lay.cols]
+                rest = total - w
+                keep = rest > 1e-12*total
+                cols = lay.cols[keep]
+                self.xbar[cols] = ((total*self.xbar[lay.cols] - w*lay.x)[keep]
+                                   /rest[keep])
+
+            self.xbar[lay.cols[new.count[lay.cols] == 0]] = 0.0
+            inc = new
+        else:
+            inc = inc.remove(i)
+
+        del self.layouts[i]
+        if self.prox_factor is not None:
+            self.prox_factor = np.delete(self.prox_factor, i)
+        self._incidence = inc
+        self.rho_version += 1
+
+        if 2*np.count_nonzero(inc.count == 0) > len(self.xbar):
+            self.compact()
+
+    def compact(self):
+        """ Drop the keys that no prox uses anymore from the index,
+        and renumber the xbar entries.
+        """
+        index = self.index
+        count = self.incidence.count
+        live = [j for j in range(len(index))
+                if count[index.starts[j]:index.starts[j] +
+                         int(np.prod(index.shapes[j]))].any()]
+        if len(live) == len(index):
+            return
+
+        new = KeyIndex()
+        for j in live:
+            new.intern(index.keys[j], np.zeros(index.shapes[j]))
+        entries = np.concatenate([index.cols([index.keys[j]]) for j in live]
+                                 or [np.zeros(0, dtype=np.intp)])
+
+        self.index = new
+        self.xbar = self.xbar[entries]
+        if self.key_factor is not None:
+            self.key_factor = self.key_factor[entries]
+        for lay in self.layouts:
+            if lay is not None:
+                lay.cols = new.cols(lay.keys)
+        self._incidence = None
+
+    def gather(self, xs):
+        """ Flatten the prox outputs, relaying out any prox whose keys changed.
+        """
+        vals = []
+        changed = 0
+        for i, x in enumerate(xs):
+            lay = self.layouts[i]
+            if lay is None or tuple(x) != lay.keys:
+                changed += 1
+                if changed == 2:
+                    # cheaper to rebuild the incidence once than to splice
+                    # it for each of several proxes
+                    self._incidence = None
+                self.relayout(i, x)
+                lay = self.layouts[i]
+            vals += [lay.values(x)]
+
+        return vals
+
+    def average(self, xs, alpha=1.0):
+        """ Average the prox outputs into xbar, over-relaxed by `alpha`
+        (see `admm.relax`).
+
+        Returns the stacked, flattened (and relaxed) prox outputs and
+        the old xbar, for the dual update and residuals.
+        """
+        vals = self.gather(xs)
+        if vals:
+            flat = np.concatenate(vals)
+        else:
+            flat = np.zeros(0)
+
+        inc = self.incidence
+        if alpha != 1.0:
+            flat = alpha*flat + (1.0 - alpha)*self.xbar[inc.cols]
+
+        weights = None
+        if self.prox_factor is not None:
+            weights = self.prox_factor[inc.owner]
+
+        xbarold = self.xbar
+        self.xbar = inc.average(flat, weights)
+
+        return flat, xbarold
+
+    def update_u(self, flat):
+        inc = self.incidence
+        du = flat - self.xbar[inc.cols]
+        for i, lay in enumerate(self.layouts):
+            if lay is not None:
+                lay.u += du[inc.ptr[i]:inc.ptr[i+1]]
+                lay.x = flat[inc.ptr[i]:inc.ptr[i+1]]
+
+    def residuals(self, flat, xbarold, rho):
+        """ Same quantities as `resid.general_residuals`, with the dual
+        residual weighted by the penalty of each local copy.
+        """
+        inc = self.incidence
+
+        d = flat - self.xbar[inc.cols]
+        r = d.dot(d)
+
+        d = self.xbar - xbarold
+        if not self.varying:
+            s = inc.count.dot(d*d)
+            return np.sqrt(r), rho*np.sqrt(s)
+
+        d = self.copy_rho(rho)*d[inc.cols]
+        return np.sqrt(r), np.sqrt(d.dot(d))
+
+    def stopping_norms(self, flat, rho):
+        """ Same quantities as `resid.stopping_norms`. """
+        inc = self.incidence
+        y = self.copy_rho(rho)*self.stacked_u()
+        return dict(x=np.sqrt(flat.dot(flat)),
+                    z=np.sqrt(inc.count.dot(self.xbar*self.xbar)),
+                    y=np.sqrt(y.dot(y)), n=len(flat))
+
+    def split_residuals(self, flat, xbarold, rho, per):
+        """ Primal and dual residuals of each xbar entry (`per='key'`)
+        or of each prox (`per='prox'`).
+        """
+        inc = self.incidence
+        split = inc.per_key if per == 'key' else inc.per_prox
+
+        d = flat - self.xbar[inc.cols]
+        r = split(d*d)
+
+        d = self.copy_rho(rho)*(self.xbar - xbarold)[inc.cols]
+        s = split(d*d)
+
+        return np.sqrt(r), np.sqrt(s)
+
+    @property
+    def varying(self):
+        """ Whether the penalty differs across keys or proxes. """
+        return self.key_factor is not None or self.prox_factor is not None
+
+    def copy_rho(self, rho):
+        """ The penalty of each local copy, or `rho`, if they're all `rho`.
+        """
+        if not self.varying:
+            return rho
+
+        inc = self.incidence
+        out = np.full(len(inc.cols), float(rho))
+        if self.key_factor is not None:
+            out *= self.key_factor[inc.cols]
+        if self.prox_factor is not None:
+            out *= self.prox_factor[inc.owner]
+        return out
+
+    def prox_rhos(self, rho):
+        """ The rho to pass each prox: `rho` times its factor, or, with
+        per-key factors, a dict of the rho of each of its keys (except
+        for a prox without a layout yet, whose keys aren't known).
+        `None` if they're all `rho`.
+        """
+        if not self.varying:
+            return None
+
+        pf = self.prox_factor
+        if pf is None:
+            pf = np.ones(len(self.layouts))
+
+        if self.key_factor is None:
+            return [rho*f for f in pf]
+
+        out = []
+        for i, lay in enumerate(self.layouts):
+            if lay is None or not lay.keys:
+                out += [rho*pf[i]]
+            else:
+                vec = rho*pf[i]*self.key_factor[lay.cols]
+                out += [self.index.to_dict(vec, lay.keys, lay.scalar)]
+        return out
+
+    def rescale_keys(self, scale):
+        """ Scale the factor of each xbar entry by `scale` (a vector over
+        the entries), and the duals to match.
+        """
+        if self.key_factor is None:
+            self.key_factor = np.ones(len(self.xbar))
+        self.key_factor *= scale
+        for lay in self.layouts:
+            if lay is not None:
+                lay.u /= scale[lay.cols]
+        self.rho_version += 1
+
+    def rescale_proxes(self, scale):
+        """ Scale the factor of each prox by `scale` (a vector over the
+        proxes), and the duals to match.
+        """
+        if self.prox_factor is None:
+            self.prox_factor = np.ones(len(self.layouts))
+        self.prox_factor *= scale
+        for lay, f in zip(self.layouts, scale):
+            if lay is not None:
+                lay.u /= f
+        self.rho_version += 1
+
+    def rho_info(self, rho):
+        """ Compact summary of the per-key and per-prox rhos, for the
+        step info: quantiles (0, 10, 50, 90, 100) of the per-key rhos,
+        and each per-prox rho.
+        """
+        info = {}
+        if self.key_factor is not None and len(self.key_factor):
+            q = np.percentile(rho*self.key_factor, [0, 10, 50, 90, 100])
+            info['rho_keys'] = q.tolist()
+        if self.prox_factor is not None:
+            info['rho_proxes'] = (rho*self.prox_factor).tolist()
+        return info
+
+    def stacked_u(self):
+        """ The prox duals, stacked like the flattened prox outputs. """
+        us = [lay.u for lay in self.layouts if lay is not None]
+        return np.concatenate(us) if us else np.zeros(0)
+
+    def rescale(self, scale):
+        for lay in self.layouts:
+            if lay is not None:
+                lay.u /= scale
+
+    def xbar_dict(self):
+        """ xbar as a dict, over the keys some prox has. """
+        count = self.incidence.count
+        if count.all():
+            return self.index.to_dict(self.xbar)
+
+        index = self.index
+        keys = [k for k, start in zip(index.keys, index.starts)
+                if count[start]]
+        return index.to_dict(self.xbar[index.cols(keys)], keys)
+
+    def u_dicts(self):
+        out = []
+        for lay in self.layouts:
+            if lay is None:
+                out += [{}]
+            else:
+                out += [self.index.to_dict(lay.u, lay.keys, lay.scalar)]
+
+        return out
+
+
+def array_step(proxes, state, rho, hook=None, mapper=None, rho_adj=None,
+               instrument='full', tracer=None, alpha=1.0, check=True,
+               norms=False):
+    """ Does one ADMM iteration on an `ArrayState`.
+
+    Same iteration, timing and step info as `admm.admm_step`,
+    but `state` is updated in place.
+
+    Returns:
+    rho
+    info: dict with info, including residuals and timing
+    """
+    step_info = {}
+    step_info['rho'] = rho
+
+    coarse, phase = level_timers(instrument, tracer)
+    full = instrument == 'full'
+
+    with coarse(step_info, 'total_step'):
+        with phase(step_info, 'x_in'):
+            xins = state.make_xins()
+
+        with phase(step_info, 'total_proxes'):
+            rhos = state.prox_rhos(rho)
+            if rhos is None:
+                out = map_apply(proxes, xins, rep_args=[rho], mapper=mapper,
+                                timed=full, tracer=tracer)
+            else:
+                out = map_apply(proxes, xins, rhos, mapper=mapper,
+                                timed=full, tracer=tracer)
+            xs, times = zip(*out)
+            if full:
+                step_info['times']['proxes'] = times
+
+        rho = finish_array_step(proxes, xs, state, rho, step_info,
+                                hook=hook, rho_adj=rho_adj,
+                                instrument=instrument, tracer=tracer,
+                                alpha=alpha, check=check, norms=norms)
+
+    return rho, step_info
+
+async def array_astep(proxes, state, rho, hook=None, rho_adj=None,
+                      limit=None, executor=None, mapper=None, instrument='full',
+                      tracer=None, alpha=1.0, check=True, norms=False):
+    """ Does one ADMM iteration on an `ArrayState`, like `array_step`,
+    but the proxes are run concurrently on the running event loop.
+    """
+    step_info = {}
+    step_info['rho'] = rho
+
+    coarse, phase = level_timers(instrument, tracer)
+    full = instrument == 'full'
+
+    with coarse(step_info, 'total_step'):
+        with phase(step_info, 'x_in'):
+            xins = state.make_xins()
+
+        with phase(step_info, 'total_proxes'):
+            rhos = state.prox_rhos(rho)
+            if rhos is None:
+                args, rep_args = [xins], [rho]
+            else:
+                args, rep_args = [xins, rhos], None
+            out = await async_map_apply(proxes, *args, rep_args=rep_args,
+                                        limit=limit, executor=executor,
+                                        mapper=mapper,
+                                        timed=full, tracer=tracer)
+            xs, times = zip(*out)
+            if full:
+                step_info['times']['proxes'] = times
+
+        rho = finish_array_step(proxes, xs, state, rho, step_info,
+                                hook=hook, rho_adj=rho_adj,
+                                instrument=instrument, tracer=tracer,
+                                alpha=alpha, check=check, norms=norms)
+
+    return rho, step_info
+
+def finish_array_step(proxes, xs, state, rho, step_info, hook=None, rho_adj=None,
+                      instrument='full', tracer=None, alpha=1.0, check=True,
+                      norms=False):
+    """ The rest of an ADMM iteration on an `ArrayState`,
+    once the prox outputs `xs` are in. See `admm.finish_step`.
+    """
+    coarse, phase = level_timers(instrument, tracer)
+
+    if instrument == 'full':
+        with phase(step_info, 'prox_infos'):
+            step_info['prox_infos'] = get_prox_infos(proxes)
+
+    with phase(step_info, 'xbar'):
+        flat, xbarold = state.average(xs, alpha)
+
+    with phase(step_info, 'us'):
+        state.update_u(flat)
+
+    if not check:
+        step_info['r'] = step_info['s'] = np.nan
+    else:
+        with coarse(step_info, 'resid'):
+            r,s = state.residuals(flat, xbarold, rho)
+            step_info['r'] = r
+            step_info['s'] = s
+            if norms:
+                step_info['norms'] = state.stopping_norms(flat, rho)
+
+        with phase(step_info, 'rho_scaling'):
+            if hasattr(rho_adj, 'observe'):
+                inc = state.incidence
+                rho_adj.observe(flat, xbarold[inc.cols], state.xbar[inc.cols],
+                                state.stacked_u(), state.copy_rho(rho), inc.owner)
+
+            per = getattr(rho_adj, 'per', None)
+            if per is None and rho_adj:
+                scale = rho_adj(r,s)
+                if scale != 1.0:
+                    rho *= scale
+                    state.rescale(scale)
+            elif per is not None:
+                scale = rho_adj(*state.split_residuals(flat, xbarold, rho, per))
+                if np.any(scale != 1.0):
+                    if per == 'key':
+                        state.rescale_keys(scale)
+                    else:
+                        state.rescale_proxes(scale)
+
+    step_info.update(state.rho_info(rho))
+
+    if hook:
+        with phase(step_info, 'hook'):
+            step_info['hook'] = hook(state.xbar_dict())
+
+    return rho
@@ -1,8 +1,11 @@
 from itertools import repeat
 from collections import defaultdict
 from functools import wraps
+from time import perf_counter_ns
+import asyncio
+import inspect
 
-from .timer import SimpleTimer, DictTimer
+from .timer import DictTimer
 
 """
 What if this thing already has an info? do we clobber it? overwrite `time`?
@@ -20,7 +23,8 @@ def time_info(f):
     return wrapper
 
 
-def map_apply(funcs, *iterables, rep_args=None, mapper=None):
+def map_apply(funcs, *iterables, rep_args=None, mapper=None, timed=True,
+              tracer=None, ids=None):
     """ Apply each func to each iterable input argument.
 
     For coordinating proxes with their appropriate input.
@@ -30,6 +34,10 @@ def map_apply(funcs, *iterables, rep_args=None, mapper=None):
 
     returns the output results, along with the time for each function call
     as a list of tuples: [(output1, time1), ...]
+    If not `timed`, the times are all `None`.
+
+    tracer, if given, is a `trace.Tracer` recording the span of each call
+    (as the call to prox `ids[i]`, if `ids` are given, instead of `i`).
     """
 
     if mapper is None:
@@ -39,15 +47,138 @@ def map_apply(funcs, *iterables, rep_args=None, mapper=None):
     else:
         rep_args = []
 
-    out = mapper(do, funcs, *iterables, *rep_args)
+    fn = do if timed else do_untimed
+    if tracer is not None:
+        fn = tracer.wrap(fn)
+
+    out = mapper(fn, funcs, *iterables, *rep_args)
+
+    if tracer is not None:
+        out = tracer.collect(out, ids)
 
     return out
 
 def do(func, *iterables):
-    with SimpleTimer() as t:
-        result =  func(*iterables)
+    start = perf_counter_ns()
+    result = func(*iterables)
+    end = perf_counter_ns()
+
+    return result, (end-start)*1e-9
+
+def do_untimed(func, *iterables):
+    return func(*iterables), None
+
+def do_chunk(funcs, *iterables):
+    """ Like `do`, over a chunk of funcs and their inputs.
+
+    Each call is timed from the clock reading that ends the previous
+    one, so a chunk of n calls reads the clock n+1 times, not 2n.
+    """
+    out = []
+    start = perf_counter_ns()
+    for func, *args in zip(funcs, *iterables):
+        result = func(*args)
+        end = perf_counter_ns()
+        out += [(result, (end-start)*1e-9)]
+        start = end
+
+    return out
+
+def async_prox(func):
+    """ Return the coroutine function to await for `func`, or `None`
+    if `func` is a plain synchronous prox.
+
+    A prox is asynchronous if it is a coroutine function, if its
+    `__call__` is, or if it has an `aprox` coroutine method.
+    """
+    aprox = getattr(func, 'aprox', None)
+    if inspect.iscoroutinefunction(aprox):
+        return aprox
+    if inspect.iscoroutinefunction(func):
+        return func
+    if inspect.iscoroutinefunction(getattr(func, '__call__', None)):
+        return func
+
+    return None
+
+async def async_map_apply(funcs, *iterables, rep_args=None, limit=None, executor=None,
+                          mapper=None, timed=True, tracer=None):
+    """ Like `map_apply`, but run on the running event loop.
+
+    Asynchronous proxes (see `async_prox`) are awaited, and synchronous
+    ones are run in `executor` (the loop's default executor, if `None`).
+    All are gathered concurrently, with at most `limit` in flight at once.
+
+    With a `mapper` (like an ADMM backend's `map`), the synchronous proxes
+    are instead run together through `mapper`, as one call in `executor`,
+    so the backend decides where and when they run (and `limit` only
+    applies to the asynchronous ones).
 
-    return result, t.time
+    returns the output results, along with the time for each function call
+    as a list of tuples: [(output1, time1), ...]
+
+    With a `tracer`, each call is recorded as a span on the loop's thread,
+    from when it was awaited (or handed to the executor) to when it returned.
+    """
+    if rep_args is None:
+        rep_args = []
+
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(limit) if limit else None
+    submitted = perf_counter_ns()
+
+    async def ado(i, func, args):
+        afunc = async_prox(func)
+        start = perf_counter_ns()
+        if afunc is not None:
+            result = await afunc(*args)
+        else:
+            result = await loop.run_in_executor(executor, func, *args)
+        end = perf_counter_ns()
+
+        if tracer is not None:
+            tracer.prox(i, start, end, submitted)
+
+        return result, ((end-start)*1e-9 if timed else None)
+
+    async def limited(i, func, args):
+        if sem is None:
+            return await ado(i, func, args)
+        async with sem:
+            return await ado(i, func, args)
+
+    funcs = list(funcs)
+    iterables = [list(it) for it in iterables]
+
+    batch = []
+    if mapper is not None:
+        batch = [i for i, func in enumerate(funcs) if async_prox(func) is None]
+
+    def run_batch():
+        return map_apply([funcs[i] for i in batch],
+                         *[[it[i] for i in batch] for it in iterables],
+                         rep_args=rep_args, mapper=mapper, timed=timed,
+                         tracer=tracer, ids=batch)
+
+    skip = set(batch)
+    tasks = [limited(i, func, (*args, *rep_args))
+             for i, (func, *args) in enumerate(zip(funcs, *iterables))
+             if i not in skip]
+    if batch:
+        tasks += [loop.run_in_executor(executor, run_batch)]
+
+    done = await asyncio.gather(*tasks)
+    if not batch:
+        return done
+
+    out = [None]*len(funcs)
+    for i, res in zip(batch, done[-1]):
+        out[i] = res
+    rest = iter(done[:-1])
+    for i in range(len(funcs)):
+        if i not in skip:
+            out[i] = next(rest)
+    return out
 
 def fast_avg(xs):
     """ Compute the average by key over the list of dictionaries, xs.
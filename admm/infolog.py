@@ -0,0 +1,223 @@
+import json
+import os
+
+import numpy as np
+
+from .telemetry import Telemetry, Columns, _as_objects
+
+"""
+Streaming, append-only storage of the ADMM step infos.
+
+An `InfoLog` is a directory holding one raw binary file per column (in the
+`telemetry.Telemetry` sense), plus a small `meta.json` describing them. Step
+infos are buffered in memory and appended to the column files every
+`flush_every` iterations, so a long solve is written out as it goes, and a
+crash loses at most the unflushed iterations.
+
+`load_infolog` memory-maps the column files into a `Telemetry`, so columns
+can be sliced without reading, let alone parsing, the whole log.
+
+Float columns are stored as raw float64. Object columns (anything that isn't
+a number or a list of numbers) are stored as JSON lines, and are read into
+memory on load. A float column that gets an object value in a later chunk
+is rewritten as an object column (as `Telemetry` does in memory).
+"""
+
+META = 'meta.json'
+
+
+class InfoLog:
+    """ Append-only, on-disk log of ADMM step infos.
+
+    Parameters
+    ----------
+    path : str
+        Directory to write the log to. Created if needed; an existing
+        log there is overwritten (only the files it lists are removed).
+        Any other non-empty directory is refused, with a ValueError.
+    flush_every : int
+        Number of iterations to buffer before appending them to disk.
+    extra : dict
+        Extra info (possibly about the problem being solved) to save
+        with the log.
+    """
+    def __init__(self, path, flush_every=100, extra=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.extra = extra
+
+        os.makedirs(path, exist_ok=True)
+        if is_infolog(path):
+            with open(os.path.join(path, META)) as f:
+                old = json.load(f)
+            for name in [col['file'] for col in old['columns']] + [META]:
+                file = os.path.join(path, name)
+                if os.path.exists(file):
+                    os.remove(file)
+        elif os.listdir(path):
+            raise ValueError('Not an empty directory or an InfoLog: {}'.format(path))
+
+        self.rows = 0
+        self.columns = {}
+        self._buffer = Telemetry(capacity=flush_every)
+        self._write_meta()
+
+    def __len__(self):
+        return self.rows + len(self._buffer)
+
+    def append(self, step_info):
+        self._buffer.append(step_info)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """ Append the buffered iterations to the column files.
+        """
+        buf = self._buffer
+        n = len(buf)
+        if n == 0:
+            return
+
+        for path, kind in buf.kinds.items():
+            a = buf.history.data[path][:n]
+            col = self._column(path, kind, a)
+
+            if col['object']:
+                if kind[1] is not object:
+                    a = _as_objects(a)
+                with open(self._file(col), 'a') as f:
+                    for v in a:
+                        f.write(_dumps(v) + '\n')
+                continue
+
+            if a.ndim == 2:
+                width = col['width']
+                if a.shape[1] < width:
+                    pad = np.full((n, width), np.nan)
+                    pad[:, :a.shape[1]] = a
+                    a = pad
+                elif a.shape[1] > width:
+                    self._widen(col, a.shape[1])
+
+            with open(self._file(col), 'ab') as f:
+                f.write(np.ascontiguousarray(a, dtype=np.float64).tobytes())
+
+        # columns missing from this chunk get padded
+        for key, col in self.columns.items():
+            if key not in buf.kinds:
+                self._pad(col, n)
+
+        self.rows += n
+        self._buffer = Telemetry(capacity=self.flush_every)
+        self._write_meta()
+
+    def close(self):
+        self.flush()
+
+    def _file(self, col):
+        return os.path.join(self.path, col['file'])
+
+    def _column(self, path, kind, a):
+        key = tuple(path)
+        col = self.columns.get(key)
+        if col is None:
+            col = {'path': list(path), 'kind': kind[0],
+                   'object': kind[1] is object,
+                   'width': a.shape[1] if a.ndim == 2 else None,
+                   'file': 'c{}'.format(len(self.columns))}
+            col['file'] += '.jsonl' if col['object'] else '.f8'
+            self.columns[key] = col
+            open(self._file(col), 'w').close()
+            self._pad(col, self.rows)
+        elif kind[1] is object and not col['object']:
+            self._to_objects(col)
+        return col
+
+    def _to_objects(self, col):
+        """ Rewrite a float column file as an object column. """
+        old = np.fromfile(self._file(col))
+        if col['width'] is not None:
+            old = old.reshape(-1, col['width'])
+        os.remove(self._file(col))
+
+        col.update(kind='object', object=True, width=None,
+                   file=col['file'][:-len('.f8')] + '.jsonl')
+        with open(self._file(col), 'w') as f:
+            for v in _as_objects(old):
+                f.write(_dumps(v) + '\n')
+
+    def _pad(self, col, n):
+        if n == 0:
+            return
+        if col['object']:
+            with open(self._file(col), 'a') as f:
+                f.write('null\n'*n)
+        else:
+            shape = n if col['width'] is None else (n, col['width'])
+            with open(self._file(col), 'ab') as f:
+                f.write(np.full(shape, np.nan).tobytes())
+
+    def _widen(self, col, width):
+        """ Rewrite a 2-D column file for a wider row. """
+        old = np.fromfile(self._file(col)).reshape(-1, col['width'])
+        new = np.full((old.shape[0], width), np.nan)
+        new[:, :old.shape[1]] = old
+        new.tofile(self._file(col))
+        col['width'] = width
+
+    def _write_meta(self):
+        meta = {'rows': self.rows, 'extra': self.extra,
+                'columns': list(self.columns.values())}
+        tmp = os.path.join(self.path, META + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, META))
+
+
+def _dumps(v):
+    if isinstance(v, np.ndarray):
+        v = v.tolist()
+    return json.dumps(v)
+
+
+def is_infolog(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META))
+
+def load_infolog(path):
+    """ Memory-map an `InfoLog` directory.
+
+    Returns a read-only `Telemetry` over the logged iterations, and the
+    `extra` info saved with the log.
+    """
+    with open(os.path.join(path, META)) as f:
+        meta = json.load(f)
+
+    rows = meta['rows']
+    t = Telemetry(capacity=max(rows, 1))
+    cols = Columns(max(rows, 1))
+
+    for col in meta['columns']:
+        key = tuple(col['path'])
+        file = os.path.join(path, col['file'])
+
+        if col['object']:
+            with open(file) as f:
+                vals = [json.loads(line) for _, line in zip(range(rows), f)]
+            a = np.empty(rows, dtype=object)
+            a[:] = vals
+            t.kinds[key] = (col['kind'], object)
+        else:
+            shape = (rows,) if col['width'] is None else (rows, col['width'])
+            if rows == 0:
+                a = np.zeros(shape)
+            else:
+                a = np.memmap(file, dtype=np.float64, mode='r', shape=shape)
+            t.kinds[key] = (col['kind'], float)
+
+        cols.data[key] = a
+
+    cols.n = rows
+    t.history = t.recent = cols
+    t.count = rows
+
+    return t, meta['extra']
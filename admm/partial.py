@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+
+"""
+Partial-barrier (asynchronous) execution of the proxes.
+
+Instead of waiting for every prox each step, a `PartialBarrier` returns once
+a fraction of the proxes have arrived, or a deadline has passed. Proxes that
+haven't arrived keep running; until they do, their most recent output is used
+in their place. When a late prox does arrive, its output (computed from an
+older `xbar - u`) is used in the next step.
+
+The staleness of a prox is the number of steps its output has been reused
+for. No prox is allowed to go more than `max_staleness` steps without
+arriving: the barrier waits for those, and for proxes that have never
+arrived, regardless of the fraction or deadline.
+"""
+
+class PartialBarrier:
+    """ ADMM backend returning once a fraction of the proxes have arrived.
+
+    Parameters
+    ----------
+    threads : int
+        Number of threads to run proxes in (ignored if `executor` is given).
+    fraction : float
+        Fraction of proxes to wait for each step.
+    deadline : float
+        Seconds to wait each step before returning with whatever has
+        arrived (subject to `max_staleness`). `None` means no deadline.
+    max_staleness : int
+        Maximum number of steps a prox output may be reused for.
+    executor : concurrent.futures.Executor
+        Executor to submit proxes to, instead of a new thread pool.
+    """
+    def __init__(self, threads=None, fraction=1.0, deadline=None,
+                 max_staleness=3, executor=None):
+        if executor is None:
+            executor = ThreadPoolExecutor(threads)
+
+        self.executor = executor
+        self.fraction = fraction
+        self.deadline = deadline
+        self.max_staleness = max_staleness
+
+        self._pending = {}
+        self._last = {}
+        self._staleness = {}
+        self._arrived = 0
+
+    def map(self, fn, funcs, *iterables):
+        """ Submit `fn(func, *args)` for each func not already running,
+        and return the latest result for each func, in order.
+        """
+        funcs = list(funcs)
+        n = len(funcs)
+
+        for i, (func, *args) in enumerate(zip(funcs, *iterables)):
+            if i not in self._pending:
+                self._pending[i] = self.executor.submit(fn, func, *args)
+
+        start = time.time()
+        need = min(n, int(round(self.fraction*n)))
+        arrived = set()
+
+        while True:
+            for i, fut in self._pending.items():
+                if fut.done():
+                    arrived.add(i)
+
+            required = [i for i in self._pending
+                        if i not in arrived and self._must_wait(i)]
+
+            if not required:
+                if len(arrived) >= need:
+                    break
+                if self.deadline is not None and time.time() - start >= self.deadline:
+                    break
+
+            waiting = [fut for i, fut in self._pending.items() if i not in arrived]
+            timeout = None
+            if self.deadline is not None and not required:
+                timeout = max(0.0, self.deadline - (time.time() - start))
+            wait(waiting, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for i in range(n):
+            if i in arrived:
+                self._last[i] = self._pending.pop(i).result()
+                self._staleness[i] = 0
+            else:
+                self._staleness[i] += 1
+
+        self._arrived = len(arrived)
+
+        return [self._last[i] for i in range(n)]
+
+    def _must_wait(self, i):
+        if i not in self._last:
+            return True
+        return self._staleness[i] >= self.max_staleness
+
+    def step_info(self):
+        """ Staleness of each prox output used in the most recent step,
+        and the number of proxes that arrived for it.
+        """
+        n = len(self._last)
+        return {'staleness': [self._staleness[i] for i in range(n)],
+                'arrived': self._arrived}
+
+    def replace_prox(self, i, old, new):
+        """ Prox `i` was replaced (see `ADMM.update_proxes`): drop the old
+        prox's pending call and last output, so the new prox is submitted
+        afresh on the next `map`, and waited for like a new prox.
+        """
+        fut = self._pending.pop(i, None)
+        if fut is not None:
+            fut.cancel()
+        self._last.pop(i, None)
+        self._staleness.pop(i, None)
+
+    def add_prox(self, prox):
+        """ A prox was added at the end (see `ADMM.add_prox`); nothing to do,
+        as it is submitted, and waited for, on the next `map`.
+        """
+
+    def remove_prox(self, i, prox):
+        """ Prox `i` was removed (see `ADMM.remove_prox`): drop its pending
+        call and last output, and move those of later proxes down one.
+        """
+        fut = self._pending.pop(i, None)
+        if fut is not None:
+            fut.cancel()
+        self._last.pop(i, None)
+        self._staleness.pop(i, None)
+
+        for d in (self._pending, self._last, self._staleness):
+            for j in sorted(k for k in d if k > i):
+                d[j-1] = d.pop(j)
+
+    def close(self):
+        for fut in self._pending.values():
+            fut.cancel()
+        self.executor.shutdown()
+        self._pending = {}
@@ -0,0 +1,161 @@
+from numbers import Number
+import operator
+
+import numpy as np
+
+from .functional import time_info
+
+"""
+Closed-form projection proxes, evaluated in NumPy on whole blocks of keys.
+
+Each `form_*_prox` here returns a prox (with a `time_info` timing `info`,
+like `sharing.form_sharing_prox`) that projects the scalar values of its
+keys onto a simple set. On the first call with a given set of input keys,
+a `BlockPlan` lays those keys out as slots of a vector (and any per-key
+parameters as vectors over the same slots); later calls gather the values,
+project them in one vectorized operation, and scatter them back to a dict.
+
+`keys` selects the keys a prox constrains; `None` means every input key.
+Input keys that aren't selected are left out of the output.
+"""
+
+class BlockPlan:
+    """ Slots for the selected keys of an input dict, in input order,
+    with per-key parameters as vectors over the slots.
+
+    A plan matches inputs with the same keys in the same order (as ADMM
+    builds the prox inputs), so values are gathered by position, without
+    hashing the keys again. Keys are compared by identity first, and by
+    equality if that fails (as for inputs unpickled by a process or cluster
+    backend, whose keys are new objects every step).
+    """
+    def __init__(self, x, keys=None):
+        self.select = keys
+        self.order = tuple(x)
+        self.keys = []
+        positions = []
+        for i, k in enumerate(self.order):
+            if self.selected(k):
+                self.keys += [k]
+                positions += [i]
+
+        if len(positions) == len(self.order):
+            self.positions = None
+        else:
+            self.positions = np.array(positions, dtype=np.intp)
+        self._params = {}
+
+    def selected(self, k):
+        return self.select is None or k in self.select
+
+    def matches(self, x):
+        if len(x) != len(self.order):
+            return False
+        if all(map(operator.is_, x, self.order)):
+            return True
+        order = tuple(x)
+        if order != self.order:
+            return False
+        # same keys, new objects; match these by identity from now on
+        self.order = order
+        return True
+
+    def gather(self, x):
+        n = len(self.keys)
+        if self.positions is None:
+            return np.fromiter(x.values(), float, n)
+        vals = list(x.values())
+        return np.fromiter((vals[i] for i in self.positions), float, n)
+
+    def scatter(self, v):
+        return dict(zip(self.keys, v.tolist()))
+
+    def param(self, p, default):
+        """ `p` as a vector over the slots, if it is a dict by key
+        (with `default` for missing keys), or as is, if it is a number.
+        """
+        if isinstance(p, Number):
+            return p
+        v = self._params.get(id(p))
+        if v is None:
+            v = np.array([p.get(k, default) for k in self.keys], dtype=float)
+            self._params[id(p)] = v
+        return v
+
+
+def form_block_prox(project, keys=None):
+    """ Prox applying `project(v, plan)` to the vector `v` of the values
+    of the selected keys, laid out by the `BlockPlan` `plan`.
+    """
+    if keys is not None:
+        keys = set(keys)
+    plan = None
+
+    @time_info
+    def prox(x0=None, rho=1):
+        nonlocal plan
+        if x0 is None:
+            x0 = {}
+
+        if plan is None or not plan.matches(x0):
+            plan = BlockPlan(x0, keys)
+
+        return plan.scatter(project(plan.gather(x0), plan))
+
+    return prox
+
+
+def form_box_prox(lower=-np.inf, upper=np.inf, keys=None):
+    """ Projection onto `lower <= x <= upper`.
+    Bounds are numbers, or dicts by key (missing keys are unbounded).
+    """
+    def project(v, plan):
+        return np.clip(v, plan.param(lower, -np.inf), plan.param(upper, np.inf))
+
+    return form_block_prox(project, keys)
+
+def form_nonneg_prox(keys=None):
+    """ Projection onto `x >= 0`. """
+    return form_box_prox(lower=0.0, keys=keys)
+
+def form_budget_prox(budget, keys=None):
+    """ Projection onto `sum(x) <= budget`. """
+    def project(v, plan):
+        excess = v.sum() - budget
+        if excess <= 0 or len(v) == 0:
+            return v
+        return v - excess/len(v)
+
+    return form_block_prox(project, keys)
+
+def simplex_projection(v, total=1.0):
+    """ Euclidean projection of `v` onto `x >= 0, sum(x) == total`,
+    by sorting (Duchi et al., 2008).
+    """
+    if len(v) == 0:
+        return v
+    u = np.sort(v)[::-1]
+    css = np.cumsum(u) - total
+    ind = np.arange(1, len(v) + 1)
+    r = np.flatnonzero(u - css/ind > 0)[-1]
+    theta = css[r]/(r + 1)
+    return np.maximum(v - theta, 0.0)
+
+def form_simplex_prox(total=1.0, keys=None):
+    """ Projection onto `x >= 0, sum(x) == total`. """
+    def project(v, plan):
+        return simplex_projection(v, total)
+
+    return form_block_prox(project, keys)
+
+def form_pin_prox(values):
+    """ Prox pinning each key of the dict `values` to its value,
+    whatever the input.
+    """
+    values = dict(values)
+
+    @time_info
+    def prox(x0=None, rho=1):
+        return dict(values)
+
+    return prox
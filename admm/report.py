@@ -1,4 +1,5 @@
 from collections import Counter
+import warnings
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -6,6 +7,8 @@ from toolz import get, get_in
 
 import pandas as pd
 
+from .telemetry import Telemetry
+
 def plot_iter_breakdown(infos, iter_nums=None):
     keys = ['resid', 'rho_scaling', 'total_proxes', 'us', 'x_in', 'xbar', 'hook']
     if iter_nums is None:
@@ -48,7 +51,12 @@ def get_key(infos, *keys, reduce=None, default=None):
     - times: dict
         - proxes: list[float]
         - hook, resid, rho_scaling, total_proxes, total_step, us, x_in, xbar: float
+
+    For a `Telemetry`, the column is read directly instead.
     """
+    if isinstance(infos, Telemetry):
+        return _reduce(_column(infos, keys, default), reduce)
+
     # maybe just make a generator?
     g = (get_in(keys, info, default=default) for info in infos)
     
@@ -67,7 +75,17 @@ def get_prox_key(infos, key, default=None, reduce=None, array=True):
     
     Some prox outputs may be `None` or `{}`. In that case,
     return the `default` value.
+
+    For a `Telemetry`, the column is read directly instead.
     """
+    if isinstance(infos, Telemetry) and array:
+        if ('prox_infos', key) in infos.kinds:
+            return _reduce(_column(infos, ('prox_infos', key), default), reduce)
+        if ('prox_infos',) in infos.kinds:
+            mask = infos.get('prox_infos')
+            fill = np.nan if default is None else default
+            return _reduce(np.where(np.isnan(mask), np.nan, fill), reduce)
+
     g = ([get(key, p, default=default) for p in info['prox_infos']] for info in infos )
     
     if reduce:
@@ -79,6 +97,28 @@ def get_prox_key(infos, key, default=None, reduce=None, array=True):
 
     return g
 
+def _column(infos, keys, default):
+    """ Telemetry column for `keys`, with missing values set to `default`.
+    """
+    try:
+        a = infos.get(*keys)
+    except KeyError:
+        return np.full(len(infos), np.nan if default is None else default)
+
+    if default is not None and a.dtype != object:
+        a = np.where(np.isnan(a), default, a)
+
+    return a
+
+def _reduce(a, reduce):
+    """ Apply `reduce` to each row of `a`, vectorized if it takes an `axis`.
+    """
+    if reduce is None:
+        return a
+    try:
+        return np.asarray(reduce(a, axis=1))
+    except TypeError:
+        return np.array([reduce(row) for row in a])
 
 def get_prox_status(infos):
     # todo: if all one thing, can just return that key
@@ -89,7 +129,114 @@ def get_prox_status(infos):
     return out
 
 
-def report_iters(infos, ax=None):
+def minmax_indices(y, n_out):
+    """ Indices of the min and max of `y` in each of `n_out/2` buckets.
+    Keeps the spikes that plain subsampling would drop.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    lo = np.where(np.isnan(y), np.inf, y)
+    hi = np.where(np.isnan(y), -np.inf, y)
+
+    edges = np.linspace(0, n, max(1, n_out//2) + 1).astype(int)
+    idx = []
+    for a, b in zip(edges[:-1], edges[1:]):
+        if b > a:
+            idx += [a + np.argmin(lo[a:b]), a + np.argmax(hi[a:b])]
+
+    return np.unique(idx)
+
+def lttb_indices(y, n_out):
+    """ Indices picked by Largest-Triangle-Three-Buckets downsampling of `y`.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    edges = np.linspace(1, n-1, n_out-1).astype(int)
+
+    idx = [0]
+    for i in range(n_out-2):
+        a, b = edges[i], edges[i+1]
+        if i + 2 < len(edges):
+            c = edges[i+2]
+        else:
+            c = n
+        # average of the next bucket
+        xn = (b + c - 1)/2.0
+        yn = y[b:c].mean()
+
+        p = idx[-1]
+        xs = np.arange(a, b)
+        area = np.abs((p - xn)*(y[a:b] - y[p]) - (p - xs)*(yn - y[p]))
+        idx += [a + int(np.argmax(area))]
+
+    idx += [n-1]
+    return np.array(idx)
+
+def decimate(a, max_points=2000, method='minmax'):
+    """ Decimate the rows of `a` (one series, or one per column) for plotting.
+
+    Returns the kept row indices (to use as x values) and the kept rows.
+    `method` is 'minmax' or 'lttb'; the kept rows are the union over columns.
+    """
+    a = np.asarray(a)
+    n = len(a)
+    if max_points is None or n <= max_points:
+        return np.arange(n), a
+
+    cols = a.reshape(n, -1).astype(float)
+    per = max(3, max_points//cols.shape[1])
+    pick = minmax_indices if method == 'minmax' else lttb_indices
+
+    idx = np.unique(np.concatenate([pick(col, per) for col in cols.T]))
+    return idx, a[idx]
+
+def prox_envelope(a, percentiles=(10, 50, 90)):
+    """ Summarize an {#iterations} by {#prox operators} array across proxes.
+
+    Returns an {#iterations} by {2 + #percentiles} array:
+    min, max, and then each percentile. NaNs are ignored.
+    """
+    a = np.asarray(a, dtype=float)
+    with warnings.catch_warnings():
+        # all-NaN rows just give NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        cols = [np.nanmin(a, axis=1), np.nanmax(a, axis=1)]
+        cols += list(np.nanpercentile(a, percentiles, axis=1))
+
+    return np.stack(cols, axis=1)
+
+def plot_envelope(ax, a, color='b', max_points=2000, percentiles=(10, 50, 90)):
+    """ Plot the min/max and percentile bands of `a` across proxes,
+    with a line for the middle percentile, instead of a line per prox.
+    """
+    env = prox_envelope(a, percentiles)
+    x, env = decimate(env, max_points)
+
+    ax.fill_between(x, env[:,0], env[:,1], color=color, alpha=.15, linewidth=0)
+    k = len(percentiles)
+    if k >= 2:
+        ax.fill_between(x, env[:,2], env[:,1+k], color=color, alpha=.3, linewidth=0)
+    ax.plot(x, env[:,2+k//2], color=color, linewidth=2)
+
+    return env
+
+def _plot_proxes(ax, a, envelope, max_points):
+    if envelope == 'auto':
+        envelope = a.ndim == 2 and a.shape[1] > 10
+
+    if envelope:
+        plot_envelope(ax, a, max_points=max_points)
+    else:
+        x, a = decimate(a, max_points)
+        ax.plot(x, a, c='b', alpha=.3, linewidth=2.0)
+
+def report_iters(infos, ax=None, envelope='auto', max_points=2000):
     a = get_prox_key(infos, 'iter', default=0)
 
     if ax is None:
@@ -99,14 +246,17 @@ def report_iters(infos, ax=None):
         ax.yaxis.tick_right()
         ax.yaxis.set_label_position("right")
 
-    ax.plot(a, c='b', alpha=.3, linewidth=2.0)
+    _plot_proxes(ax, a, envelope, max_points)
     ax.set_ylabel('# prox iters')
     ax.set_title('Prox Iterations')
     
     return a
     
 
-def report_rhos(infos, ax=None):
+def report_rhos(infos, ax=None, max_points=2000):
+    """ Plot rho, and the band of per-key rhos, if they were logged
+    ('rho_keys': their min, 10th, 50th and 90th percentiles and max).
+    """
     rhos = get_key(infos, 'rho')
     
     a = np.array(rhos)
@@ -115,15 +265,79 @@ def report_rhos(infos, ax=None):
         fig, ax = plt.subplots()
         ax.set_xlabel('iteration') 
 
-    ax.semilogy(a, '-',basey=2, linewidth=2)
+    x, d = decimate(a, max_points)
+    ax.semilogy(x, d, '-',basey=2, linewidth=2)
+
+    lo, hi = a.min(), a.max()
+    if len(infos) and infos[-1].get('rho_keys') is not None:
+        q = get_key(infos, 'rho_keys', default=[np.nan]*5).astype(float)
+        x, q = decimate(q, max_points)
+        ax.fill_between(x, q[:,0], q[:,4], color='g', alpha=.15, linewidth=0)
+        ax.fill_between(x, q[:,1], q[:,3], color='g', alpha=.3, linewidth=0)
+        ax.plot(x, q[:,2], color='g', linewidth=1)
+        lo, hi = min(lo, np.nanmin(q)), max(hi, np.nanmax(q))
     
     ax.set_ylabel(r'$\rho$')
     ax.set_title(r'Varying $\rho$')
-    ax.set_ylim([a.min()/2.0, a.max()*2.0])
+    ax.set_ylim([lo/2.0, hi*2.0])
     
     return a
 
-def report_convergence(infos, hook=True, ax=None):
+def report_makespan(infos, ax=None, max_points=2000):
+    """ Returns (and plots) the prox makespan for each iteration, next to
+    its ideal lower bound, as recorded by a `schedule.CostScheduler`.
+    """
+    makespan = get_key(infos, 'makespan', default=np.nan)
+    bound = get_key(infos, 'makespan_bound', default=np.nan)
+
+    a = np.stack([makespan, bound], axis=1).astype(float)
+
+    if ax is None:
+        fig, ax = plt.subplots()
+        ax.set_xlabel('iteration')
+
+    x, d = decimate(a, max_points)
+    ax.plot(x, d, '-', linewidth=2)
+    ax.legend(['makespan', 'lower bound'])
+    ax.set_ylabel('time (s)')
+    ax.set_title('Prox Makespan')
+
+    return a
+
+def iters_to_tol(infos, eps=1e-6):
+    """ Number of iterations until both residuals are at most `eps`,
+    or `None` if they never are.
+    """
+    r = get_key(infos, 'r')
+    s = get_key(infos, 's')
+    done = np.flatnonzero(np.maximum(r, s) <= eps)
+    return int(done[0]) + 1 if len(done) else None
+
+def report_acceleration(infos, baseline, eps=1e-6, ax=None, max_points=2000):
+    """ Returns (and plots) the iterations to reach residuals of `eps`,
+    for an accelerated (Anderson or over-relaxed) solve and a `baseline`
+    plain ADMM solve of the same problem, and the iterations saved.
+    """
+    n = iters_to_tol(infos, eps)
+    n0 = iters_to_tol(baseline, eps)
+    saved = None if n is None or n0 is None else n0 - n
+
+    if ax is None:
+        fig, ax = plt.subplots()
+        ax.set_xlabel('iteration')
+
+    for data, style in [(baseline, '--'), (infos, '-')]:
+        a = np.maximum(get_key(data, 'r'), get_key(data, 's'))
+        x, d = decimate(a, max_points)
+        ax.semilogy(x, d, style, linewidth=2)
+    ax.axhline(eps, color='k', linewidth=1)
+    ax.legend(['plain: {}'.format(n0), 'accelerated: {}'.format(n)])
+    ax.set_ylabel('max(r, s)')
+    ax.set_title('Iterations to {:g}: {} saved'.format(eps, saved))
+
+    return {'iters': n, 'baseline_iters': n0, 'saved': saved}
+
+def report_convergence(infos, hook=True, ax=None, max_points=2000):
     # todo: interpolate for hook if only computed periodically
     r = get_key(infos, 'r')
     s = get_key(infos, 's')
@@ -141,13 +355,14 @@ def report_convergence(infos, hook=True, ax=None):
         fig, ax = plt.subplots()
         ax.set_xlabel('iteration')
 
-    ax.semilogy(a, linewidth=2)
+    x, d = decimate(a, max_points)
+    ax.semilogy(x, d, linewidth=2)
     ax.legend(labels)
     ax.set_title('Residuals')
     
     return a
 
-def report_time(infos, inner=False, ax=None):
+def report_time(infos, inner=False, ax=None, max_points=2000):
     """ Returns timing data (and optionally plots) for each iteration
     - total ADMM step time
     - total time for all prox computations (as timed/seen by ADMM alg)
@@ -174,16 +389,20 @@ def report_time(infos, inner=False, ax=None):
         ax.yaxis.tick_right()
         ax.yaxis.set_label_position("right")
 
-    ax.plot(a, '-', linewidth=2)
+    x, d = decimate(a, max_points)
+    ax.plot(x, d, '-', linewidth=2)
     ax.legend(legend)
     ax.set_ylabel('time (s)')
     ax.set_title('ADMM Step Times')
     
     return a
 
-def report_prox_time(infos, outer=True, ax=None):
+def report_prox_time(infos, outer=True, ax=None, envelope='auto', max_points=2000):
     """ Gets the prox times as measured by ADMM (outer), or as measured
     by the prox operator itsemf (inner).
+
+    With many proxes (or `envelope=True`), plots the min/max and
+    percentile envelopes across proxes instead of a line per prox.
     """
     # always defaulting to zero for time makes sense here (in a way that iters might not)
     if outer:
@@ -201,13 +420,18 @@ def report_prox_time(infos, outer=True, ax=None):
             ax.yaxis.tick_right()
             ax.yaxis.set_label_position("right")
 
-    ax.plot(a, c='b', alpha=.3, linewidth=2.0)
+    _plot_proxes(ax, a, envelope, max_points)
     ax.set_title(title)
     ax.set_ylabel('time (s)')
 
     return a
 
-def report_solve(infos, figsize=(12,6), hook=False, verbose=False):
+def report_solve(infos, figsize=(12,6), hook=False, verbose=False,
+                 envelope='auto', max_points=2000):
+    """ Plot the solve summary. Each series is decimated to about
+    `max_points` points, and per-prox series are drawn as envelopes
+    across proxes when there are many of them (see `report_prox_time`).
+    """
     # todo: share the y axis on the bottom row if verbose==True
     with plt.style.context(['seaborn-darkgrid', {'font.size': 12}]):
         if verbose is False:
@@ -230,20 +454,22 @@ def report_solve(infos, figsize=(12,6), hook=False, verbose=False):
             #fig, ax = plt.subplots(3, 2, figsize=(12,9), sharex=True)
             inner = True
 
-        _ = report_convergence(infos, hook=hook, ax=ax[0][0])
-        _ = report_rhos(infos, ax=ax[1][0])
-        time = report_time(infos, inner=inner, ax=ax[0][1])
-        _ = report_iters(infos, ax=ax[1][1])
+        _ = report_convergence(infos, hook=hook, ax=ax[0][0], max_points=max_points)
+        _ = report_rhos(infos, ax=ax[1][0], max_points=max_points)
+        time = report_time(infos, inner=inner, ax=ax[0][1], max_points=max_points)
+        _ = report_iters(infos, ax=ax[1][1], envelope=envelope, max_points=max_points)
 
         if verbose:
-            _ = report_prox_time(infos, outer=True, ax=ax[2][0])
-            _ = report_prox_time(infos, outer=False, ax=ax[2][1])
+            _ = report_prox_time(infos, outer=True, ax=ax[2][0],
+                                 envelope=envelope, max_points=max_points)
+            _ = report_prox_time(infos, outer=False, ax=ax[2][1],
+                                 envelope=envelope, max_points=max_points)
 
         for a in ax[-1]:
             a.set_xlabel('iteration')
 
         fig.tight_layout()
 
-    step_time = time[:,0].sum()
+    step_time = np.nansum(time[:,0])
     print('Total ADMM solve time: {:.2f} seconds'.format(step_time))
 
@@ -49,7 +49,8 @@ def float_residuals(xs, xbar, xbarold, rho):
     Much faster than having to call np.linalg.norm, or check if the values
     are floats.
 
-    XXX: have to update the algorithm to use this by default if eligible
+    By default, ADMM now uses `admm.fused_update`, which takes this fast
+    path per key automatically.
     """
     r = 0.0
     s = 0.0
@@ -60,4 +61,36 @@ def float_residuals(xs, xbar, xbarold, rho):
             r += (v - xbark)**2
             s += (xbark - xbarold[k])**2
 
-    return np.sqrt(r), rho*np.sqrt(s)
\ No newline at end of file
+    return np.sqrt(r), rho*np.sqrt(s)
+
+def stopping_norms(xs, xbar, us, rho):
+    """ Norms for the relative stopping tolerances (see `tolerances`),
+    over every (prox, key) local copy:
+
+    - x: of the prox outputs
+    - z: of xbar, once per local copy
+    - y: of the unscaled duals, rho*u
+    - n: the number of values in the local copies
+
+    `admm.fused_update` accumulates the same norms as it goes.
+    """
+    x = z = y = 0.0
+    n = 0
+    for xi, ui in zip(xs, us):
+        for k,v in xi.items():
+            x += np.sum(np.square(v))
+            z += np.sum(np.square(xbar[k]))
+            y += np.sum(np.square(ui[k]))
+            n += np.size(v)
+
+    return dict(x=np.sqrt(x), z=np.sqrt(z), y=rho*np.sqrt(y), n=n)
+
+def tolerances(norms, eps_abs, eps_rel):
+    """ Primal and dual residual tolerances, from the `stopping_norms`:
+    the standard ADMM stopping criterion (Boyd et al., 2011, section 3.3.1),
+    for consensus form.
+    """
+    base = np.sqrt(norms['n'])*eps_abs
+    eps_pri = base + eps_rel*max(norms['x'], norms['z'])
+    eps_dual = base + eps_rel*norms['y']
+    return eps_pri, eps_dual
@@ -1,5 +1,7 @@
+import numpy as np
 
-def make_resid_gap(gap=10.0, rho_adj=2.0, tol=1e-3):
+
+def make_resid_gap(gap=10.0, rho_adj=2.0, tol=1e-3, per=None):
     """ scale rho by factor `rho_adj` according to residual gap size `gap`.
 
     Don't do any scaling if both residuals are below `tol`.
@@ -8,6 +10,10 @@ def make_resid_gap(gap=10.0, rho_adj=2.0, tol=1e-3):
     true when only doing approximate solves. When residuals
     are in range [0,tol], rho adjustment gives ADMM enough time to
     find approximately the right rho scaling.
+
+    With `per='key'` or `per='prox'` (and the 'array' engine), the rule
+    is applied separately to the residuals of each key or each prox,
+    and scales their own rho, instead of the global one.
     """
     mu = gap
     tau = rho_adj
@@ -15,6 +21,17 @@ def make_resid_gap(gap=10.0, rho_adj=2.0, tol=1e-3):
     if tol is None:
         tol = 0
 
+    if per is not None:
+        def resid_gap(r, s):
+            scale = np.ones(len(r))
+            scale[r > mu*s] = tau
+            scale[s > mu*r] = 1.0/tau
+            scale[np.maximum(r, s) <= tol] = 1.0
+            return scale
+
+        resid_gap.per = per
+        return resid_gap
+
     def resid_gap(r, s):
         scale = 1.0
 
@@ -45,4 +62,147 @@ def rescale_rho_duals(rho, us, scale):
             for k in u:
                 u[k] /= scale
 
-    return rho, us
\ No newline at end of file
+    return rho, us
+
+class SpectralRho:
+    """ Spectral (Barzilai-Borwein) adaptive rho, after adaptive (consensus)
+    ADMM (Xu, Figueiredo and Goldstein, 2017; Xu et al., 2017).
+
+    Every `every` iterations, estimates the local curvature of each prox
+    from how the gradient of its objective at its output (which the
+    prox optimality conditions give in terms of the duals) changed with
+    the output since the last estimate. The estimates are hybrid spectral
+    step sizes, and are only used if the changes are correlated above
+    `corr`. rho is set to the geometric mean of those step sizes, or kept
+    if there are none.
+
+    (Adaptive ADMM also estimates the curvature of the second block, but
+    here that is the xbar averaging step, with no objective of its own.)
+
+    As a safeguard, rho changes by at most a factor `1 + C/k**2` at
+    iteration `k`, so adaptation dies down and convergence is kept.
+    Below `tol` (on both residuals), rho is left alone, like
+    `make_resid_gap`.
+
+    Use as the ADMM `rho_adj`. Before each call, the ADMM step passes the
+    local copies of the iterates to `observe` (see `local_copies`); the
+    duals are then rescaled as usual (`rescale_rho_duals`).
+
+    With `per='prox'` (and the 'array' engine), each prox gets the rho of
+    its own step size estimate instead (where it has one), rather than
+    all sharing their geometric mean.
+    """
+    def __init__(self, every=2, corr=0.2, C=1e3, tol=None, per=None):
+        if per not in (None, 'prox'):
+            raise ValueError('Unrecognized SpectralRho per: {}'.format(per))
+        self.every = every
+        self.corr = corr
+        self.C = C
+        self.tol = 0 if tol is None else tol
+        self.per = per
+
+        self.k = 0
+        self.scale = 1.0
+        self._prev = None
+
+    def observe(self, x, zold, z, u, rho, prox=None):
+        """ Record one iteration, given the prox outputs `x`, the old and
+        new xbar `zold` and `z`, and the updated (scaled) duals `u`, each
+        as a vector over the local copies of the keys, and the index of
+        the prox owning each copy (`None`: all the same prox).
+        `rho` is a number, or the rho of each copy.
+        """
+        self.k += 1
+        self.scale = 1.0
+
+        # gradient of the prox objectives at x:
+        # 0 = grad f(x) + rho*(x - zold + uold), and u = uold + x - z
+        grad = -rho*(u + z - zold)
+
+        prev = self._prev
+        if prev is None or len(prev[0]) != len(x):
+            self._prev = (x, grad)
+            return
+        if self.k % self.every:
+            return
+        self._prev = (x, grad)
+
+        if prox is None:
+            prox = np.zeros(len(x), dtype=np.intp)
+
+        tau = _spectral(x - prev[0], grad - prev[1], prox, self.corr)
+        bound = 1 + self.C/self.k**2
+
+        if self.per == 'prox':
+            # current rho of each prox: the mean over its copies
+            n = len(tau)
+            count = np.bincount(prox, minlength=n)
+            rho = np.bincount(prox, weights=rho*np.ones(len(x)),
+                              minlength=n)/np.maximum(count, 1)
+            scale = np.clip(tau/rho, 1/bound, bound)
+            self.scale = np.where(np.isnan(scale), 1.0, scale)
+            return
+
+        if not np.isscalar(rho):
+            rho = np.exp(np.mean(np.log(rho))) if len(rho) else 1.0
+
+        tau = tau[~np.isnan(tau)]
+        if len(tau) == 0:
+            return
+        tau = np.exp(np.mean(np.log(tau)))
+
+        tau = min(max(tau, rho/bound), rho*bound)
+        self.scale = tau/rho
+
+    def __call__(self, r, s):
+        if self.per is not None:
+            # proxes past the last with local copies have no estimate
+            scale = np.ones(len(r))
+            est = np.ravel(self.scale)[:len(r)]
+            scale[:len(est)] = est
+            scale[np.maximum(r, s) <= self.tol] = 1.0
+            return scale
+
+        if max(r, s) <= self.tol:
+            return 1.0
+        return self.scale
+
+
+def _spectral(dH, dlam, prox, corr):
+    """ Hybrid spectral step sizes, per prox, from the changes in the
+    iterate `dH` and in the gradient `dlam` over the copies owned by each
+    prox. NaN for proxes where they are too poorly correlated.
+    """
+    hl = np.bincount(prox, weights=dH*dlam)
+    hh = np.bincount(prox, weights=dH*dH)
+    ll = np.bincount(prox, weights=dlam*dlam)
+
+    ok = (hl > 0) & (hl > corr*np.sqrt(hh*ll))
+    hl, hh, ll = hl[ok], hh[ok], ll[ok]
+
+    sd = ll/hl
+    mg = hl/hh
+
+    out = np.full(len(ok), np.nan)
+    out[ok] = np.where(2*mg > sd, mg, sd - mg/2)
+    return out
+
+def local_copies(xs, us, xbar, xbarold):
+    """ Stack the prox outputs `xs`, the duals `us` and the old and new
+    xbar over every (prox, key) local copy, for `SpectralRho.observe`.
+
+    Returns x, zold, z, u, and the index of the prox owning each copy.
+    """
+    x, zold, z, u, prox = [], [], [], [], []
+    for i, (xi, ui) in enumerate(zip(xs, us)):
+        for k, v in xi.items():
+            x += [np.ravel(v)]
+            zold += [np.ravel(xbarold.get(k, 0.0))*np.ones_like(x[-1])]
+            z += [np.ravel(xbar[k])]
+            u += [np.ravel(ui[k])]
+            prox += [np.full(len(x[-1]), i)]
+
+    if not x:
+        return tuple(np.zeros(0) for _ in range(4)) + (np.zeros(0, dtype=np.intp),)
+    return (tuple(np.concatenate(a).astype(float) for a in (x, zold, z, u))
+            + (np.concatenate(prox).astype(np.intp),))
@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .timer import SimpleTimer
+
+"""
+Cost-aware scheduling of the proxes.
+
+`map` submits proxes in list order, so a long prox that happens to be last
+sets the makespan of the step. A `CostScheduler` keeps a moving estimate of
+the cost of each prox (from the prox times measured by `functional.do`) and
+dispatches the proxes longest-expected-first. Optionally, the heaviest proxes
+are pinned to dedicated threads of their own.
+"""
+
+class CostScheduler:
+    """ ADMM backend dispatching proxes longest-expected-first.
+
+    Parameters
+    ----------
+    threads : int
+        Number of threads shared by the unpinned proxes.
+    alpha : float
+        Weight of the newest time in the moving cost estimates.
+    pinned : int
+        Number of predicted-heaviest proxes run on dedicated threads.
+    """
+    def __init__(self, threads, alpha=0.5, pinned=0):
+        self.threads = threads
+        self.alpha = alpha
+        self.pinned = pinned
+
+        self._pool = ThreadPoolExecutor(threads)
+        self._dedicated = [ThreadPoolExecutor(1) for _ in range(pinned)]
+
+        self.costs = None
+        self._makespan = None
+        self._bound = None
+
+    @property
+    def workers(self):
+        return self.threads + self.pinned
+
+    def order(self, n):
+        """ Prox indices, longest-expected-first.
+        Proxes with no estimate yet go first.
+        """
+        if self.costs is None or len(self.costs) != n:
+            self.costs = np.full(n, np.nan)
+
+        costs = np.where(np.isnan(self.costs), np.inf, self.costs)
+        return np.argsort(-costs, kind='stable')
+
+    def map(self, fn, funcs, *iterables):
+        """ Submit `fn(func, *args)` for each func, heaviest first.
+        Results come back in the original order.
+
+        `fn` should return `(result, time)`, like `functional.do`.
+        Untimed calls (time `None`) leave the cost estimates as they are.
+        """
+        calls = list(zip(funcs, *iterables))
+        n = len(calls)
+        order = self.order(n)
+
+        with SimpleTimer() as t:
+            futs = [None]*n
+            for rank, i in enumerate(order):
+                if rank < self.pinned:
+                    ex = self._dedicated[rank]
+                else:
+                    ex = self._pool
+                futs[i] = ex.submit(fn, *calls[i])
+
+            out = [fut.result() for fut in futs]
+
+        self._makespan = t.time
+
+        if any(o[1] is None for o in out):
+            self._bound = None
+            return out
+
+        times = np.array([o[1] for o in out], dtype=float)
+        self.update(times)
+        self._bound = max(times.max(initial=0.0), times.sum()/self.workers)
+
+        return out
+
+    def update(self, times):
+        """ Fold measured prox `times` into the moving cost estimates.
+        """
+        a = self.alpha
+        new = np.isnan(self.costs)
+        self.costs[new] = times[new]
+        self.costs[~new] = a*times[~new] + (1-a)*self.costs[~new]
+
+    def step_info(self):
+        """ Wall time of the most recent prox map, and the ideal lower bound
+        on it: the longest prox, or the total prox time spread evenly
+        over the workers, whichever is larger.
+        """
+        return {'makespan': self._makespan, 'makespan_bound': self._bound}
+
+    def add_prox(self, prox):
+        """ A prox was added at the end (see `ADMM.add_prox`); its cost is
+        unknown, so it is scheduled first until measured.
+        """
+        if self.costs is not None:
+            self.costs = np.append(self.costs, np.nan)
+
+    def remove_prox(self, i, prox):
+        """ Prox `i` was removed (see `ADMM.remove_prox`); forget its cost. """
+        if self.costs is not None:
+            self.costs = np.delete(self.costs, i)
+
+    def close(self):
+        self._pool.shutdown()
+        for ex in self._dedicated:
+            ex.shutdown()
@@ -1,6 +1,11 @@
 from collections import defaultdict
+from numbers import Number
+
+import numpy as np
+
 from .timer import SimpleTimer
 from .functional import time_info
+from .projections import BlockPlan
 
 def sharing_prox(x, B):
     """ Projects shared values in x so that they sum to value in B.
@@ -48,12 +53,106 @@ def sharing_prox(x, B):
     return xout
 
 
-def form_sharing_prox(B):
-    
+class SharingPlan(BlockPlan):
+    """ `sharing_prox` compiled for a fixed set of input keys.
+
+    Holds the good index of each (agent, good) key, the number of keys for
+    each good, and B as a vector, so the projection is a gather, a
+    `bincount` and a scatter. Only for scalar values; `vector` is False
+    if any value in B isn't a scalar.
+
+    With `subset`, keys for goods that aren't in B are ignored,
+    for a shard of the goods (see `form_sharded_sharing_prox`).
+    """
+    def __init__(self, x, B, subset=False):
+        self.B = B
+        self.subset = subset
+        super().__init__(x)
+
+        goods = {}
+        for a, g in self.keys:
+            goods.setdefault(g, len(goods))
+
+        self.goods = list(goods)
+        self.index = np.array([goods[g] for a, g in self.keys], dtype=np.intp)
+        self.counts = np.bincount(self.index, minlength=len(goods))
+
+        Bs = [B[g] for g in self.goods]
+        self.vector = all(isinstance(b, Number) for b in Bs)
+        self.B = np.array(Bs, dtype=float) if self.vector else None
+
+    def selected(self, k):
+        return isinstance(k, tuple) and (not self.subset or k[1] in self.B)
+
+    def __call__(self, x, rho=None):
+        """ `sharing_prox(x, B)`, for `x` with this plan's keys.
+
+        If `rho` is a dict of the rho of each key (see `ADMM(key_rho=...)`),
+        the projection is in the norm weighted by `rho`: each key takes
+        a share of the shift inversely proportional to its rho.
+        """
+        v = self.gather(x)
+
+        total = np.bincount(self.index, weights=v, minlength=len(self.goods))
+        if not isinstance(rho, dict):
+            shift = (self.B - total)/self.counts
+            return self.scatter(v + shift[self.index])
+
+        w = 1.0/np.fromiter((rho[k] for k in self.keys), float, len(self.keys))
+        wsum = np.bincount(self.index, weights=w, minlength=len(self.goods))
+        shift = (self.B - total)/wsum
+
+        return self.scatter(v + w*shift[self.index])
+
+
+def form_sharing_prox(B, subset=False):
+    """ Sharing prox for the goods in `B` (see `sharing_prox`).
+
+    The first call with a given set of keys compiles a `SharingPlan`,
+    used until the keys (or their order) change. Array values (in x or in B) go through
+    `sharing_prox` instead.
+
+    With `subset`, keys for goods that aren't in B are ignored.
+    A dict `rho` (per-key rho) weights the projection (see `SharingPlan`).
+    """
+    plan = None
+
     @time_info
     def foo(x0=None, rho=1):
+        nonlocal plan
         if x0 is None:
             x0 = {}
+
+        if plan is None or not plan.matches(x0):
+            plan = SharingPlan(x0, B, subset)
+
+        if plan.vector:
+            try:
+                return plan(x0, rho)
+            except (TypeError, ValueError):
+                pass
+
+        if subset:
+            x0 = {k: x0[k] for k in plan.keys}
         return sharing_prox(x0, B)
 
     return foo
+
+
+def form_sharded_sharing_prox(B, shards):
+    """ The sharing prox for `B`, split into `shards` proxes over
+    disjoint blocks of the goods.
+
+    The projection is independent per good, and each (agent, good) key
+    belongs to exactly one shard, so using the shards in place of
+    `form_sharing_prox(B)` gives the same ADMM iterates, but the shards
+    are separate proxes that the ADMM backend can run in parallel.
+
+    >>> proxes = agent_proxes + form_sharded_sharing_prox(B, 4)  # doctest: +SKIP
+    """
+    goods = list(B)
+    shards = max(1, min(shards, len(goods)))
+    bounds = [len(goods)*i//shards for i in range(shards+1)]
+
+    return [form_sharing_prox({g: B[g] for g in goods[lo:hi]}, subset=True)
+            for lo, hi in zip(bounds[:-1], bounds[1:])]
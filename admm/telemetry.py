@@ -0,0 +1,364 @@
+from numbers import Number
+
+import numpy as np
+
+"""
+Columnar storage for the per-iteration ADMM info.
+
+A list of nested `step_info` dicts costs a handful of Python objects per prox
+per iteration. `Telemetry` instead flattens each `step_info` into columns of
+preallocated, growable numpy arrays:
+
+- numbers (r, s, rho, hook, each phase timing) go in 1-D float columns
+- lists of numbers (the per-prox times, staleness) go in 2-D float columns,
+  one row per iteration, one column per prox
+- lists of per-prox info dicts go in a 2-D float column per info key,
+  along with a 2-D mask of which proxes had an info dict at all
+- anything else goes in a 1-D object column
+
+Missing values are NaN. Columns are addressed by their path in `step_info`,
+like `('times', 'proxes')` or `('prox_infos', 'iter')`.
+
+Indexing a `Telemetry` gives back a `step_info`-like dict for that iteration,
+and iterating over it gives one for each retained iteration, so it can stand
+in for the `infos` list.
+
+With `keep`, only the most recent `keep` iterations are retained in full; of
+the older ones, only every `decimate`-th is retained (none, by default).
+"""
+
+def _is_number(v):
+    return isinstance(v, Number) and not isinstance(v, bool)
+
+def _is_vector(v):
+    return isinstance(v, (list, tuple)) and all(_is_number(e) for e in v)
+
+def _is_records(v):
+    return (isinstance(v, (list, tuple)) and len(v) > 0
+            and all(e is None or isinstance(e, dict) for e in v))
+
+
+def _length(v):
+    """ Length of a NaN-padded row. """
+    idx = np.flatnonzero(~np.isnan(v))
+    return idx[-1] + 1 if len(idx) else 0
+
+
+def _as_objects(a):
+    """ Float column `a` as a 1-D object column: 2-D rows become arrays
+    (without their NaN padding), and empty rows None.
+    """
+    if a.ndim == 1:
+        return a.astype(object)
+
+    out = np.empty(len(a), dtype=object)
+    for i, row in enumerate(a):
+        n = _length(row)
+        if n:
+            out[i] = row[:n].copy()
+    return out
+
+
+class Columns:
+    """ Growable columns of equal length. 1-D columns hold a value per row,
+    2-D columns a vector per row, padded with NaN to the widest seen.
+    """
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.data = {}
+        self.n = 0
+
+    def _grow(self, rows):
+        cap = self.capacity
+        while cap < rows:
+            cap *= 2
+        self.capacity = cap
+        for name, a in self.data.items():
+            width = a.shape[1] if a.ndim == 2 else None
+            self.data[name] = self._resize(a, cap, width)
+
+    @staticmethod
+    def _empty(shape, dtype):
+        if dtype is object:
+            return np.empty(shape, dtype=object)
+        return np.full(shape, np.nan)
+
+    @classmethod
+    def _resize(cls, a, rows, width=None):
+        shape = (rows,) if a.ndim == 1 else (rows, width)
+        out = cls._empty(shape, object if a.dtype == object else float)
+        r = min(rows, a.shape[0])
+        if a.ndim == 1:
+            out[:r] = a[:r]
+        else:
+            w = min(width, a.shape[1])
+            out[:r, :w] = a[:r, :w]
+        return out
+
+    def column(self, name, dtype=float, width=None):
+        """ Get column `name`, creating it (or widening it) if needed.
+        """
+        a = self.data.get(name)
+        if a is None:
+            shape = (self.capacity,) if width is None else (self.capacity, width)
+            a = self.data[name] = self._empty(shape, dtype)
+        elif width is not None and width > a.shape[1]:
+            a = self.data[name] = self._resize(a, self.capacity, width)
+        return a
+
+    def next_row(self):
+        """ Index of a new row at the end. """
+        if self.n >= self.capacity:
+            self._grow(self.n + 1)
+        self.n += 1
+        return self.n - 1
+
+    def clear_row(self, i):
+        for a in self.data.values():
+            a[i] = None if a.dtype == object else np.nan
+
+
+class Telemetry:
+    """ Columnar, optionally bounded, store of ADMM step infos.
+
+    Parameters
+    ----------
+    keep : int
+        Number of most recent iterations to retain in full.
+        `None` retains everything.
+    decimate : int
+        Of the iterations older than the most recent `keep`,
+        retain every `decimate`-th. `None` retains none of them.
+    capacity : int
+        Initial number of rows to preallocate.
+    """
+    def __init__(self, keep=None, decimate=None, capacity=64):
+        self.keep = keep
+        self.decimate = decimate
+
+        self.kinds = {}
+        self.history = Columns(capacity)
+        self.history_iters = []
+
+        if keep is None:
+            self.recent = self.history
+        else:
+            self.recent = Columns(keep)
+        self.recent_iters = []
+        self._start = 0
+
+        self.count = 0
+
+    def __len__(self):
+        if self.recent is self.history:
+            return self.history.n
+        return self.history.n + len(self.recent_iters)
+
+    @property
+    def iters(self):
+        """ Iteration number of each retained row. """
+        if self.recent is self.history:
+            return np.arange(self.history.n)
+        return np.array(self.history_iters + self._ring_order(self.recent_iters), dtype=int)
+
+    def _ring_order(self, rows):
+        return rows[self._start:] + rows[:self._start]
+
+    def _ring_index(self):
+        return self._ring_order(list(range(len(self.recent_iters))))
+
+    def append(self, step_info):
+        """ Add the `step_info` dict for the next iteration.
+        """
+        it = self.count
+        self.count += 1
+
+        if self.recent is self.history:
+            row = self.history.next_row()
+            self._write(self.history, row, step_info)
+            return
+
+        if len(self.recent_iters) < self.keep:
+            row = self.recent.next_row()
+            self.recent_iters += [it]
+        else:
+            # overwrite the oldest row of the ring, maybe moving it to history
+            row = self._start
+            old = self.recent_iters[row]
+            if self.decimate and old % self.decimate == 0:
+                hrow = self.history.next_row()
+                self._copy_row(self.recent, row, self.history, hrow)
+                self.history_iters += [old]
+            self.recent.clear_row(row)
+            self.recent_iters[row] = it
+            self._start = (self._start + 1) % self.keep
+
+        self._write(self.recent, row, step_info)
+
+    def __iadd__(self, step_infos):
+        for step_info in step_infos:
+            self.append(step_info)
+        return self
+
+    def _copy_row(self, src, i, dst, j):
+        for name, a in src.data.items():
+            kind = self.kinds[name]
+            if a.ndim == 2:
+                dst.column(name, kind[1], a.shape[1])[j, :a.shape[1]] = a[i]
+            else:
+                dst.column(name, kind[1])[j] = a[i]
+
+    def _write(self, cols, row, step_info, prefix=()):
+        for k, v in step_info.items():
+            path = prefix + (k,)
+            if isinstance(v, dict):
+                self._write(cols, row, v, path)
+            elif v is None:
+                continue
+            elif _is_number(v):
+                self._set(cols, path, ('scalar', float), row, v)
+            elif _is_vector(v):
+                self._set(cols, path, ('vector', float), row, v)
+            elif _is_records(v):
+                self._set(cols, path, ('mask', float), row,
+                          [float(e is not None) for e in v])
+                fields = {f for e in v if e for f in e}
+                for f in fields:
+                    vals = [np.nan if not e or not _is_number(e.get(f)) else e[f]
+                            for e in v]
+                    self._set(cols, path + (f,), ('field', float), row, vals)
+            else:
+                self._set(cols, path, ('object', object), row, v)
+
+    def _set(self, cols, path, kind, row, v):
+        old = self.kinds.setdefault(path, kind)
+        if old != kind:
+            # mixed types under one path; fall back to objects
+            kind = self.kinds[path] = ('object', object)
+            for c in {id(self.history): self.history, id(self.recent): self.recent}.values():
+                if path in c.data and c.data[path].dtype != object:
+                    c.data[path] = _as_objects(c.data[path])
+
+        if kind[0] in ('vector', 'mask', 'field'):
+            a = cols.column(path, kind[1], len(v))
+            a[row, :len(v)] = v
+        else:
+            cols.column(path, kind[1])[row] = v
+
+    def get(self, *path):
+        """ Column for `path`, over the retained iterations, in order.
+        NaN where the value was missing.
+
+        Without a ring buffer, this is a view on the stored column
+        (a memory map, for a loaded `infolog.InfoLog`); don't modify it.
+        """
+        kind = self.kinds.get(path)
+        if kind is None:
+            raise KeyError(path)
+
+        if self.recent is self.history:
+            a = self.history.data.get(path)
+            if a is not None:
+                return a[:self.history.n]
+
+        parts = []
+        for cols, rows in self._parts():
+            a = cols.data.get(path)
+            if a is None:
+                continue
+            parts += [(a, rows)]
+
+        width = max((a.shape[1] for a, _ in parts if a.ndim == 2), default=None)
+        n = len(self)
+        shape = n if width is None else (n, width)
+        out = Columns._empty(shape, kind[1])
+
+        start = 0
+        for cols, rows in self._parts():
+            a = cols.data.get(path)
+            m = len(rows)
+            if a is not None:
+                if a.ndim == 2:
+                    out[start:start+m, :a.shape[1]] = a[rows]
+                else:
+                    out[start:start+m] = a[rows]
+            start += m
+
+        return out
+
+    def _parts(self):
+        """ (columns, row indices) pairs, in iteration order. """
+        if self.recent is self.history:
+            return [(self.history, np.arange(self.history.n))]
+        return [(self.history, np.arange(self.history.n)),
+                (self.recent, np.array(self._ring_index(), dtype=int))]
+
+    def _locate(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('Telemetry index out of range')
+
+        if i < self.history.n or self.recent is self.history:
+            return self.history, i
+        return self.recent, self._ring_index()[i - self.history.n]
+
+    def __getitem__(self, i):
+        """ The `step_info`-like dict for the `i`-th retained iteration.
+        """
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        cols, row = self._locate(i)
+        out = {}
+        for path, kind in self.kinds.items():
+            if kind[0] == 'field':
+                continue
+            a = cols.data.get(path)
+            if a is None:
+                continue
+            v = self._value(cols, path, kind, a, row)
+            if v is None:
+                continue
+
+            d = out
+            for p in path[:-1]:
+                d = d.setdefault(p, {})
+            d[path[-1]] = v
+
+        return out
+
+    def _value(self, cols, path, kind, a, row):
+        if kind[0] == 'scalar':
+            v = a[row]
+            return None if np.isnan(v) else float(v)
+        if kind[0] == 'object':
+            return a[row]
+        v = a[row]
+        v = v[:_length(v)]
+        if kind[0] == 'vector':
+            return v.tolist()
+        if kind[0] == 'mask':
+            fields = [p for p in self.kinds
+                      if len(p) == len(path) + 1 and p[:-1] == path]
+            out = []
+            for j, present in enumerate(v):
+                if not present:
+                    out += [None]
+                    continue
+                rec = {}
+                for f in fields:
+                    fa = cols.data.get(f)
+                    if fa is not None and j < fa.shape[1] and not np.isnan(fa[row, j]):
+                        rec[f[-1]] = float(fa[row, j])
+                out += [rec]
+            return out
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self):
+        """ The retained iterations as a list of `step_info`-like dicts. """
+        return list(self)
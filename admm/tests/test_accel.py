@@ -0,0 +1,87 @@
+from admm import ADMM, form_sharing_prox
+from admm.accel import Anderson, DictLayout
+from admm.report import iters_to_tol, report_acceleration
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+
+def make_box_quad_prox(a, w, bound=.3):
+    """ prox of sum_k w_k/2 (x_k - a_k)^2, subject to |x_k| <= bound.
+    `rho` may be a dict of per-key rhos. """
+    def prox(x0, rho):
+        r = rho if isinstance(rho, dict) else dict.fromkeys(a, rho)
+        return {k: float(np.clip((w[k]*v + r[k]*x0.get(k, 0.0))/(w[k] + r[k]),
+                                 -bound, bound))
+                for k, v in a.items()}
+
+    return prox
+
+def box_market(m=20, n=8, seed=0):
+    np.random.seed(seed)
+    proxes = []
+    for i in range(m):
+        a = {(i, g): np.random.randn() for g in range(n) if np.random.rand() < .5}
+        w = {k: np.exp(2*np.random.randn()) for k in a}
+        proxes += [make_box_quad_prox(a, w)]
+
+    proxes += [form_sharing_prox({g: np.random.randn() for g in range(n)})]
+    return proxes
+
+def test_anderson_saves_iterations():
+    eps = 1e-6
+    plain = ADMM(box_market(), rho=1.0)
+    plain.step(1500)
+
+    relaxed = ADMM(box_market(), rho=1.0, alpha=1.6)
+    relaxed.step(1500)
+
+    accel = ADMM(box_market(), rho=1.0, anderson=10, engine='array')
+    accel.step(1500)
+
+    # relaxation doesn't always help, but should converge
+    n0 = iters_to_tol(plain.infos, eps)
+    assert n0 is not None
+    assert iters_to_tol(relaxed.infos, eps) is not None
+    assert iters_to_tol(accel.infos, eps) < n0
+
+    # same solution
+    for k in plain.xbar:
+        assert np.isclose(plain.xbar[k], relaxed.xbar[k], atol=1e-4)
+        assert np.isclose(plain.xbar[k], accel.xbar[k], atol=1e-4)
+
+    out = report_acceleration(accel.infos, plain.infos, eps)
+    assert out['saved'] == n0 - out['iters'] > 0
+
+def test_relaxation_engines_agree():
+    a = ADMM(box_market(), rho=1.0, alpha=1.5)
+    b = ADMM(box_market(), rho=1.0, alpha=1.5, engine='array')
+    a.step(20)
+    b.step(20)
+
+    for ia, ib in zip(a.infos, b.infos):
+        assert np.isclose(ia['r'], ib['r'])
+        assert np.isclose(ia['s'], ib['s'])
+
+def test_anderson_restart():
+    acc = Anderson(memory=3)
+    z = acc.update(np.ones(2), resid=1.0)
+    z = acc.update(z/2, resid=.5)
+    z = acc.update(z/2, resid=.25)
+    assert acc.depth == 1
+    acc.update(z/2, resid=2.0)
+    assert acc.depth == 0
+    assert acc.restarts == 1
+
+def test_dict_layout_roundtrip():
+    ds = [{'a': 1.0, 'b': np.arange(3.0)}, {}, {('x', 1): 2.0}]
+    layout = DictLayout(ds)
+    z = layout.flatten(ds)
+    assert len(z) == 5
+
+    out = layout.unflatten(z)
+    assert out[0]['a'] == 1.0
+    assert np.all(out[0]['b'] == np.arange(3.0))
+    assert out[2] == {('x', 1): 2.0}
+    assert layout.matches(out)
@@ -0,0 +1,82 @@
+import asyncio
+
+from admm import ADMM
+from admm.partial import PartialBarrier
+
+from .test_backend import CountingProx
+from .test_engine import make_quad_prox, quad_market
+
+import numpy as np
+
+
+def make_async_prox(a, delay=0.01):
+    prox = make_quad_prox(a)
+
+    async def aprox(x0, rho):
+        await asyncio.sleep(delay)
+        return prox(x0, rho)
+
+    return aprox
+
+class AsyncMethodProx:
+    def __init__(self, a):
+        self.prox = make_quad_prox(a)
+
+    def __call__(self, x0, rho):
+        raise RuntimeError('should be awaited through aprox')
+
+    async def aprox(self, x0, rho):
+        await asyncio.sleep(0)
+        return self.prox(x0, rho)
+
+
+def test_astep_matches_step():
+    for engine in ['dict', 'array']:
+        a = ADMM(quad_market(), rho=1.0, engine=engine)
+        a.step(10)
+
+        b = ADMM(quad_market(), rho=1.0, engine=engine)
+        asyncio.run(b.astep(10))
+
+        assert np.isclose(a.infos[-1]['r'], b.infos[-1]['r'])
+        for k in a.xbar:
+            assert np.isclose(a.xbar[k], b.xbar[k])
+
+def test_astep_mixed_proxes():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(50)]
+
+    proxes = [make_async_prox(t) for t in targets[:48]]
+    proxes += [AsyncMethodProx(targets[48]), make_quad_prox(targets[49])]
+
+    admm = ADMM(proxes, rho=1.0)
+    asyncio.run(admm.astep(3, limit=100))
+
+    # 48 sleeping proxes overlap, so a step is much less than 48 sleeps
+    assert admm.infos[-1]['times']['total_proxes'] < .2
+
+    serial = ADMM([make_quad_prox(t) for t in targets], rho=1.0)
+    serial.step(3)
+    assert np.isclose(admm.xbar['x'], serial.xbar['x'])
+
+def test_astep_uses_backend():
+    # sync proxes go through the backend, so the workers' copies are run
+    proxes = [CountingProx({'x': 1.0}), CountingProx({'x': 3.0}),
+              make_async_prox({'x': 2.0}, delay=0)]
+    with ADMM(proxes, rho=1.0, threads=2, backend='process') as admm:
+        asyncio.run(admm.astep(4))
+
+    assert [p.calls for p in proxes[:2]] == [0, 0]
+    assert [p.info['iter'] for p in proxes[:2]] == [4, 4]
+
+    serial = ADMM([CountingProx({'x': 1.0}), CountingProx({'x': 3.0}),
+                   make_quad_prox({'x': 2.0})], rho=1.0)
+    serial.step(4)
+    assert np.isclose(admm.xbar['x'], serial.xbar['x'])
+
+    # and the backend's step info is recorded
+    targets = [{'x': 1.0*i} for i in range(3)]
+    barrier = PartialBarrier(threads=2)
+    with ADMM([make_quad_prox(t) for t in targets], rho=1.0, backend=barrier) as admm:
+        asyncio.run(admm.astep(2))
+    assert admm.infos[-1]['staleness'] == [0]*3
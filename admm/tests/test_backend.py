@@ -0,0 +1,141 @@
+from admm import ADMM
+
+from .test_engine import quad_market
+
+import numpy as np
+
+
+class CountingProx:
+    """ Picklable, stateful prox that reports how often it was called.
+    """
+    def __init__(self, a):
+        self.a = a
+        self.calls = 0
+        self.info = {}
+
+    def __call__(self, x0, rho):
+        self.calls += 1
+        self.info = {'iter': self.calls}
+        return {k: (v + rho*x0.get(k, 0.0))/(1.0 + rho) for k, v in self.a.items()}
+
+
+def test_process_matches_serial():
+    a = ADMM(quad_market(), rho=1.0)
+    a.step(20)
+
+    with ADMM(quad_market(), rho=1.0, threads=3, backend='process') as b:
+        b.step(20)
+
+    assert np.isclose(a.infos[-1]['r'], b.infos[-1]['r'])
+    assert np.isclose(a.infos[-1]['s'], b.infos[-1]['s'])
+    for k in a.xbar:
+        assert np.isclose(a.xbar[k], b.xbar[k])
+
+    # sharing prox info comes back from the worker
+    assert b.infos[-1]['prox_infos'][-1]['time'] is not None
+
+def test_process_keeps_prox_state():
+    proxes = [CountingProx({'x': 1.0}), CountingProx({'x': 3.0})]
+    admm = ADMM(proxes, rho=1.0, threads=2, backend='process', engine='array')
+    admm.step(5)
+    admm.close()
+
+    assert [p['iter'] for p in admm.infos[-1]['prox_infos']] == [5, 5]
+
+    # the parent's copies were never run
+    assert [p.calls for p in proxes] == [0, 0]
+
+    serial = ADMM(proxes, rho=1.0, engine='array')
+    serial.step(5)
+    assert np.isclose(admm.xbar['x'], serial.xbar['x'])
+
+def test_shared_memory_arrays():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn(1000), 'y': 1.0*i} for i in range(4)]
+    proxes = [CountingProx(t) for t in targets]
+
+    a = ADMM(proxes, rho=1.0)
+    a.step(10)
+
+    with ADMM(proxes, rho=1.0, threads=2, backend='shared') as b:
+        b.step(10)
+
+    assert np.allclose(a.xbar['x'], b.xbar['x'])
+    assert np.isclose(a.xbar['y'], b.xbar['y'])
+    assert np.isclose(a.infos[-1]['r'], b.infos[-1]['r'])
+
+class KeepingProx(CountingProx):
+    """ Keeps its last input, and reports whether it changed since. """
+    def __call__(self, x0, rho):
+        intact = True
+        if 'x' in x0:
+            if hasattr(self, 'kept'):
+                intact = np.array_equal(self.kept, self.saved)
+            self.kept = x0['x']
+            self.saved = np.array(x0['x'])
+        out = super().__call__(x0, rho)
+        self.info = {'iter': self.calls, 'intact': intact}
+        return out
+
+def test_shared_memory_inputs_are_copies():
+    np.random.seed(0)
+    proxes = [KeepingProx({'x': np.random.randn(100)}) for _ in range(2)]
+
+    with ADMM(proxes, rho=1.0, threads=2, backend='shared') as admm:
+        admm.step(4)
+
+    # prox.info is copied back to the parent's proxes
+    assert all(p.info['intact'] for p in proxes)
+
+def test_replace_keeps_other_workers(monkeypatch):
+    import pickle
+    from admm import backend
+
+    for unpicklable in [False, True]:
+        proxes = [CountingProx({'x': 1.0*i}) for i in range(4)]
+        with ADMM(proxes, rho=1.0, threads=2, backend='process') as admm:
+            admm.step(5)
+            if unpicklable:
+                # the new prox gets a forked worker of its own instead
+                def fail(obj):
+                    raise pickle.PicklingError()
+                monkeypatch.setattr(backend, '_dumps', fail)
+            admm.update_proxes({2: CountingProx({'x': 5.0})})
+            monkeypatch.undo()
+            admm.step()
+            assert admm._pool.processes == 2 + unpicklable
+
+        # the untouched proxes kept their state in their workers; the new
+        # one was called once to find its keys, then stepped once
+        iters = [p['iter'] for p in admm.infos[-1]['prox_infos']]
+        assert iters == [6, 6, 2, 6]
+
+def test_add_remove_keeps_other_workers():
+    proxes = [CountingProx({'x': 1.0*i}) for i in range(4)]
+    with ADMM(proxes, rho=1.0, threads=2, backend='process') as admm:
+        admm.step(5)
+        admm.remove_prox(1)
+        assert admm.add_prox(CountingProx({'x': 5.0})) == 3
+        admm.step()
+        assert admm._pool.processes == 2
+
+    # untouched proxes kept their state; the new one was called once to
+    # find its keys, then stepped once
+    assert [p['iter'] for p in admm.infos[-1]['prox_infos']] == [6, 6, 6, 2]
+
+def test_shared_memory_outputs_outgrow_block():
+    # the small output fits the worker's first output block, the big one
+    # doesn't, so the block is replaced after the small one is read
+    def make():
+        return [CountingProx({'x': np.ones(4)}), CountingProx({'y': np.ones(1000)}),
+                CountingProx({'x': 3*np.ones(4)})]
+
+    with ADMM(make(), rho=1.0, threads=1, backend='process') as a:
+        a.step(3)
+    with ADMM(make(), rho=1.0, threads=1, backend='shared') as b:
+        b.step(3)
+
+    for ia, ib in zip(a.infos, b.infos):
+        assert np.isclose(ia['r'], ib['r'])
+    assert np.allclose(a.xbar['x'], b.xbar['x'])
+    assert np.allclose(a.xbar['y'], b.xbar['y'])
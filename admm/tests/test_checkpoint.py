@@ -0,0 +1,83 @@
+from admm import ADMM
+from admm.rho_adjust import SpectralRho, make_resid_gap
+
+import numpy as np
+import pytest
+
+from .test_accel import box_market
+from .test_engine import quad_market
+
+
+def resumed(make, path, engines=('dict', 'dict'), rho_adj=None, **kwargs):
+    """ Step, checkpoint and restore, then step both copies. """
+    a = ADMM(make(), 1.0, engine=engines[0], rho_adj=rho_adj and rho_adj(),
+             **kwargs)
+    a.step(20)
+    a.checkpoint(path)
+
+    b = ADMM.restore(path, make(), engine=engines[1],
+                     rho_adj=rho_adj and rho_adj(), **kwargs)
+    a.step(20)
+    b.step(20)
+    return a, b
+
+def test_checkpoint_resumes(tmp_path):
+    path = str(tmp_path / 'solve.ckpt')
+    for engines in [('dict', 'dict'), ('dict', 'array'), ('array', 'dict'),
+                    ('array', 'array')]:
+        for make in [box_market, quad_market]:
+            a, b = resumed(make, path, engines, rho_adj=SpectralRho)
+
+            assert b.iters == a.iters == 40
+            # the engines round differently, which near convergence
+            # moves the spectral rho a little
+            if engines[0] == engines[1]:
+                assert b.rho == a.rho
+            assert np.isclose(b.rho, a.rho, rtol=1e-4)
+            for k in a.xbar:
+                assert np.allclose(a.xbar[k], b.xbar[k])
+            for ua, ub in zip(a.us, b.us):
+                for k in ua:
+                    assert np.allclose(ua[k], ub[k])
+
+def test_checkpoint_array_values(tmp_path):
+    path = str(tmp_path / 'solve.ckpt')
+    np.random.seed(0)
+    targets = [{'x': np.random.randn(3, 2), ('a', 1): 1.0*i} for i in range(3)]
+
+    def make():
+        from .test_engine import make_quad_prox
+        return [make_quad_prox(t) for t in targets]
+
+    a, b = resumed(make, path)
+    assert b.xbar['x'].shape == (3, 2)
+    assert np.allclose(a.xbar['x'], b.xbar['x'])
+
+def test_checkpoint_per_key_rho(tmp_path):
+    path = str(tmp_path / 'solve.ckpt')
+    rule = lambda: make_resid_gap(per='key')
+    a, b = resumed(box_market, path, ('array', 'array'), rho_adj=rule)
+    assert a.key_rho == b.key_rho
+    assert len(set(a.key_rho.values())) > 1
+
+    with pytest.raises(ValueError):
+        ADMM.restore(path, box_market(), engine='dict')
+
+def test_auto_checkpoint(tmp_path):
+    path = str(tmp_path / 'solve.ckpt')
+    a = ADMM(box_market(), 1.0, engine='array')
+    a.auto_checkpoint(path, every=10)
+    a.step(25)
+    a.close()
+
+    b = ADMM.restore(path, box_market())
+    assert b.iters == 20
+
+def test_restore_wrong_proxes(tmp_path):
+    path = str(tmp_path / 'solve.ckpt')
+    a = ADMM(box_market(), 1.0)
+    a.step(2)
+    a.checkpoint(path)
+
+    with pytest.raises(ValueError):
+        ADMM.restore(path, box_market()[:-1])
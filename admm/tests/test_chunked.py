@@ -0,0 +1,48 @@
+from admm import ADMM
+from admm.chunked import ChunkedMapper
+
+from .test_engine import quad_market
+
+import numpy as np
+
+
+def test_chunked_matches_serial():
+    a = ADMM(quad_market(m=40), rho=1.0)
+    a.step(10)
+
+    for chunksize in [None, 3]:
+        mapper = ChunkedMapper(threads=4, chunksize=chunksize)
+        with ADMM(quad_market(m=40), rho=1.0, backend=mapper) as b:
+            b.step(10)
+
+        assert np.isclose(a.infos[-1]['r'], b.infos[-1]['r'])
+        for k in a.xbar:
+            assert np.isclose(a.xbar[k], b.xbar[k])
+
+        assert len(b.infos[-1]['times']['proxes']) == 41
+
+    assert b.infos[-1]['chunksize'] == 3
+
+def test_tune():
+    mapper = ChunkedMapper(threads=4, target=1e-3)
+    assert mapper.tune(1000) == 250
+
+    mapper._per_prox = 1e-5
+    assert mapper.tune(1000) == 100
+
+    mapper._per_prox = 1e-2
+    assert mapper.tune(1000) == 1
+    mapper.close()
+
+def test_chunked_times_each_prox():
+    from .test_partial import make_slow_prox
+
+    delays = [0, .02, 0, .01]
+    proxes = [make_slow_prox({'x': 1.0*i}, d) for i, d in enumerate(delays)]
+    mapper = ChunkedMapper(threads=1, chunksize=4)
+    with ADMM(proxes, rho=1.0, backend=mapper) as admm:
+        admm.step(2)
+
+    times = admm.infos[-1]['times']['proxes']
+    assert times[1] >= .02 and .01 <= times[3] < .02
+    assert times[0] < .005 and times[2] < .005
@@ -0,0 +1,65 @@
+from admm import ADMM
+from admm.distributed import ProxServer, Cluster
+
+from .test_engine import quad_market
+
+import numpy as np
+
+
+def test_cluster_matches_local():
+    proxes = quad_market()
+    agents, fusion = proxes[:-1], proxes[-1]
+
+    servers = [ProxServer(agents[:3]).start(), ProxServer(agents[3:]).start()]
+    cluster = Cluster([s.address for s in servers])
+    assert len(cluster.proxes) == len(agents)
+
+    local = ADMM(quad_market(), rho=1.0)
+    local.step(20)
+
+    remote = ADMM(cluster.proxes + [fusion], rho=1.0, backend=cluster)
+    remote.step(20)
+
+    for a, b in zip(local.infos, remote.infos):
+        assert np.isclose(a['r'], b['r'])
+        assert np.isclose(a['s'], b['s'])
+        assert a['rho'] == b['rho']
+
+    for k in local.xbar:
+        assert np.isclose(local.xbar[k], remote.xbar[k])
+
+    cluster.close(shutdown=True)
+    for s in servers:
+        s.join()
+
+def test_cluster_astep():
+    # astep runs RemoteProx calls concurrently; they must not interleave
+    # on a node's socket
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    proxes = quad_market()
+    agents, fusion = proxes[:-1], proxes[-1]
+    servers = [ProxServer(agents[:3]).start(), ProxServer(agents[3:]).start()]
+    cluster = Cluster([s.address for s in servers])
+
+    local = ADMM(quad_market(), rho=1.0)
+    local.step(5)
+
+    for backend in [cluster, 'thread']:
+        remote = ADMM(cluster.proxes + [fusion], rho=1.0, threads=4, backend=backend)
+        asyncio.run(remote.astep(5))
+        assert np.isclose(local.infos[-1]['r'], remote.infos[-1]['r'])
+        for k in local.xbar:
+            assert np.isclose(local.xbar[k], remote.xbar[k])
+
+    # direct calls from several threads
+    x0 = {k: 0.0 for k in local.xbar}
+    with ThreadPoolExecutor(8) as pool:
+        outs = list(pool.map(lambda p: p(x0, 1.0), cluster.proxes*4))
+    expected = [p(x0, 1.0) for p in agents]*4
+    assert outs == expected
+
+    cluster.close(shutdown=True)
+    for s in servers:
+        s.join()
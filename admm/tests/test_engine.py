@@ -0,0 +1,196 @@
+from admm import ADMM, form_sharing_prox
+
+import numpy as np
+import pytest
+
+
+def make_quad_prox(a):
+    """ prox of f(x) = 1/2 ||x - a||^2, for a dict `a`.
+    """
+    def prox(x0, rho):
+        out = {}
+        for k, v in a.items():
+            out[k] = (v + rho*x0.get(k, 0.0))/(1.0 + rho)
+        return out
+
+    return prox
+
+def quad_market(m=6, n=4, seed=0):
+    """ Agents with quadratic costs on shared goods and a consensus price,
+    plus a sharing prox.
+    """
+    np.random.seed(seed)
+    proxes = []
+    for i in range(m):
+        a = {(i, g): np.random.randn() for g in range(n) if np.random.rand() < .7}
+        a['price'] = np.random.randn()
+        proxes += [make_quad_prox(a)]
+
+    B = {g: 1.0 for g in range(n)}
+    proxes += [form_sharing_prox(B)]
+
+    return proxes
+
+def test_array_engine_matches_dict():
+    a = ADMM(quad_market(), rho=1.0, engine='dict')
+    b = ADMM(quad_market(), rho=1.0, engine='array')
+
+    a.step(30)
+    b.step(30)
+
+    for ia, ib in zip(a.infos, b.infos):
+        assert np.isclose(ia['r'], ib['r'])
+        assert np.isclose(ia['s'], ib['s'])
+        assert ia['rho'] == ib['rho']
+
+    xa, xb = a.xbar, b.xbar
+    assert set(xa) == set(xb)
+    for k in xa:
+        assert np.isclose(xa[k], xb[k])
+
+    for ua, ub in zip(a.us, b.us):
+        for k in ub:
+            assert np.isclose(ua[k], ub[k])
+
+def test_array_engine_array_values():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn(3), 'y': 1.0*i} for i in range(3)]
+    proxes = [make_quad_prox(t) for t in targets]
+
+    a = ADMM(proxes, rho=1.0, engine='dict')
+    b = ADMM(proxes, rho=1.0, engine='array')
+
+    a.step(20)
+    b.step(20)
+
+    assert np.isclose(a.infos[-1]['r'], b.infos[-1]['r'])
+    assert np.allclose(a.xbar['x'], b.xbar['x'])
+    assert b.xbar['x'].shape == (3,)
+    assert np.isclose(a.xbar['y'], b.xbar['y'])
+
+def test_incidence_cached():
+    keysets = [['a', 'b'], ['a', 'b'], ['a', 'b', 'c']]
+
+    def prox(x0, rho):
+        keys = keysets[min(len(calls), 2)]
+        calls.append(None)
+        return {k: 1.0 for k in keys}
+
+    calls = []
+    admm = ADMM([prox, make_quad_prox({'a': 2.0})], rho=1.0, engine='array')
+
+    admm.step(2)
+    inc = admm._state.incidence
+    assert list(inc.count) == [2, 1]
+
+    admm.step()
+    assert admm._state.incidence is not inc
+    assert list(admm._state.incidence.count) == [2, 1, 1]
+    assert np.isclose(admm.xbar['c'], 1.0)
+
+    inc = admm._state.incidence
+    admm.step()
+    assert admm._state.incidence is inc
+
+def test_fused_matches_general():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn(3), 'y': 1.0*i, (i, 'g'): 2.0} for i in range(3)]
+    proxes = [make_quad_prox(t) for t in targets]
+
+    a = ADMM(proxes, rho=1.0, resid='general')
+    b = ADMM(proxes, rho=1.0)
+
+    a.step(20)
+    b.step(20)
+
+    for ia, ib in zip(a.infos, b.infos):
+        assert np.isclose(ia['r'], ib['r'])
+        assert np.isclose(ia['s'], ib['s'])
+
+    assert np.allclose(a.xbar['x'], b.xbar['x'])
+    for ua, ub in zip(a.us, b.us):
+        assert np.allclose(ua['x'], ub['x'])
+        assert np.isclose(ua['y'], ub['y'])
+
+def test_instrument_levels():
+    ref = ADMM(quad_market(), rho=1.0)
+    ref.step(10)
+
+    for engine in ['dict', 'array']:
+        infos = {}
+        for level in ['off', 'coarse', 'phase', 'full']:
+            a = ADMM(quad_market(), rho=1.0, engine=engine, instrument=level)
+            a.step(10)
+            for i, r in zip(a.infos, ref.infos):
+                assert np.isclose(i['r'], r['r'])
+            infos[level] = a.infos[-1]
+
+        assert 'times' not in infos['off']
+        assert 'prox_infos' not in infos['off']
+        assert set(infos['coarse']['times']) <= {'total_step', 'resid', 'xbar'}
+        assert 'x_in' in infos['phase']['times']
+        assert 'proxes' not in infos['phase']['times']
+        assert 'proxes' in infos['full']['times']
+        assert 'prox_infos' in infos['full']
+
+def test_instrument_unknown():
+    try:
+        ADMM(quad_market(), rho=1.0, instrument='verbose')
+    except ValueError:
+        pass
+    else:
+        assert False
+
+def test_sharded_sharing_matches():
+    from admm import form_sharded_sharing_prox
+
+    proxes = quad_market(m=8, n=6)
+    B = {g: 1.0 for g in range(6)}
+    sharded = proxes[:-1] + form_sharded_sharing_prox(B, 3)
+
+    a = ADMM(proxes, rho=1.0)
+    b = ADMM(sharded, rho=1.0, threads=3)
+    a.step(20)
+    b.step(20)
+
+    for ia, ib in zip(a.infos, b.infos):
+        assert np.isclose(ia['r'], ib['r'])
+        assert np.isclose(ia['s'], ib['s'])
+
+    for k in a.xbar:
+        assert np.isclose(a.xbar[k], b.xbar[k])
+
+def test_stopping_norms_agree():
+    from admm.resid import stopping_norms
+    norms = []
+    for kw in [dict(), dict(resid='general'), dict(engine='array')]:
+        a = ADMM(quad_market(), rho=2.0, **kw)
+        a.step(5)
+        norms += [a._step(norms=True)['norms']]
+
+    for n in norms[1:]:
+        assert n['n'] == norms[0]['n']
+        for k in 'xzy':
+            assert np.isclose(n[k], norms[0][k])
+
+def test_solve():
+    ref = ADMM(quad_market(), rho=1.0)
+    ref.step(300)
+
+    for engine in ['dict', 'array']:
+        a = ADMM(quad_market(), rho=1.0, engine=engine)
+        assert a.solve(eps_abs=1e-8, eps_rel=1e-6, check_every=7)
+
+        # residuals only on the checks
+        r = [i['r'] for i in a.infos]
+        assert len(r) % 7 == 0
+        assert np.all(np.isnan(r[:6])) and not np.isnan(r[6])
+        for k in ref.xbar:
+            assert np.isclose(a.xbar[k], ref.xbar[k], atol=1e-5)
+
+    a = ADMM(quad_market(), rho=1.0)
+    assert not a.solve(eps_abs=1e-12, eps_rel=0, max_iters=15, check_every=10)
+    assert len(a.infos) == 15 and not np.isnan(a.infos[-1]['r'])
+
+    with pytest.raises(ValueError):
+        a.solve(check_every=0)
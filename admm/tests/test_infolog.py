@@ -0,0 +1,94 @@
+from admm import ADMM, load
+from admm.infolog import InfoLog, load_infolog
+
+from .iter_times import dummy_market_proxes
+
+import numpy as np
+import pytest
+import shutil
+
+
+def test_log_roundtrip(tmp_path):
+    path = str(tmp_path / 'run.log')
+
+    np.random.seed(0)
+    admm = ADMM(dummy_market_proxes(), rho=1.0, log=InfoLog(path, flush_every=3, extra={'n': 10}))
+    admm.step(10)
+
+    # only whole chunks are on disk until the log is flushed
+    infos, _ = load_infolog(path)
+    assert len(infos) == 9
+
+    admm.close()
+    admm2, data = load(path)
+
+    assert data['extra'] == {'n': 10}
+    assert len(admm2.infos) == 10
+    assert isinstance(admm2.infos.get('r'), np.memmap)
+    assert np.array_equal(admm2.infos.get('r'), [i['r'] for i in admm.infos])
+    assert admm2.infos[-1]['prox_infos'] == admm.infos[-1]['prox_infos']
+    assert np.isclose(data['solve_time'], sum(i['times']['total_step'] for i in admm.infos))
+
+def test_log_new_and_wider_columns(tmp_path):
+    path = str(tmp_path / 'run.log')
+    log = InfoLog(path, flush_every=2)
+
+    log.append({'r': 1.0, 'v': [1.0]})
+    log.append({'r': 2.0, 'v': [1.0]})
+    log.append({'r': 3.0, 'v': [1.0, 2.0], 's': 5.0})
+    log.close()
+
+    infos, _ = load_infolog(path)
+    assert list(infos.get('r')) == [1.0, 2.0, 3.0]
+    assert np.isnan(infos.get('s')[:2]).all()
+    assert infos[0]['v'] == [1.0]
+    assert infos[2]['v'] == [1.0, 2.0]
+
+def test_log_leaves_other_files(tmp_path):
+    path = tmp_path / 'run.log'
+    log = InfoLog(str(path), flush_every=1)
+    log.append({'r': 1.0})
+    log.close()
+    (path / 'config.yaml').write_text('keep')
+
+    # reopening replaces only the old log's files
+    log = InfoLog(str(path), flush_every=1)
+    log.append({'s': 2.0})
+    log.close()
+    assert (path / 'config.yaml').read_text() == 'keep'
+    infos, _ = load_infolog(str(path))
+    assert list(infos.kinds) == [('s',)]
+
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'checkpoint.bin').write_bytes(b'data')
+    with pytest.raises(ValueError):
+        InfoLog(str(other))
+    assert (other / 'checkpoint.bin').read_bytes() == b'data'
+
+def test_load_log_without_times(tmp_path):
+    path = str(tmp_path / 'run.log')
+
+    np.random.seed(0)
+    admm = ADMM(dummy_market_proxes(), rho=1.0, log=path, instrument='off')
+    admm.step(3)
+    admm.close()
+
+    admm2, data = load(path)
+    assert len(admm2.infos) == 3
+    assert np.isnan(data['solve_time'])
+
+def test_log_kind_change(tmp_path):
+    path = str(tmp_path / 'run.log')
+    log = InfoLog(path, flush_every=2)
+
+    for v in [1.0, 2.0, 'x', 4.0, 5.0]:
+        log.append({'r': v, 'v': [v, 1.0] if v != 'x' else v})
+    log.close()
+
+    infos, _ = load_infolog(path)
+    r, v = infos.get('r'), infos.get('v')
+    assert r.dtype == object and list(r) == [1.0, 2.0, 'x', 4.0, 5.0]
+    assert v.dtype == object and v[2] == 'x'
+    assert [list(v[i]) for i in [0, 1, 3, 4]] == [[1.0, 1.0], [2.0, 1.0],
+                                                  [4.0, 1.0], [5.0, 1.0]]
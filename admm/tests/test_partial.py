@@ -0,0 +1,85 @@
+import time
+
+from admm import ADMM
+from admm.partial import PartialBarrier
+
+from .test_engine import make_quad_prox
+
+import numpy as np
+
+
+def make_slow_prox(a, delay):
+    prox = make_quad_prox(a)
+
+    def slow(x0, rho):
+        time.sleep(delay)
+        return prox(x0, rho)
+
+    return slow
+
+def test_full_barrier_matches_serial():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(5)]
+
+    a = ADMM([make_quad_prox(t) for t in targets], rho=1.0)
+    a.step(10)
+
+    barrier = PartialBarrier(threads=2)
+    with ADMM([make_quad_prox(t) for t in targets], rho=1.0, backend=barrier) as b:
+        b.step(10)
+
+    assert np.isclose(a.xbar['x'], b.xbar['x'])
+    assert b.infos[-1]['staleness'] == [0]*5
+
+def test_straggler_is_stale():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(4)]
+    proxes = [make_quad_prox(t) for t in targets[:3]]
+    proxes += [make_slow_prox(targets[3], .05)]
+
+    barrier = PartialBarrier(threads=4, fraction=.75, max_staleness=2)
+    with ADMM(proxes, rho=1.0, backend=barrier) as admm:
+        admm.step(12)
+
+    staleness = np.array([info['staleness'] for info in admm.infos])
+
+    # everyone has to arrive on the first step
+    assert list(staleness[0]) == [0]*4
+
+    assert staleness[:, :3].max() == 0
+    assert 0 < staleness[:, 3].max() <= 2
+
+def test_remove_prox_shifts():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(4)]
+    proxes = [make_quad_prox(t) for t in targets[:3]]
+    proxes += [make_slow_prox(targets[3], .05)]
+
+    barrier = PartialBarrier(threads=4, fraction=.75, max_staleness=2)
+    with ADMM(proxes, rho=1.0, backend=barrier) as admm:
+        admm.step(2)
+        admm.remove_prox(0)
+        assert sorted(barrier._last) == [0, 1, 2]
+        admm.add_prox(make_quad_prox(targets[0]))
+        admm.step(8)
+
+    assert len(admm.infos[-1]['staleness']) == 4
+    assert admm.infos[-1]['staleness'][:2] == [0, 0]
+
+def test_replace_prox_drops_stale_output():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(4)]
+    proxes = [make_quad_prox(t) for t in targets[:3]]
+    proxes += [make_slow_prox(targets[3], .2)]
+
+    barrier = PartialBarrier(threads=4, fraction=.5, max_staleness=5)
+    with ADMM(proxes, rho=1.0, backend=barrier) as admm:
+        admm.step(2)
+        assert 3 in barrier._pending
+        admm.update_proxes({3: make_quad_prox({'y': 1.0})})
+        admm.step()
+
+    # the new prox is waited for, rather than the old prox's output reused
+    assert admm.infos[-1]['staleness'][3] == 0
+    assert set(admm.us[3]) == {'y'}
+    assert 'y' in admm.xbar
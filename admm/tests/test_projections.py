@@ -0,0 +1,79 @@
+from admm import (ADMM, form_box_prox, form_nonneg_prox, form_budget_prox,
+                  form_simplex_prox, form_pin_prox)
+from admm.projections import simplex_projection
+
+import numpy as np
+
+from .test_engine import make_quad_prox
+
+
+def random_x(n=8, seed=0):
+    np.random.seed(seed)
+    return {'x{}'.format(i): np.random.randn() for i in range(n)}
+
+def test_box():
+    x = random_x()
+    lower = {'x0': 0.5}
+    prox = form_box_prox(lower=lower, upper=1.0)
+
+    for _ in range(2):
+        out = prox(x)
+        for k, v in x.items():
+            assert out[k] == min(max(v, lower.get(k, -np.inf)), 1.0)
+
+    assert prox.info['time'] >= 0
+
+def test_nonneg_keys():
+    x = random_x()
+    prox = form_nonneg_prox(keys=['x0', 'x1', 'missing'])
+    out = prox(x)
+    assert set(out) == {'x0', 'x1'}
+    assert out['x0'] == max(x['x0'], 0)
+    assert prox({}) == {}
+
+def test_budget():
+    x = random_x()
+    out = form_budget_prox(-1.0)(x)
+    assert np.isclose(sum(out.values()), min(sum(x.values()), -1.0))
+
+    out = form_budget_prox(100.0)(x)
+    assert out == x
+
+def test_simplex():
+    np.random.seed(0)
+    for _ in range(10):
+        v = np.random.randn(6)
+        p = simplex_projection(v, 2.0)
+        assert np.all(p >= 0)
+        assert np.isclose(p.sum(), 2.0)
+
+        # optimality: p is no further from v than random simplex points
+        for _ in range(20):
+            q = np.random.dirichlet(np.ones(6))*2.0
+            assert np.linalg.norm(p - v) <= np.linalg.norm(q - v) + 1e-12
+
+    out = form_simplex_prox()(random_x())
+    assert np.isclose(sum(out.values()), 1.0)
+
+def test_pin_in_admm():
+    proxes = [make_quad_prox({'a': 3.0, 'b': -2.0}),
+              form_nonneg_prox(),
+              form_pin_prox({'a': 1.0})]
+    admm = ADMM(proxes, rho=1.0)
+    admm.step(200)
+
+    assert np.isclose(admm.xbar['a'], 1.0, atol=1e-3)
+    assert np.isclose(admm.xbar['b'], 0.0, atol=1e-3)
+
+def test_plan_matches_equal_keys():
+    # inputs unpickled by a process backend have new key objects each step
+    import pickle
+    from admm.projections import BlockPlan
+
+    x = {('a', i): float(i) for i in range(5)}
+    plan = BlockPlan(x)
+    copy = pickle.loads(pickle.dumps(x))
+    assert next(iter(copy)) is not next(iter(x))
+    assert plan.matches(x) and plan.matches(copy)
+    assert not plan.matches(dict(reversed(list(x.items()))))
+    assert not plan.matches({('b', i): 0.0 for i in range(5)})
@@ -0,0 +1,65 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from admm import ADMM
+from admm.telemetry import Telemetry
+from admm.report import (get_key, get_prox_key, decimate, lttb_indices,
+                         prox_envelope, report_prox_time)
+
+from .iter_times import dummy_market_proxes
+
+import numpy as np
+
+
+def test_columnar_matches_list():
+    np.random.seed(0)
+    admm = ADMM(dummy_market_proxes(), rho=1.0)
+    admm.step(10)
+
+    t = Telemetry()
+    for info in admm.infos:
+        t.append(info)
+
+    for keys in [('r',), ('times', 'total_step')]:
+        assert np.allclose(get_key(admm.infos, *keys), get_key(t, *keys))
+
+    assert np.allclose(get_key(admm.infos, 'times', 'proxes', reduce=np.sum),
+                       get_key(t, 'times', 'proxes', reduce=np.sum))
+
+    for key in ['time', 'iter']:
+        a = get_prox_key(admm.infos, key, default=0)
+        b = get_prox_key(t, key, default=0)
+        assert np.allclose(a.astype(float), b)
+
+def test_decimate_keeps_extremes():
+    np.random.seed(0)
+    y = np.random.rand(100000)
+    y[12345] = 10.0
+    y[54321] = -10.0
+
+    x, d = decimate(y, max_points=500)
+    assert len(d) <= 500
+    assert d.max() == 10.0 and d.min() == -10.0
+    assert np.all(np.diff(x) > 0)
+
+    idx = lttb_indices(y, 200)
+    assert len(idx) == 200
+    assert idx[0] == 0 and idx[-1] == len(y)-1
+    assert np.all(np.diff(idx) > 0)
+
+def test_envelope():
+    a = np.arange(12, dtype=float).reshape(3, 4)
+    a[0, 1] = np.nan
+    env = prox_envelope(a, percentiles=(50,))
+
+    assert list(env[:, 0]) == [0, 4, 8]
+    assert list(env[:, 1]) == [3, 7, 11]
+    assert list(env[:, 2]) == [2, 5.5, 9.5]
+
+    fig, ax = plt.subplots()
+    times = np.random.rand(50, 100)
+    infos = [{'times': {'proxes': list(row)}} for row in times]
+    out = report_prox_time(infos, ax=ax, envelope=True, max_points=100)
+    assert out.shape == (50, 100)
+    plt.close(fig)
@@ -0,0 +1,105 @@
+from admm import ADMM
+from admm.rho_adjust import SpectralRho, make_resid_gap, local_copies
+from admm.report import iters_to_tol
+
+import numpy as np
+import pytest
+
+from .test_accel import box_market
+
+
+def make_ls_prox(A, b):
+    """ prox of 1/2||Ax - b||^2 on key 'x' """
+    w, V = np.linalg.eigh(A.T @ A)
+    Atb = A.T @ b
+
+    def prox(x0, rho):
+        v = x0.get('x', np.zeros(len(b)))
+        return {'x': V @ ((V.T @ (Atb + rho*v))/(w + rho))}
+
+    return prox
+
+def consensus_proxes(n=30, k=4, seed=0):
+    np.random.seed(seed)
+    return [make_ls_prox(np.random.randn(n,n), np.random.randn(n))
+            for _ in range(k)]
+
+def test_spectral_consensus():
+    eps = 1e-6
+    for rho in [.01, 100.0]:
+        a = ADMM(consensus_proxes(), rho=rho, rho_adj=make_resid_gap())
+        b = ADMM(consensus_proxes(), rho=rho, rho_adj=SpectralRho())
+        a.step(1000)
+        b.step(1000)
+
+        n = iters_to_tol(b.infos, eps)
+        assert n is not None
+        assert n < iters_to_tol(a.infos, eps)
+
+        assert np.allclose(a.xbar['x'], b.xbar['x'], atol=1e-4)
+
+def test_spectral_engines_agree():
+    a = ADMM(box_market(), rho=1.0, rho_adj=SpectralRho())
+    b = ADMM(box_market(), rho=1.0, rho_adj=SpectralRho(), engine='array')
+    a.step(30)
+    b.step(30)
+
+    rhos = [i['rho'] for i in a.infos]
+    assert len(set(rhos)) > 1
+    assert np.allclose(rhos, [i['rho'] for i in b.infos])
+
+def test_local_copies():
+    xs = [{'a': 1.0, 'b': 2.0}, {'a': 3.0}]
+    us = [{'a': .1, 'b': .2}, {'a': .3}]
+    xbar = {'a': 2.0, 'b': 2.0}
+    x, zold, z, u, owner = local_copies(xs, us, xbar, {})
+
+    assert list(x) == [1, 2, 3]
+    assert list(zold) == [0, 0, 0]
+    assert list(z) == [2, 2, 2]
+    assert list(u) == [.1, .2, .3]
+    assert list(owner) == [0, 0, 1]
+
+def test_uniform_factors_match_scalar():
+    a = ADMM(box_market(), rho=1.0, engine='array')
+    b = ADMM(box_market(), rho=1.0, engine='array', prox_rho=[1.0]*21)
+    c = ADMM(box_market(), rho=1.0, engine='array', key_rho={(0, 1): 1.0})
+    for admm in [a, b, c]:
+        admm.step(30)
+
+    for admm in [b, c]:
+        assert np.allclose([i['r'] for i in a.infos], [i['r'] for i in admm.infos])
+        assert np.allclose([i['s'] for i in a.infos], [i['s'] for i in admm.infos])
+
+    assert len(b.infos[-1]['rho_proxes']) == 21
+    assert len(c.infos[-1]['rho_keys']) == 5
+
+def test_per_key_and_prox_rho():
+    ref = ADMM(box_market(), rho=1.0, engine='array')
+    ref.step(1000)
+
+    rules = [dict(prox_rho=list(np.linspace(.3, 3, 21))),
+             dict(key_rho={(0, 1): 10.0, (3, 2): .1}),
+             dict(rho_adj=make_resid_gap(per='key')),
+             dict(rho_adj=make_resid_gap(per='prox')),
+             dict(rho_adj=SpectralRho(per='prox'))]
+    for kw in rules:
+        admm = ADMM(box_market(), rho=1.0, engine='array', **kw)
+        admm.step(1000)
+
+        assert iters_to_tol(admm.infos, 1e-6) is not None
+        for k, v in ref.xbar.items():
+            assert np.isclose(admm.xbar[k], v, atol=1e-5)
+
+    rhos = admm.prox_rho
+    assert len(rhos) == 21 and len(set(rhos)) > 1
+    assert set(admm.key_rho) == set(ref.xbar)
+
+def test_per_rho_needs_array_engine():
+    for kw in [dict(prox_rho=[1.0]*21), dict(key_rho={}),
+               dict(rho_adj=make_resid_gap(per='key'))]:
+        with pytest.raises(ValueError):
+            ADMM(box_market(), rho=1.0, **kw)
+
+    with pytest.raises(ValueError):
+        ADMM(box_market(), rho=1.0, engine='array', prox_rho=[1.0])
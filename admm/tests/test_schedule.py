@@ -0,0 +1,51 @@
+import time
+
+from admm import ADMM
+from admm.schedule import CostScheduler
+from admm.report import report_makespan
+
+from .test_engine import make_quad_prox
+from .test_partial import make_slow_prox
+
+import numpy as np
+
+
+def test_longest_first():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(4)]
+    delays = [0, .03, 0, .01]
+    proxes = [make_slow_prox(t, d) for t, d in zip(targets, delays)]
+
+    sched = CostScheduler(threads=2, pinned=1)
+    with ADMM(proxes, rho=1.0, backend=sched) as admm:
+        admm.step(3)
+
+    assert list(sched.order(4)[:2]) == [1, 3]
+
+    serial = ADMM([make_quad_prox(t) for t in targets], rho=1.0)
+    serial.step(3)
+    assert np.isclose(admm.xbar['x'], serial.xbar['x'])
+
+    info = admm.infos[-1]
+    assert info['makespan_bound'] >= .03
+    assert info['makespan'] >= info['makespan_bound']
+
+    a = report_makespan(admm.infos)
+    assert a.shape == (3, 2)
+
+def test_add_remove_prox_costs():
+    np.random.seed(0)
+    targets = [{'x': np.random.randn()} for _ in range(3)]
+    delays = [.02, 0, .01]
+    proxes = [make_slow_prox(t, d) for t, d in zip(targets, delays)]
+
+    sched = CostScheduler(threads=2)
+    with ADMM(proxes, rho=1.0, backend=sched) as admm:
+        admm.step(2)
+        admm.remove_prox(0)
+        assert len(sched.costs) == 2 and sched.costs[1] > sched.costs[0]
+
+        admm.add_prox(make_quad_prox(targets[0]))
+        # the new prox, of unknown cost, goes first
+        assert list(sched.order(3)) == [2, 1, 0]
+        admm.step()
@@ -19,4 +19,49 @@ def test_immutable_B():
     sharing_prox(x,B)
 
     # make sure that B has not been modified
-    assert np.all(B['apples'] == np.zeros(2))
\ No newline at end of file
+    assert np.all(B['apples'] == np.zeros(2))
+
+def test_plan_matches_dict():
+    from admm.sharing import form_sharing_prox
+    np.random.seed(0)
+    B = {g: np.random.randn() for g in range(5)}
+    prox = form_sharing_prox(B)
+
+    for trial in range(3):
+        x = {(a, g): np.random.randn() for a in range(6) for g in range(5)
+             if np.random.rand() < .6}
+        x['price'] = 1.0
+
+        # the same keys twice (cached plan), then new keys
+        for _ in range(2):
+            out = prox(x)
+            expected = sharing_prox(x, B)
+            assert set(out) == set(expected)
+            for k in out:
+                assert np.isclose(out[k], expected[k])
+
+
+def test_plan_array_values():
+    from admm.sharing import form_sharing_prox
+    B = {'apples': np.zeros(2)}
+    prox = form_sharing_prox(B)
+    x = {(1, 'apples'): np.array([1,3]), (2, 'apples'): np.array([5,2])}
+
+    out = prox(x)
+    assert np.allclose(out[(1, 'apples')], [-2, .5])
+    assert np.all(B['apples'] == np.zeros(2))
+
+
+def test_plan_weighted_by_key_rho():
+    from admm.sharing import form_sharing_prox
+    B = {'apples': 3.0}
+    prox = form_sharing_prox(B)
+    x = {(1, 'apples'): 1.0, (2, 'apples'): 1.0}
+
+    out = prox(x, rho=dict.fromkeys(x, 2.0))
+    assert np.isclose(out[(1, 'apples')], 1.5)
+
+    # shift of 1, split inversely to rho
+    out = prox(x, rho={(1, 'apples'): 1.0, (2, 'apples'): 3.0})
+    assert np.isclose(out[(1, 'apples')], 1.75)
+    assert np.isclose(out[(2, 'apples')], 1.25)
@@ -0,0 +1,62 @@
+from admm import ADMM
+from admm.telemetry import Telemetry
+
+from .test_engine import quad_market
+from .iter_times import dummy_market_proxes
+
+import numpy as np
+
+
+def test_views_match_list():
+    np.random.seed(0)
+    admm = ADMM(dummy_market_proxes(), rho=1.0, hook=lambda xbar: len(xbar))
+    admm.step(10)
+
+    t = Telemetry(capacity=4)
+    for info in admm.infos:
+        t.append(info)
+
+    assert len(t) == 10
+    for a, b in zip(admm.infos, t):
+        assert a['r'] == b['r']
+        assert a['hook'] == b['hook']
+        assert a['times']['total_step'] == b['times']['total_step']
+        assert list(a['times']['proxes']) == b['times']['proxes']
+        assert a['prox_infos'] == b['prox_infos']
+
+    assert t.get('times', 'proxes').shape == (10, len(admm.proxes))
+    assert np.array_equal(t.get('r'), [info['r'] for info in admm.infos])
+
+def test_admm_telemetry():
+    admm = ADMM(quad_market(), rho=1.0, telemetry=Telemetry())
+    admm.step(5)
+
+    assert isinstance(admm.infos, Telemetry)
+    assert len(admm.infos) == 5
+    assert admm.infos.get('rho').shape == (5,)
+    assert admm.infos[-1]['prox_infos'][-1]['time'] > 0
+
+def test_ring_and_decimation():
+    t = Telemetry(keep=5, decimate=4)
+    for i in range(20):
+        t.append({'r': float(i), 'times': {'proxes': (1.0,)*(i % 3 + 1)}})
+
+    assert list(t.iters) == [0, 4, 8, 12, 15, 16, 17, 18, 19]
+    assert list(t.get('r')) == list(t.iters)
+    assert t[-1]['r'] == 19.0
+    assert t[0]['times']['proxes'] == [1.0]
+    assert t[-1]['times']['proxes'] == [1.0, 1.0]
+    assert [info['r'] for info in t] == list(t.iters)
+
+def test_kind_change_to_object():
+    t = Telemetry()
+    t.append({'v': [1.0, 2.0]})
+    t.append({'v': [3.0]})
+    t.append({'v': 'done'})
+    t.append({'v': 5.0})
+
+    v = t.get('v')
+    assert v.ndim == 1 and v.dtype == object
+    assert list(v[0]) == [1.0, 2.0] and list(v[1]) == [3.0]
+    assert v[2] == 'done' and v[3] == 5.0
+    assert t[0]['v'].tolist() == [1.0, 2.0] and t[2]['v'] == 'done'
@@ -0,0 +1,47 @@
+import json
+
+from admm import ADMM
+from admm.trace import Tracer
+
+from .test_engine import quad_market
+
+
+def test_trace_threads(tmp_path):
+    proxes = quad_market()
+    tracer = Tracer()
+    with ADMM(proxes, rho=1.0, threads=2, tracer=tracer) as admm:
+        admm.step(3)
+
+    filename = str(tmp_path / 'trace.json')
+    tracer.save(filename)
+    with open(filename) as f:
+        trace = json.load(f)
+
+    events = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    steps = [e for e in events if e['cat'] == 'step']
+    calls = [e for e in events if e['cat'] == 'prox']
+
+    assert [e['args']['iter'] for e in steps] == [0, 1, 2]
+    assert len(calls) == 3*len(proxes)
+    assert all(e['args']['queue_wait_us'] >= 0 for e in calls)
+    assert {e['name'] for e in events if e['cat'] == 'phase'} >= {'x_in', 'total_proxes', 'xbar'}
+
+    # each prox call falls within its step
+    for e in calls:
+        step = steps[e['args']['iter']]
+        assert step['ts'] <= e['ts']
+        assert e['ts'] + e['dur'] <= step['ts'] + step['dur'] + 1
+
+    names = [e for e in trace['traceEvents'] if e['name'] == 'thread_name']
+    assert 'main' in [e['args']['name'] for e in names]
+
+def test_trace_process():
+    proxes = quad_market()
+    tracer = Tracer()
+    with ADMM(proxes, rho=1.0, threads=2, backend='process', engine='array',
+              instrument='off', tracer=tracer) as admm:
+        admm.step(2)
+
+    calls = [e for e in tracer.events if e['cat'] == 'prox']
+    assert len(calls) == 2*len(proxes)
+    assert {e['pid'] for e in calls} != {tracer.pid}
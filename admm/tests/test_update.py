@@ -0,0 +1,177 @@
+from admm import ADMM, form_sharing_prox
+from admm.admm import reassign_dual
+
+import numpy as np
+import pytest
+
+from .test_accel import make_box_quad_prox
+
+
+def market(seed=0, m=12, n=5):
+    rng = np.random.RandomState(seed)
+    agents = []
+    for i in range(m):
+        a = {(i, g): rng.randn() for g in range(n) if rng.rand() < .6}
+        w = {k: np.exp(rng.randn()) for k in a}
+        agents += [(a, w)]
+    B = {g: .5*rng.randn() for g in range(n)}
+    return agents, B
+
+def changed_market(agents, B):
+    """ New supplies, and agent 0 trades one good for another. """
+    agents = list(agents)
+    a, w = agents[0]
+    held = [g for _, g in a]
+    free = [g for g in range(len(B)) if g not in held]
+    a = {k: v for k, v in a.items() if k != (0, held[0])}
+    a[(0, free[0])] = .3
+    agents[0] = (a, {k: 1.0 for k in a})
+    B = {g: b + .1 for g, b in B.items()}
+    return agents, B
+
+def proxes(agents, B):
+    return [make_box_quad_prox(a, w, bound=1.0) for a, w in agents] + [form_sharing_prox(B)]
+
+def test_reassign_dual():
+    us = [{'a': 1.0, 'b': 2.0}, {'a': -.5}, {'a': -.5, 'b': -2.0}]
+    reassign_dual(us, 0, ['b', 'c'])
+
+    assert us[0] == {'b': 2.0, 'c': 0.0}
+    assert us[1] == {'a': 0.0} and us[2] == {'a': 0.0, 'b': -2.0}
+
+def test_update_proxes():
+    agents, B = market()
+    agents2, B2 = changed_market(agents, B)
+    m = len(agents)
+
+    for engine in ['dict', 'array']:
+        warm = ADMM(proxes(agents, B), rho=1.0, engine=engine)
+        assert warm.solve(1e-9, 1e-7, check_every=1)
+
+        warm.update_proxes({0: make_box_quad_prox(*agents2[0], bound=1.0),
+                            m: form_sharing_prox(B2)})
+        start = warm.iters
+        assert warm.solve(1e-9, 1e-7, check_every=1)
+
+        cold = ADMM(proxes(agents2, B2), rho=1.0, engine=engine)
+        assert cold.solve(1e-9, 1e-7, check_every=1)
+        assert warm.iters - start < cold.iters
+
+        assert set(warm.xbar) == set(cold.xbar)
+        for k in cold.xbar:
+            assert np.isclose(warm.xbar[k], cold.xbar[k], atol=1e-5)
+
+        # the duals of each key still sum to zero
+        total = {}
+        for u in warm.us:
+            for k, v in u.items():
+                total[k] = total.get(k, 0.0) + v
+        assert np.allclose(list(total.values()), 0, atol=1e-8)
+
+def test_update_proxes_unknown():
+    agents, B = market()
+    admm = ADMM(proxes(agents, B), rho=1.0)
+    with pytest.raises(ValueError):
+        admm.update_proxes({len(agents) + 1: form_sharing_prox(B)})
+
+def dual_sums(us):
+    total = {}
+    for u in us:
+        for k, v in u.items():
+            total[k] = total.get(k, 0.0) + v
+    return total
+
+def test_add_remove_prox():
+    agents, B = market()
+    m = len(agents)
+    sharing = form_sharing_prox(B)
+
+    for engine in ['dict', 'array']:
+        admm = ADMM(proxes(agents, B), rho=1.0, engine=engine)
+        assert admm.solve(1e-9, 1e-7, check_every=1)
+
+        # remove agent 3, and let the sharing prox drop its keys
+        admm.remove_prox(3)
+        assert len(admm.proxes) == len(admm.us) == m
+        assert np.allclose(list(dual_sums(admm.us).values()), 0, atol=1e-8)
+        admm.update_proxes({m - 1: sharing})
+        assert not any(k[0] == 3 for k in admm.xbar if isinstance(k, tuple))
+        assert admm.solve(1e-9, 1e-7, check_every=1)
+
+        rest = agents[:3] + agents[4:]
+        cold = ADMM(proxes(rest, B), rho=1.0, engine=engine)
+        assert cold.solve(1e-9, 1e-7, check_every=1)
+        assert set(admm.xbar) == set(cold.xbar)
+        for k in cold.xbar:
+            assert np.isclose(admm.xbar[k], cold.xbar[k], atol=1e-5)
+
+        # add it back, at the end
+        assert admm.add_prox(make_box_quad_prox(*agents[3], bound=1.0)) == m
+        admm.update_proxes({m - 1: sharing})
+        assert admm.solve(1e-9, 1e-7, check_every=1)
+        assert np.allclose(list(dual_sums(admm.us).values()), 0, atol=1e-8)
+
+        full = ADMM(proxes(agents, B), rho=1.0, engine=engine)
+        assert full.solve(1e-9, 1e-7, check_every=1)
+        assert set(admm.xbar) == set(full.xbar)
+        for k in full.xbar:
+            assert np.isclose(admm.xbar[k], full.xbar[k], atol=1e-5)
+
+def test_remove_prox_incidence():
+    # removing a prox patches the cached incidence to match a rebuilt one
+    from admm.engine import Incidence
+
+    for per in [None, 'prox']:
+        prox_rho = None if per is None else [1.0, 2.0, 4.0]
+        admm = ADMM([lambda x, rho: {'a': 1.0, 'b': 2.0},
+                     lambda x, rho: {'a': 3.0},
+                     lambda x, rho: {'b': 0.0, 'c': 1.0}],
+                    rho=1.0, engine='array', prox_rho=prox_rho)
+        admm.step(3)
+        state = admm._state
+
+        admm.remove_prox(0)
+        inc = state.incidence
+        fresh = Incidence(state.layouts, len(state.xbar))
+        for name in ['ptr', 'cols', 'owner', 'count', 'inv_count']:
+            assert np.array_equal(getattr(inc, name), getattr(fresh, name))
+
+        assert set(admm.xbar) == {'a', 'b', 'c'}
+        assert np.allclose(list(dual_sums(admm.us).values()), 0)
+        if per is not None:
+            rhos = admm.prox_rho
+            assert len(rhos) == 2 and rhos[1] == 2*rhos[0]
+
+        admm.add_prox(lambda x, rho: {'d': 1.0})
+        admm.step()
+        assert admm.xbar['d'] == 1.0
+
+def test_remove_prox_unknown():
+    agents, B = market()
+    admm = ADMM(proxes(agents, B), rho=1.0)
+    with pytest.raises(ValueError):
+        admm.remove_prox(len(agents) + 1)
+
+def test_remove_prox_takes_output_out_of_xbar():
+    proxes = [lambda x, rho: {'a': 1.0},
+              lambda x, rho: {'a': 3.0},
+              lambda x, rho: {'a': 5.0, 'b': 2.0}]
+
+    for engine, prox_rho in [('dict', None), ('array', None),
+                             ('array', [1.0, 2.0, 4.0])]:
+        kwargs = dict(rho=1.0, engine=engine, prox_rho=prox_rho, alpha=1.5)
+        first = ADMM(proxes, **kwargs)
+        first.step()
+
+        admm = ADMM(proxes, **kwargs)
+        admm.step(2)
+        admm.remove_prox(2)
+
+        # xbar is the (weighted) average of the other two relaxed outputs
+        # from the last step
+        w = [1.0, 1.0] if prox_rho is None else prox_rho[:2]
+        relaxed = [1.5*v - .5*first.xbar['a'] for v in [1.0, 3.0]]
+        assert set(admm.xbar) == {'a'}
+        assert np.isclose(admm.xbar['a'], np.dot(w, relaxed)/sum(w))
+        # the unscaled duals still sum to zero
+        assert np.isclose(np.dot(w, [u['a'] for u in admm.us]), 0)
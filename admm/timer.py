@@ -1,6 +1,8 @@
 import time
 from contextlib import contextmanager
 
+_ns = time.perf_counter_ns
+
 class Elapsed:
     def __init__(self, time):
         self.time = time
@@ -9,41 +11,92 @@ class Elapsed:
 @contextmanager
 def SimpleTimer():
     elapsed = Elapsed(None)
-    start = time.time()
+    start = _ns()
     try:
         yield elapsed
     finally:
-        end = time.time()
-        elapsed.time = end-start
+        end = _ns()
+        elapsed.time = (end-start)*1e-9
 
 @contextmanager
 def DictTimer(label='time', d=None):
     if d is None:
         d = {}
-    start = time.time()
+    start = _ns()
     try:
         yield d
     finally:
-        end = time.time()
-        d[label] = end-start
+        end = _ns()
+        d[label] = (end-start)*1e-9
 
 
-@contextmanager
-def Timer(d, label):
-    start = time.time()
-    try:
-        yield 
-    finally:
-        end = time.time()
+class Timer:
+    """ Time a block, recording the seconds taken in `d['times'][label]`.
+    """
+    __slots__ = ('d', 'label', 'start')
+
+    def __init__(self, d, label):
+        self.d = d
+        self.label = label
+
+    def __enter__(self):
+        self.start = _ns()
+
+    def __exit__(self, *exc):
+        end = _ns()
+        d = self.d
         if 'times' not in d:
             d['times'] = {}
-        d['times'][label] = end-start
+        d['times'][self.label] = (end-self.start)*1e-9
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullTimer()
+
+def NullTimer(d, label):
+    """ Stand-in for `Timer` that records nothing. """
+    return _NULL
+
+
+LEVELS = ('off', 'coarse', 'phase', 'full')
+
+def level_timers(level, tracer=None):
+    """ Timer factories for ADMM instrumentation `level`:
+    - 'off': no timing at all
+    - 'coarse': only the total step and the residuals (`coarse`)
+    - 'phase': also each phase of the step (`phase`)
+    - 'full': also each prox call, and a copy of each `prox.info`
+
+    Returns `(coarse, phase)`; disabled ones are `NullTimer`.
+    With a `trace.Tracer`, each timed block is also recorded as a span,
+    at any level.
+    """
+    if level not in LEVELS:
+        raise ValueError('Unrecognized instrumentation level: {}'.format(level))
+
+    i = LEVELS.index(level)
+    coarse = Timer if i >= 1 else NullTimer
+    phase = Timer if i >= 2 else NullTimer
+
+    if tracer is not None:
+        return tracer.timers(coarse, phase)
+    return coarse, phase
+
 
 @contextmanager
 def PrintTimer(label):
-    start = time.time()
+    start = _ns()
     try:
-        yield 
+        yield
     finally:
-        end = time.time()
-        print('{}: {}'.format(label, end-start))
\ No newline at end of file
+        end = _ns()
+        print('{}: {}'.format(label, (end-start)*1e-9))
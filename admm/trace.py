@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+
+"""
+Execution traces of an ADMM solve, in Chrome Trace Event format.
+
+A `Tracer` records a span for each phase of each ADMM step (as timed in
+`admm.admm_step`), and for each prox call: when it started and ended, which
+process and thread ran it, and how long it waited between being handed to
+the backend and starting. `Tracer.save` writes these as Chrome Trace Event
+JSON, which can be opened in `chrome://tracing` or https://ui.perfetto.dev,
+to see which worker ran which prox, and where workers sat idle.
+
+Prox calls are traced by wrapping the function the backend maps over the
+proxes, so this works with any backend. Timestamps are from
+`time.perf_counter_ns`, which is shared by the processes on one machine
+(on Linux), but not across the machines of a `distributed.Cluster`.
+"""
+
+_ns = time.perf_counter_ns
+
+
+class Traced:
+    """ Wraps the function mapped over the proxes (like `functional.do`),
+    adding the span of each call to its output.
+    Module-level, so it can be pickled to worker processes.
+    """
+    def __init__(self, fn, submitted):
+        self.fn = fn
+        self.submitted = submitted
+
+    def __call__(self, func, *args):
+        start = _ns()
+        result, t = self.fn(func, *args)
+        end = _ns()
+        span = (start, end, self.submitted, os.getpid(), threading.get_ident())
+        return result, t, span
+
+
+class _Span:
+    __slots__ = ('tracer', 'timer', 'label', 'start')
+
+    def __init__(self, tracer, timer, label):
+        self.tracer = tracer
+        self.timer = timer
+        self.label = label
+
+    def __enter__(self):
+        self.timer.__enter__()
+        self.start = _ns()
+
+    def __exit__(self, *exc):
+        end = _ns()
+        self.tracer.phase(self.label, self.start, end)
+        return self.timer.__exit__(*exc)
+
+
+class Tracer:
+    """ Records execution spans of ADMM steps and prox calls.
+
+    Pass to `ADMM(tracer=...)`, run the solve, then `save` the trace.
+    """
+    def __init__(self):
+        self.pid = os.getpid()
+        self.origin = _ns()
+        self.events = []
+        self.iter = 0
+        self._last = {}
+
+    def add(self, name, cat, start, end, pid=None, tid=None, args=None):
+        """ Record a complete span, from `start` to `end` in ns. """
+        if pid is None:
+            pid = self.pid
+        if tid is None:
+            tid = threading.get_ident()
+
+        if args is None:
+            args = {}
+
+        self.events += [{'name': name, 'cat': cat, 'ph': 'X',
+                         'ts': (start - self.origin)/1e3,
+                         'dur': (end - start)/1e3,
+                         'pid': pid, 'tid': tid, 'args': args}]
+
+    def phase(self, label, start, end):
+        """ Record the span of a step phase; 'total_step' is the whole step. """
+        if label == 'total_step':
+            self.add('step', 'step', start, end, args={'iter': self.iter})
+            self.iter += 1
+        else:
+            self.add(label, 'phase', start, end, args={'iter': self.iter})
+
+    def prox(self, i, start, end, submitted, pid=None, tid=None):
+        """ Record the span of a call to prox `i`. """
+        self.add('prox {}'.format(i), 'prox', start, end, pid, tid,
+                 {'prox': i, 'iter': self.iter,
+                  'queue_wait_us': (start - submitted)/1e3})
+
+    def timers(self, *timers):
+        """ Wrap timer factories (like those from `timer.level_timers`),
+        so their blocks are also recorded as spans.
+        """
+        def wrap(timer):
+            return lambda d, label: _Span(self, timer(d, label), label)
+        return tuple(wrap(t) for t in timers)
+
+    def wrap(self, fn):
+        """ Traced version of `fn`, to be mapped over the proxes. """
+        return Traced(fn, _ns())
+
+    def collect(self, out, ids=None):
+        """ Record the spans from the output of a `Traced` map,
+        returning the output without them. `ids` are the prox numbers
+        of the outputs, if not 0, 1, ...
+
+        Outputs reused from an earlier step (by a `partial.PartialBarrier`)
+        are only recorded once.
+        """
+        results = []
+        for j, (result, t, span) in enumerate(out):
+            i = j if ids is None else ids[j]
+            if self._last.get(i) != span:
+                self.prox(i, *span)
+                self._last[i] = span
+            results += [(result, t)]
+        return results
+
+    def chrome(self):
+        """ The trace as a Chrome Trace Event dict. """
+        main = (self.pid, threading.main_thread().ident)
+        names = []
+        seen = set()
+        for e in self.events:
+            key = (e['pid'], e['tid'])
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if key == main:
+                name = 'main'
+            else:
+                name = 'worker {}'.format(len(seen - {main}) - 1)
+            names += [{'name': 'thread_name', 'ph': 'M', 'pid': key[0],
+                       'tid': key[1], 'args': {'name': name}}]
+
+        for pid in sorted({e['pid'] for e in self.events}):
+            name = 'admm' if pid == self.pid else 'worker process {}'.format(pid)
+            names += [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                       'args': {'name': name}}]
+
+        return {'traceEvents': names + self.events,
+                'displayTimeUnit': 'ms'}
+
+    def save(self, filename):
+        """ Write the trace as Chrome Trace Event JSON. """
+        with open(filename, 'w') as f:
+            json.dump(self.chrome(), f)
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+"""
+Shared-memory transport for array-valued variables.
+
+Array values in the dicts passed between the parent and the worker
+processes of a `backend.ProcessPool` are written into `SharedBlock` buffers
+and replaced by small `Slot` descriptors. The other side reads them in place
+as numpy views on the shared buffer, so only the dicts of keys, scalars and
+descriptors are pickled.
+
+Each worker has an input block, written by the parent, and an output block,
+written by the worker. Both are created (and unlinked) by the parent. A block
+that is too small is replaced by a bigger one; a worker whose outputs don't
+fit falls back to pickling them for that step, and the parent grows the output
+block for the next one.
+
+Views returned by `unpack` are only valid until the block is written again
+(on the next step) or closed (when it is replaced by a bigger one), and
+reading them after that gives garbage, or crashes. So the parent copies the
+outputs out of the block, and workers give proxes copies of their inputs,
+unless a prox opts in to views by setting `prox.shared_views = True` (and
+then must not keep them past the call).
+"""
+
+Slot = namedtuple('Slot', ['offset', 'shape', 'dtype'])
+
+ALIGN = 64
+
+
+def _nbytes(d):
+    total = 0
+    for v in d.values():
+        if isinstance(v, np.ndarray):
+            total += -(-v.nbytes//ALIGN)*ALIGN
+    return total
+
+def nbytes(dicts):
+    """ Shared buffer size needed to pack the arrays in `dicts`.
+    """
+    return sum(_nbytes(d) for d in dicts if isinstance(d, dict))
+
+
+class SharedBlock:
+    """ A shared memory buffer which arrays are packed into.
+    """
+    def __init__(self, size=0, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, ALIGN))
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.offset = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def size(self):
+        return self.shm.size
+
+    def reset(self):
+        self.offset = 0
+
+    def pack(self, d):
+        """ Copy the arrays in dict `d` into the buffer.
+
+        Returns a new dict, with the arrays replaced by `Slot`s.
+        """
+        out = {}
+        for k, v in d.items():
+            if isinstance(v, np.ndarray) and v.dtype != object:
+                start = self.offset
+                view = np.ndarray(v.shape, dtype=v.dtype, buffer=self.shm.buf, offset=start)
+                view[...] = v
+                self.offset += -(-v.nbytes//ALIGN)*ALIGN
+                out[k] = Slot(start, v.shape, v.dtype.str)
+            else:
+                out[k] = v
+
+        return out
+
+    def unpack(self, d, copy=False):
+        """ Replace the `Slot`s in dict `d` with views on the buffer
+        (or copies of them, if `copy`).
+        """
+        out = {}
+        buf = self.shm.buf
+        for k, v in d.items():
+            if isinstance(v, Slot):
+                out[k] = np.ndarray(v.shape, dtype=v.dtype, buffer=buf, offset=v.offset)
+                if copy:
+                    out[k] = np.array(out[k])
+            else:
+                out[k] = v
+
+        return out
+
+    def close(self):
+        if self.shm is None:
+            return
+        try:
+            self.shm.close()
+        except BufferError:
+            # something still holds the buffer; views from `unpack` don't
+            # count, and must not be used after this (see above)
+            pass
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+def pack_args(block, args):
+    """ Pack every dict in `args` into `block`.
+    """
+    return tuple(block.pack(a) if isinstance(a, dict) else a for a in args)
+
+def unpack_args(block, args, copy=False):
+    return tuple(block.unpack(a, copy) if isinstance(a, dict) else a for a in args)
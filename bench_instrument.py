@@ -0,0 +1,43 @@
+from admm import ADMM, form_sharing_prox
+from admm.timer import LEVELS, SimpleTimer
+
+from admm.tests.iter_times import agent_dict, make_dummy_prox
+
+import numpy as np
+
+"""
+Per-step overhead of each instrumentation level, on many cheap proxes,
+where the bookkeeping is a visible fraction of the step.
+"""
+
+def make_proxes(n, m, k, seed=0):
+    np.random.seed(seed)
+    B = {g: 0 for g in range(n)}
+
+    dicts = [agent_dict(n,k,i) for i in range(m)]
+    return [make_dummy_prox(d) for d in dicts] + [form_sharing_prox(B)]
+
+def run(level, engine, n, m, k, steps):
+    """ Median wall time of one step. """
+    admm = ADMM(make_proxes(n, m, k), rho=1.0, engine=engine, instrument=level)
+    admm.step(2)
+
+    times = []
+    for _ in range(steps):
+        with SimpleTimer() as t:
+            admm.step()
+        times += [t.time]
+
+    return np.median(times)
+
+n = 100 # num goods
+m = 1000 # num agents
+k = 5 # goods per agent
+steps = 50
+
+for engine in ['dict', 'array']:
+    base = run('off', engine, n, m, k, steps)
+    for level in LEVELS:
+        t = base if level == 'off' else run(level, engine, n, m, k, steps)
+        print('{:6} {:7} {:9.3f} ms/step  overhead {:+.3f} ms'.format(
+              engine, level, 1e3*t, 1e3*(t - base)))
@@ -0,0 +1,66 @@
+from admm.projections import (form_box_prox, form_nonneg_prox, form_budget_prox,
+                              form_simplex_prox)
+from admm.sharing import form_sharing_prox, sharing_prox
+from admm.timer import SimpleTimer
+
+import numpy as np
+
+"""
+Time the vectorized projection proxes against hand-written dict versions,
+in the style of `sharing.sharing_prox`, on one large input dict.
+"""
+
+def dict_box(x, lower, upper):
+    return {k: min(max(v, lower), upper) for k, v in x.items()}
+
+def dict_nonneg(x):
+    return {k: max(v, 0.0) for k, v in x.items()}
+
+def dict_budget(x, budget):
+    total = 0.0
+    for k in x:
+        total += x[k]
+    excess = total - budget
+    if excess <= 0:
+        return dict(x)
+    return {k: v - excess/len(x) for k, v in x.items()}
+
+def dict_simplex(x, total=1.0):
+    u = sorted(x.values(), reverse=True)
+    css = 0.0
+    theta = 0.0
+    for i, ui in enumerate(u):
+        css += ui
+        if ui - (css - total)/(i + 1) > 0:
+            theta = (css - total)/(i + 1)
+    return {k: max(v - theta, 0.0) for k, v in x.items()}
+
+def best(f, x, repeat=20):
+    f(x)
+    times = []
+    for _ in range(repeat):
+        with SimpleTimer() as t:
+            f(x)
+        times += [t.time]
+    return min(times)
+
+n = 20000 # num keys
+np.random.seed(0)
+x = {('agent{}'.format(i), i % 100): np.random.randn() for i in range(n)}
+B = {g: 0.0 for g in range(100)}
+
+cases = [
+    ('box', form_box_prox(-.5, .5), lambda x: dict_box(x, -.5, .5)),
+    ('nonneg', form_nonneg_prox(), dict_nonneg),
+    ('budget', form_budget_prox(-100.0), lambda x: dict_budget(x, -100.0)),
+    ('simplex', form_simplex_prox(), dict_simplex),
+    ('sharing', form_sharing_prox(B), lambda x: sharing_prox(x, B)),
+]
+
+for name, prox, ref in cases:
+    out, expected = prox(x), ref(x)
+    assert all(np.isclose(out[k], expected[k]) for k in expected)
+
+    tv, td = best(prox, x), best(ref, x)
+    print('{:8} dict {:7.2f} ms  vectorized {:7.2f} ms  speedup {:5.1f}x'.format(
+          name, 1e3*td, 1e3*tv, td/tv))
@@ -0,0 +1,66 @@
+from admm import ADMM
+from admm.rho_adjust import SpectralRho, make_resid_gap
+from admm.report import iters_to_tol
+from admm.tests.iter_times import agent_dict
+from admm import form_sharing_prox
+
+import numpy as np
+
+"""
+Iterations to reach residuals of `eps`, with `make_resid_gap` and with
+`SpectralRho`, from a range of starting rhos, on
+- a consensus least-squares problem, like `test_consensus` (but with
+  closed-form proxes, so it doesn't need cvxpy)
+- a market with the key structure of `dummy_market_proxes`, but with
+  agents that solve a box-constrained quadratic instead of returning
+  random values
+"""
+
+def make_ls_prox(A, b):
+    """ prox of 1/2||Ax - b||^2 on key 'x' """
+    w, V = np.linalg.eigh(A.T @ A)
+    Atb = A.T @ b
+
+    def prox(x0, rho):
+        v = x0.get('x', np.zeros(len(b)))
+        return {'x': V @ ((V.T @ (Atb + rho*v))/(w + rho))}
+
+    return prox
+
+def consensus_proxes(n=100, k=4, seed=0):
+    np.random.seed(seed)
+    return [make_ls_prox(np.random.randn(n,n), np.random.randn(n))
+            for _ in range(k)]
+
+def make_agent_prox(d, bound=1.0):
+    """ prox of sum_k w_k/2 (x_k - a_k)^2 over the keys of `d`,
+    subject to |x_k| <= bound """
+    a = {k: np.random.randn() for k in d}
+    w = {k: np.exp(np.random.randn()) for k in d}
+
+    def prox(x0, rho):
+        return {k: float(np.clip((w[k]*a[k] + rho*x0.get(k, 0.0))/(w[k] + rho),
+                                 -bound, bound))
+                for k in a}
+
+    return prox
+
+def market_proxes(n=20, m=50, k=5, seed=0):
+    np.random.seed(seed)
+    B = {g: np.random.randn() for g in range(n)}
+    dicts = [agent_dict(n,k,i) for i in range(m)]
+    return [make_agent_prox(d) for d in dicts] + [form_sharing_prox(B)]
+
+eps = 1e-6
+steps = 2000
+
+for name, make in [('consensus', consensus_proxes), ('market', market_proxes)]:
+    for rho in [.01, 1.0, 100.0]:
+        out = []
+        for rho_adj in [make_resid_gap(), SpectralRho()]:
+            admm = ADMM(make(), rho=rho, rho_adj=rho_adj)
+            admm.step(steps)
+            out += [iters_to_tol(admm.infos, eps)]
+
+        print('{:10} rho0 {:6g}  resid_gap {:>5}  spectral {:>5}'.format(
+              name, rho, *[str(n) for n in out]))
@@ -0,0 +1,87 @@
+from admm import ADMM, form_sharing_prox
+
+import numpy as np
+
+"""
+Iterations to re-solve a market after its data changes, warm-started with
+`ADMM.update_proxes` from the previous solution (keeping xbar, the duals
+and rho), versus cold-started from zero, as a new `ADMM`.
+
+The market has agents with box-constrained quadratic costs on some of the
+goods, and a sharing prox for the supplies `B`. Each re-solve perturbs the
+supplies by `shift` (relative), and changes the costs of `changed` agents,
+one of which also drops a good and takes up another.
+"""
+
+def make_agent_prox(a, w, bound=1.0):
+    """ prox of sum_k w_k/2 (x_k - a_k)^2 over the keys of `a`,
+    subject to |x_k| <= bound """
+    def prox(x0, rho):
+        return {k: float(np.clip((w[k]*v + rho*x0.get(k, 0.0))/(w[k] + rho),
+                                 -bound, bound))
+                for k, v in a.items()}
+
+    return prox
+
+def make_agents(m, n, rng):
+    agents = []
+    for i in range(m):
+        a = {(i, g): rng.randn() for g in range(n) if rng.rand() < .5}
+        w = {k: np.exp(rng.randn()) for k in a}
+        agents += [(a, w)]
+    return agents
+
+def perturb(agents, B, shift, changed, rng):
+    agents = list(agents)
+    B = {g: b*(1 + shift*rng.randn()) for g, b in B.items()}
+
+    n = len(B)
+    for j, i in enumerate(rng.choice(len(agents), changed, replace=False)):
+        a, w = agents[i]
+        a = {k: v + .1*rng.randn() for k, v in a.items()}
+        if j == 0:
+            held = [g for _, g in a]
+            free = [g for g in range(n) if g not in held]
+            if held and free:
+                del a[(i, held[0])]
+                a[(i, free[0])] = rng.randn()
+        w = {k: w.get(k, 1.0) for k in a}
+        agents[i] = (a, w)
+
+    return agents, B
+
+def proxes(agents, B):
+    return [make_agent_prox(a, w) for a, w in agents] + [form_sharing_prox(B)]
+
+
+eps_abs, eps_rel = 1e-7, 1e-5
+m, n, rounds = 200, 30, 5
+
+for engine in ['dict', 'array']:
+    for shift, changed in [(.01, 0), (.01, 5), (.1, 20)]:
+        rng = np.random.RandomState(0)
+        agents = make_agents(m, n, rng)
+        B = {g: rng.randn() for g in range(n)}
+
+        warm = ADMM(proxes(agents, B), rho=1.0, engine=engine)
+        warm.solve(eps_abs, eps_rel, check_every=1)
+
+        iters = []
+        for _ in range(rounds):
+            new_agents, B = perturb(agents, B, shift, changed, rng)
+            updates = {i: make_agent_prox(*new_agents[i])
+                       for i in range(m) if new_agents[i] is not agents[i]}
+            updates[m] = form_sharing_prox(B)
+            agents = new_agents
+
+            start = warm.iters
+            warm.update_proxes(updates)
+            warm.solve(eps_abs, eps_rel, check_every=1)
+
+            cold = ADMM(proxes(agents, B), rho=1.0, engine=engine)
+            cold.solve(eps_abs, eps_rel, check_every=1)
+            iters += [(warm.iters - start, cold.iters)]
+
+        warm_iters, cold_iters = np.mean(iters, axis=0)
+        print('{:6} shift {:5g}  changed {:3d}  warm {:6.1f}  cold {:6.1f}'.format(
+              engine, shift, changed, warm_iters, cold_iters))